@@ -4,10 +4,13 @@ from utils.firebase_connector import initialize_firebase
 from utils.auth import load_user_profile
 # --- PERUBAHAN DI SINI ---
 from utils.database import log_activity, check_email_exists
+from utils.request_cache import begin_request, end_request
+from utils.monitoring import span
+from utils.profiling import profile_rerun, tag_profile
 from views.athlete import personal_best
 from views.dashboards import coach, athlete, parent, admin
 from views.manajemen_klub import atlet, spp
-from views.admin import manajemen_user, log_aktivitas
+from views.admin import manajemen_user, log_aktivitas, performa_sistem
 from views.performa_atlet import input, manajemen_performa, personalbest_coach
 from views.parent import personal_best as parent_personal_best
 
@@ -76,6 +79,29 @@ def login_page():
                     st.session_state.login_view = 'login'
                     st.rerun()
 
+# --- Instrumentasi Halaman ---
+def run_page(show_page, *args):
+    """
+    Menjalankan show_page di dalam span waktu (nama span = modul halaman) untuk panel
+    Performa Sistem, lalu mencocokkan jumlah dokumen yang dibaca dengan budget halaman.
+    """
+    tag_profile(page=show_page.__module__)
+    with span('page', show_page.__module__) as frame:
+        try:
+            show_page(*args)
+        finally:
+            db.meter.check_page_budget(frame['name'], frame['reads'])
+
+# --- Navigasi Sub-Halaman ---
+def sub_page_menu(pages, key):
+    """
+    Pengganti st.tabs: st.tabs menjalankan semua tab di setiap rerun walau hanya
+    satu yang terlihat, sedangkan menu ini hanya menjalankan halaman yang dipilih.
+    pages adalah dict {label: fungsi show_page}; pilihan disimpan di session_state[key].
+    """
+    selected = st.radio("Sub-halaman", list(pages.keys()), horizontal=True, key=key, label_visibility="collapsed")
+    return pages[selected]
+
 # --- Halaman Utama Setelah Login ---
 def main_page():
     if 'page_to_show' not in st.session_state:
@@ -101,11 +127,16 @@ def main_page():
             if st.button("Log Aktivitas", use_container_width=True):
                 st.session_state.page_to_show = 'activity_log'
                 st.rerun()
+            if st.button("Performa Sistem", use_container_width=True):
+                st.session_state.page_to_show = 'system_performance'
+                st.rerun()
     
     if st.session_state.page_to_show == 'user_management':
-        manajemen_user.show_page(db, auth, user_profile)
+        run_page(manajemen_user.show_page, db, auth, user_profile)
     elif st.session_state.page_to_show == 'activity_log':
-        log_aktivitas.show_page(db, user_profile)
+        run_page(log_aktivitas.show_page, db, user_profile)
+    elif st.session_state.page_to_show == 'system_performance':
+        run_page(performa_sistem.show_page, db, user_profile)
     else:
         st.title("KSAC Database Management System")
         if role in ['coach', 'admin']:
@@ -114,6 +145,7 @@ def main_page():
                 options=["Dashboard", "Manajemen Klub", "Performa Atlet"],
                 icons=['house-door-fill', 'briefcase-fill', 'trophy-fill'],
                 orientation="horizontal",
+                key="menu_staff",
                 styles={
                     "container": {"padding": "0!important", "background-color": "transparent"},
                     "icon": {"color": "#DC3545", "font-size": "20px"},
@@ -123,23 +155,28 @@ def main_page():
             )
             st.divider()
             if selected_category == "Dashboard":
-                if role == 'admin': admin.show_page(db, user_profile)
-                else: coach.show_page(db, user_profile)
+                if role == 'admin': run_page(admin.show_page, db, user_profile)
+                else: run_page(coach.show_page, db, user_profile)
             elif selected_category == "Manajemen Klub":
-                tab1, tab2 = st.tabs(["Manajemen Atlet", "Manajemen SPP"])
-                with tab1: atlet.show_page(db, user_profile)
-                with tab2: spp.show_page(db, user_profile)
+                show_sub_page = sub_page_menu({
+                    "Manajemen Atlet": atlet.show_page,
+                    "Manajemen SPP": spp.show_page,
+                }, key="manajemen_klub_page")
+                run_page(show_sub_page, db, user_profile)
             elif selected_category == "Performa Atlet":
-                tab1, tab2, tab3 = st.tabs(["Input Hasil Event", "Manajemen & Analisa", "Personal Best"])
-                with tab1: input.show_page(db, user_profile)
-                with tab2: manajemen_performa.show_page(db, user_profile)
-                with tab3: personalbest_coach.show_page(db, user_profile)
+                show_sub_page = sub_page_menu({
+                    "Input Hasil Event": input.show_page,
+                    "Manajemen & Analisa": manajemen_performa.show_page,
+                    "Personal Best": personalbest_coach.show_page,
+                }, key="performa_atlet_page")
+                run_page(show_sub_page, db, user_profile)
         elif role == 'athlete':
             selected_page = option_menu(
                 menu_title=None,
                 options=["Dashboard", "Personal Best"],
                 icons=['house-door-fill', 'award-fill'],
                 orientation="horizontal",
+                key="menu_athlete",
                 styles={
                     "container": {"padding": "0!important", "background-color": "transparent"},
                     "icon": {"color": "#DC3545", "font-size": "20px"},
@@ -148,14 +185,15 @@ def main_page():
                 }
             )
             st.divider()
-            if selected_page == "Dashboard": athlete.show_page(db, user_profile)
-            elif selected_page == "Personal Best": personal_best.show_page(db, user_profile)
+            if selected_page == "Dashboard": run_page(athlete.show_page, db, user_profile)
+            elif selected_page == "Personal Best": run_page(personal_best.show_page, db, user_profile)
         elif role == 'parent':
             selected_page = option_menu(
                 menu_title=None,
                 options=["Dashboard", "Personal Best"],
                 icons=['house-door-fill', 'award-fill'],
                 orientation="horizontal",
+                key="menu_parent",
                 styles={
                     "container": {"padding": "0!important", "background-color": "transparent"},
                     "icon": {"color": "#DC3545", "font-size": "20px"},
@@ -165,12 +203,20 @@ def main_page():
             )
             st.divider()
             if selected_page == "Dashboard":
-                parent.show_page(db, user_profile)
+                run_page(parent.show_page, db, user_profile)
             elif selected_page == "Personal Best":
-                parent_personal_best.show_page(db, user_profile)
+                run_page(parent_personal_best.show_page, db, user_profile)
         else:
             st.header("Selamat Datang")
             st.info("Peran Anda tidak terdefinisi atau belum diatur. Hubungi administrator.")
 
-if 'user' not in st.session_state: login_page()
-else: main_page()
+# --- Memo baca per rerun: dibuat di awal dan dibuang di akhir setiap eksekusi script ---
+begin_request()
+try:
+    # Profil cProfile per rerun bila diaktifkan (KSAC_PROFILE=1 atau panel Performa Sistem)
+    with profile_rerun(st.session_state.get('user_profile', {}).get('role')):
+        if 'user' not in st.session_state: login_page()
+        else: main_page()
+finally:
+    # st.rerun()/st.stop() juga melewati blok ini
+    st.session_state.request_cache_stats = end_request()
@@ -0,0 +1 @@
+"""Benchmark dan data sintetis untuk mengukur performa utils/database.py dan halaman-halaman utama."""
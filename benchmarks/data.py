@@ -0,0 +1,136 @@
+import random
+from datetime import datetime, timedelta
+from views.performa_atlet.input import STROKES, DISTANCES, calculate_age_by_year, calculate_ku
+from views.manajemen_klub.spp import DEFAULT_SPP_AMOUNT
+from utils.log_writer import LOG_SHARDS
+
+# Sama dengan LEVEL_OPTIONS di views/manajemen_klub/atlet.py
+LEVEL_OPTIONS = ["Pemula", 1, 2, 3, 4, 5]
+FIRST_NAMES = ["Adi", "Bima", "Citra", "Dewi", "Eka", "Fajar", "Gita", "Hadi", "Indah", "Joko",
+               "Kartika", "Lestari", "Made", "Nadia", "Oka", "Putri", "Rizky", "Sari", "Tono", "Wulan"]
+LAST_NAMES = ["Pratama", "Saputra", "Wijaya", "Santoso", "Kusuma", "Hidayat", "Nugroho", "Siregar",
+              "Lubis", "Halim", "Gunawan", "Setiawan", "Permana", "Utami", "Rahmawati"]
+COMPETITIONS = ["Latihan Rutin", "Time Trial Bulanan", "Kejuaraan Klub", "Porprov", "Kejurda", "Open Turnamen"]
+PAYMENT_METHODS = ["Transfer", "Tunai", "QRIS"]
+ACTIONS = ["Pengguna login ke sistem.", "Pengguna logout dari sistem.", "Menambahkan catatan waktu untuk {name}",
+           "Mengupdate data atlet: {name}", "Mencatat pembayaran SPP untuk {name}"]
+# Perkiraan waktu per 50 m (detik) untuk atlet usia 8 tahun per gaya; makin tua makin cepat
+BASE_SECONDS_PER_50M = {"Gaya Bebas": 45, "Gaya Punggung": 52, "Gaya Dada": 58, "Gaya Kupu-kupu": 55}
+# Jarak lomba yang umum beserta bobot kemunculannya
+DISTANCE_WEIGHTS = {25: 2, 50: 10, 100: 8, 200: 4, 400: 2, 800: 1, 1500: 1}
+
+
+def format_time(time_ms):
+    minutes, rest = divmod(time_ms, 60000)
+    seconds, rest = divmod(rest, 1000)
+    return f"{minutes:02d}:{seconds:02d}.{rest // 10:02d}"
+
+
+def generate_dataset(n_records, n_athletes=None, years=3, logs_per_day=None, seed=0, now=None):
+    """
+    Membuat data sintetis {koleksi: {doc_id: data}} dengan bentuk yang sama seperti
+    data produksi: atlet tersebar di LEVEL_OPTIONS dan semua KU, catatan waktu di
+    semua STROKES/DISTANCES selama `years` tahun, SPP bulanan, dan log aktivitas.
+    """
+    rng = random.Random(seed)
+    now = now or datetime(2025, 6, 30, 12, 0)
+    n_athletes = n_athletes or max(50, n_records // 100)
+    logs_per_day = logs_per_day if logs_per_day is not None else max(5, n_records // (365 * years) * 2)
+    start = now - timedelta(days=365 * years)
+
+    athletes = {}
+    for i in range(n_athletes):
+        # Usia 6-22 tahun agar semua KU (Pra KU sampai Senior) terisi
+        birth_year = now.year - rng.randint(6, 22)
+        athletes[f"athlete{i:05d}"] = {
+            'name': f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}",
+            'date_of_birth': f"{birth_year}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            'level': rng.choice(LEVEL_OPTIONS),
+            'gender': rng.choice(["Boy", "Girl"]),
+            'created_at': start + timedelta(days=rng.randint(0, 30)),
+        }
+    athlete_ids = list(athletes)
+
+    users = {'admin0': {'displayName': "Admin", 'email': "admin@ksac.test", 'role': 'admin', 'created_at': start}}
+    for i in range(max(2, n_athletes // 25)):
+        users[f"coach{i}"] = {'displayName': f"Coach {i}", 'email': f"coach{i}@ksac.test", 'role': 'coach', 'created_at': start}
+    # Sepertiga atlet punya akun sendiri, sepertiga lagi dipantau orang tua
+    for i, athlete_id in enumerate(athlete_ids[:n_athletes // 3]):
+        uid = f"user_athlete{i}"
+        users[uid] = {'displayName': athletes[athlete_id]['name'], 'email': f"athlete{i}@ksac.test", 'role': 'athlete', 'created_at': start}
+        athletes[athlete_id]['uid'] = uid
+    parent_children = athlete_ids[n_athletes // 3: 2 * n_athletes // 3]
+    for i in range(0, len(parent_children), 2):
+        users[f"user_parent{i}"] = {'displayName': f"Orang Tua {i}", 'email': f"parent{i}@ksac.test", 'role': 'parent',
+                                    'child_athlete_ids': parent_children[i:i + 2], 'created_at': start}
+
+    distances = [d for d in DISTANCES if d in DISTANCE_WEIGHTS]
+    weights = [DISTANCE_WEIGHTS[d] for d in distances]
+    records = {}
+    for i in range(n_records):
+        athlete_id = rng.choice(athlete_ids)
+        athlete = athletes[athlete_id]
+        stroke = rng.choice(STROKES)
+        distance = rng.choices(distances, weights)[0]
+        event_date = start + timedelta(days=rng.randint(0, 365 * years))
+        event_date = datetime(event_date.year, event_date.month, event_date.day)
+        age = calculate_age_by_year(athlete['date_of_birth'], event_date)
+        per_50m = BASE_SECONDS_PER_50M[stroke] * max(0.55, 1 - 0.04 * max(0, age - 8))
+        time_ms = int(per_50m * distance / 50 * 1000 * rng.uniform(0.93, 1.12))
+        records[f"record{i:07d}"] = {
+            'athlete_id': athlete_id,
+            'athlete_name': athlete['name'],
+            'competition_name': rng.choice(COMPETITIONS),
+            'event_date': event_date,
+            'stroke': stroke,
+            'distance': distance,
+            'time_ms': time_ms,
+            'time_formatted': format_time(time_ms),
+            'recorded_by': "Coach 0",
+            'age_at_event': age,
+            'ku_at_event': calculate_ku(age),
+            'created_at': event_date + timedelta(hours=rng.randint(1, 48)),
+        }
+
+    spp_records = {}
+    month = datetime(start.year, start.month, 1)
+    while month <= now:
+        month_key = month.strftime('%Y-%m')
+        for athlete_id in athlete_ids:
+            if rng.random() < 0.85:
+                spp_records[f"{month_key}_{athlete_id}"] = {
+                    'month': month_key, 'athlete_id': athlete_id,
+                    'status': 'Lunas', 'amount': DEFAULT_SPP_AMOUNT,
+                    'payment_date': (month + timedelta(days=rng.randint(0, 20))).strftime('%Y-%m-%d'),
+                    'method': rng.choice(PAYMENT_METHODS), 'notes': "", 'updated_by': "Coach 0",
+                    'updated_at': month + timedelta(days=rng.randint(0, 20)),
+                }
+        month = datetime(month.year + (month.month // 12), month.month % 12 + 1, 1)
+
+    user_items = list(users.items())
+    activity_logs = {}
+    for day in range(365 * years):
+        for j in range(logs_per_day):
+            uid, user = rng.choice(user_items)
+            activity_logs[f"log{day:04d}{j:05d}"] = {
+                'timestamp': start + timedelta(days=day, seconds=rng.randint(0, 86399)),
+                'user_id': uid, 'user_name': user['displayName'], 'user_role': user['role'],
+                'action': rng.choice(ACTIONS).format(name=athletes[rng.choice(athlete_ids)]['name']),
+                'shard': rng.randrange(LOG_SHARDS),
+            }
+
+    return {
+        'athletes': athletes,
+        'users': users,
+        'performance_records': records,
+        'spp_records': spp_records,
+        'activity_logs': activity_logs,
+    }
+
+
+def load_dataset(backend, dataset):
+    """Menulis dataset ke backend dengan batch_write per koleksi."""
+    for collection, docs in dataset.items():
+        operations = [('set', collection, doc_id, data) for doc_id, data in docs.items()]
+        for start in range(0, len(operations), 500):
+            backend.batch_write(operations[start:start + 500])
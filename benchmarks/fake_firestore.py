@@ -0,0 +1,246 @@
+import random
+import secrets
+import string
+import threading
+import time
+from collections import Counter, namedtuple
+from datetime import datetime, timezone
+from google.api_core import exceptions as api_exceptions
+from google.cloud.firestore_v1 import DELETE_FIELD as FIRESTORE_DELETE_FIELD
+from benchmarks.memory_backend import MemoryBackend
+from utils.storage import DELETE_FIELD, ASCENDING, DOCUMENT_ID, _PollingWatch
+
+_ID_ALPHABET = string.ascii_letters + string.digits
+_ChangeType = namedtuple('ChangeType', ['name'])
+_DocumentChange = namedtuple('DocumentChange', ['type', 'document'])
+
+
+def _to_stored(value):
+    """
+    Nilai seperti yang disimpan Firestore: datetime naive dianggap UTC dan dikembalikan
+    ber-timezone, DELETE_FIELD Firestore diganti penanda milik utils.storage.
+    """
+    if value is FIRESTORE_DELETE_FIELD:
+        return DELETE_FIELD
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+    if isinstance(value, dict):
+        return {k: _to_stored(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_stored(v) for v in value]
+    return value
+
+
+class LatencyModel:
+    """
+    Latensi per panggilan RPC (latency_ms ± jitter_ms) dan injeksi error dengan
+    probabilitas error_rate (ServiceUnavailable, seperti koneksi Firestore yang putus).
+    """
+
+    def __init__(self, latency_ms=0, jitter_ms=0, error_rate=0.0, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = Counter()
+        self.errors = Counter()
+
+    def rpc(self, op):
+        with self._lock:
+            self.calls[op] += 1
+            delay = max(0.0, self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+            fail = self.error_rate > 0 and self._rng.random() < self.error_rate
+            if fail:
+                self.errors[op] += 1
+        if delay:
+            time.sleep(delay)
+        if fail:
+            raise api_exceptions.ServiceUnavailable(f"Injected error on {op}")
+
+    def stats(self):
+        with self._lock:
+            return {'calls': dict(self.calls), 'errors': dict(self.errors), 'total_calls': sum(self.calls.values())}
+
+
+class FakeDocumentSnapshot:
+    def __init__(self, reference, data):
+        self.reference = reference
+        self.id = reference.id
+        self._data = data
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return self._data
+
+
+class FakeDocumentReference:
+    def __init__(self, client, collection, doc_id):
+        self._client = client
+        self._collection = collection
+        self.id = doc_id
+
+    @property
+    def path(self):
+        return f"{self._collection}/{self.id}"
+
+    def get(self):
+        self._client.latency.rpc('get')
+        return FakeDocumentSnapshot(self, self._client.store.get(self._collection, self.id))
+
+    def set(self, document_data, merge=False):
+        self._client.latency.rpc('set')
+        self._client.store.set(self._collection, self.id, _to_stored(document_data), merge=merge)
+
+    def update(self, field_updates):
+        self._client.latency.rpc('update')
+        try:
+            self._client.store.update(self._collection, self.id, _to_stored(field_updates))
+        except KeyError as e:
+            raise api_exceptions.NotFound(str(e))
+
+    def delete(self):
+        self._client.latency.rpc('delete')
+        self._client.store.delete(self._collection, self.id)
+
+
+class FakeQuery:
+    def __init__(self, client, collection, filters=(), orders=(), limit=None, start_after=None, projection=None):
+        self._client = client
+        self._collection = collection
+        self._filters = tuple(filters)
+        self._orders = tuple(orders)
+        self._limit = limit
+        self._start_after = start_after
+        self._projection = projection
+
+    def _copy(self, **changes):
+        state = {'filters': self._filters, 'orders': self._orders, 'limit': self._limit, 'start_after': self._start_after,
+                 'projection': self._projection}
+        state.update(changes)
+        return FakeQuery(self._client, self._collection, **state)
+
+    def where(self, field_path=None, op_string=None, value=None, *, filter=None):
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        return self._copy(filters=self._filters + ((field_path, op_string, _to_stored(value)),))
+
+    def select(self, field_paths):
+        return self._copy(projection=tuple(field_paths))
+
+    def order_by(self, field_path, direction=ASCENDING):
+        return self._copy(orders=self._orders + ((field_path, direction),))
+
+    def limit(self, count):
+        return self._copy(limit=count)
+
+    def start_after(self, document_fields_or_snapshot):
+        cursor = document_fields_or_snapshot
+        if isinstance(cursor, FakeDocumentSnapshot):
+            cursor = {**cursor.to_dict(), DOCUMENT_ID: cursor.id}
+        return self._copy(start_after=_to_stored(dict(cursor)))
+
+    def stream(self):
+        self._client.latency.rpc('stream')
+        docs = self._client.store.query(self._collection, filters=list(self._filters), order_by=list(self._orders),
+                                        limit=self._limit, start_after=self._start_after, select=self._projection)
+        for doc in docs:
+            yield FakeDocumentSnapshot(FakeDocumentReference(self._client, self._collection, doc.id), doc.data)
+
+    def get(self):
+        return list(self.stream())
+
+    def on_snapshot(self, callback):
+        """Listener tiruan (polling) dengan bentuk callback seperti Firestore: (docs, changes, read_time)."""
+        def _on_changes(changes):
+            fake_changes = [
+                _DocumentChange(
+                    _ChangeType(change.type),
+                    FakeDocumentSnapshot(FakeDocumentReference(self._client, self._collection, change.document.id), change.document.data))
+                for change in changes
+            ]
+            callback([], fake_changes, datetime.now(timezone.utc))
+        # Snapshot awal melewati jaringan sekali; perubahan berikutnya didorong server (tanpa latensi per poll)
+        self._client.latency.rpc('listen')
+        return _PollingWatch(self._client.store, self._collection, _on_changes, self._client.watch_interval)
+
+
+class FakeCollectionReference(FakeQuery):
+    def __init__(self, client, collection):
+        super().__init__(client, collection)
+        self.id = collection
+
+    def document(self, document_id=None):
+        if document_id is None:
+            document_id = "".join(secrets.choice(_ID_ALPHABET) for _ in range(20))
+        return FakeDocumentReference(self._client, self._collection, document_id)
+
+    def add(self, document_data, document_id=None):
+        doc_ref = self.document(document_id)
+        doc_ref.set(document_data)
+        return datetime.now(timezone.utc), doc_ref
+
+
+class FakeWriteBatch:
+    def __init__(self, client):
+        self._client = client
+        self._operations = []
+
+    def set(self, reference, document_data, merge=False):
+        self._operations.append(('set', reference, _to_stored(document_data), merge))
+
+    def update(self, reference, field_updates):
+        self._operations.append(('update', reference, _to_stored(field_updates), None))
+
+    def delete(self, reference):
+        self._operations.append(('delete', reference, None, None))
+
+    def commit(self):
+        if len(self._operations) > 500:
+            raise api_exceptions.InvalidArgument("maximum 500 writes allowed per request")
+        self._client.latency.rpc('commit')
+        store = self._client.store
+        # Atomik terhadap pembaca lain, seperti WriteBatch Firestore
+        with store._lock:
+            for op, reference, data, merge in self._operations:
+                if op == 'set':
+                    store.set(reference._collection, reference.id, data, merge=bool(merge))
+                elif op == 'update':
+                    try:
+                        store.update(reference._collection, reference.id, data)
+                    except KeyError as e:
+                        raise api_exceptions.NotFound(str(e))
+                else:
+                    store.delete(reference._collection, reference.id)
+        self._operations = []
+
+
+class FakeFirestoreClient:
+    """
+    Klien Firestore palsu di memori untuk FirestoreBackend: mendukung bagian API yang
+    dipakai aplikasi (collection, document, where dengan FieldFilter, select, order_by, limit,
+    start_after, stream, add, set(merge=True), update, delete, DELETE_FIELD, batch,
+    get_all, on_snapshot). Setiap RPC diberi latensi/jitter dan bisa gagal sesuai LatencyModel.
+    project=None membuat FirestoreBackend.location kosong sehingga snapshot tidak ditulis ke disk.
+    """
+
+    def __init__(self, latency_ms=0, jitter_ms=0, error_rate=0.0, seed=None, watch_interval=1.0, project=None):
+        self.project = project
+        self.latency = LatencyModel(latency_ms, jitter_ms, error_rate, seed)
+        self.store = MemoryBackend()
+        self.watch_interval = watch_interval
+
+    def collection(self, collection_path):
+        return FakeCollectionReference(self, collection_path)
+
+    def batch(self):
+        return FakeWriteBatch(self)
+
+    def get_all(self, references):
+        references = list(references)
+        self.latency.rpc('get_all')
+        for reference in references:
+            yield FakeDocumentSnapshot(reference, self.store.get(reference._collection, reference.id))
@@ -0,0 +1,350 @@
+"""
+Uji beban banyak sesi bersamaan: setiap pengguna virtual menjalankan app.py lewat
+Streamlit AppTest (satu AppTest = satu sesi browser) terhadap FakeFirestoreClient
+berisi data sintetis, lalu melalui halaman login, dashboard peran, Personal Best,
+dan (untuk coach) Manajemen & Analisa.
+
+    python -m benchmarks.load_test --users 300 --concurrency 50 --latency 50 --output load.json
+
+Hasil berupa JSON: throughput rerun, persentil latensi rerun (total dan per langkah),
+serta pertumbuhan memori proses beserta ukuran st.session_state dan cache proses.
+"""
+import argparse
+import gc
+import json
+import logging
+import random
+import resource
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import MagicMock
+from urllib import parse
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from streamlit.runtime import Runtime
+from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+from streamlit.runtime.media_file_manager import MediaFileManager
+from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+from streamlit.runtime.pages_manager import PagesManager
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+from streamlit.testing.v1 import AppTest
+from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+from streamlit.testing.v1.util import patch_config_options
+
+from benchmarks.data import generate_dataset, load_dataset
+from benchmarks.fake_firestore import FakeFirestoreClient, LatencyModel
+from benchmarks.run import git_commit
+from utils import cache, database, firebase_connector
+from utils.log_writer import get_log_writer
+from utils.metering import MeteredBackend, UsageMeter
+from utils.performance_snapshot import get_performance_snapshot
+from utils.storage import FirestoreBackend
+
+APP_PATH = str(Path(__file__).resolve().parent.parent / "app.py")
+# Perbandingan peran pengguna virtual: banyak orang tua dan atlet, sedikit coach
+ROLE_WEIGHTS = {'coach': 2, 'parent': 4, 'athlete': 4}
+PASSWORD = "benchmark"
+
+
+class FakeAuth:
+    """Pengganti Pyrebase: login berhasil untuk setiap email di koleksi users (password apa pun)."""
+
+    def __init__(self, users):
+        self._uids = {user['email']: uid for uid, user in users.items()}
+
+    def auth(self):
+        return self
+
+    def sign_in_with_email_and_password(self, email, password):
+        if email not in self._uids:
+            raise ValueError("INVALID_LOGIN_CREDENTIALS")
+        return {'localId': self._uids[email], 'email': email}
+
+    def send_password_reset_email(self, email):
+        return {'email': email}
+
+
+@contextmanager
+def patched_firebase(db, auth):
+    """app.py memanggil initialize_firebase() di setiap rerun; selama uji diarahkan ke backend palsu."""
+    original = firebase_connector.initialize_firebase
+    firebase_connector.initialize_firebase = lambda: (db, auth)
+    try:
+        yield
+    finally:
+        firebase_connector.initialize_firebase = original
+
+
+# --- Sesi AppTest Bersamaan ---
+_script_cache = ScriptCache()
+
+
+class SharedRuntimeAppTest(AppTest):
+    """
+    AppTest biasa memasang Runtime tiruan global di awal setiap run dan menghapusnya
+    di akhir, sehingga sesi yang berjalan bersamaan saling merusak. Di sini semua sesi
+    memakai satu Runtime tiruan dan satu ScriptCache, seperti satu server Streamlit,
+    dan setiap sesi punya session id sendiri (dipakai UsageMeter).
+    """
+
+    def __init__(self, script_path, *, default_timeout):
+        super().__init__(script_path, default_timeout=default_timeout)
+        self.session_id = f"load-{uuid.uuid4().hex[:12]}"
+
+    def _run(self, widget_state=None, timeout=None):
+        pages_manager = PagesManager(self._script_path, _script_cache, setup_watcher=False)
+        script_runner = LocalScriptRunner(self._script_path, self.session_state, pages_manager, args=self.args, kwargs=self.kwargs)
+        # LocalScriptRunner membuat ScriptCache baru dan memakai session id yang sama untuk semua sesi
+        script_runner._script_cache = _script_cache
+        script_runner._session_id = self.session_id
+        self._tree = script_runner.run(widget_state, self.query_params, timeout or self.default_timeout, self._page_hash)
+        self._tree._runner = self
+        self.query_params = parse.parse_qs(script_runner.event_data[-1]["client_state"].query_string)
+        return self
+
+
+@contextmanager
+def shared_runtime():
+    mock_runtime = MagicMock(spec=Runtime)
+    mock_runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    mock_runtime.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime._instance = mock_runtime
+    try:
+        with patch_config_options({"global.appTest": True}):
+            yield
+    finally:
+        Runtime._instance = None
+
+
+# --- Langkah Pengguna Virtual ---
+def _login(email):
+    def action(at):
+        at.text_input(key="login_email").input(email)
+        at.text_input(key="login_password").input(PASSWORD)
+        next(button for button in at.button if button.label == "Login").click()
+    return action
+
+
+def _select(label, value):
+    def action(at):
+        next(selectbox for selectbox in at.selectbox if selectbox.label == label).set_value(value)
+    return action
+
+
+def build_journey(role, user, athlete_id):
+    """
+    List (nama langkah, aksi sebelum rerun). Aksi berupa fungsi(at), dict pilihan menu
+    (option_menu / sub-halaman, lewat key widget di session_state), atau None.
+    """
+    steps = [('login_page', None), ('login', _login(user['email']))]
+    if role == 'coach':
+        steps += [
+            ('dashboard', {'menu_staff': "Dashboard"}),
+            ('manajemen_performa', {'menu_staff': "Performa Atlet", 'performa_atlet_page': "Manajemen & Analisa"}),
+            ('personal_best', {'performa_atlet_page': "Personal Best"}),
+            ('personal_best_athlete', _select("Pilih Atlet untuk Melihat Personal Best", athlete_id)),
+        ]
+    else:
+        steps += [
+            ('dashboard', {f"menu_{role}": "Dashboard"}),
+            ('personal_best', {f"menu_{role}": "Personal Best"}),
+        ]
+    steps.append(('rerun', None))
+    return steps
+
+
+def run_session(journey, timeout, think_s):
+    at = SharedRuntimeAppTest(APP_PATH, default_timeout=timeout)
+    menu_state = {}
+    results = []
+    for step, action in journey:
+        if isinstance(action, dict):
+            menu_state.update(action)
+        elif action:
+            try:
+                action(at)
+            except Exception as e:
+                # Widget yang dituju tidak ada (langkah sebelumnya gagal): sesi ini berhenti
+                results.append({'step': step, 'ms': None, 'error': f"{type(e).__name__}: {e}"})
+                break
+        # AppTest tidak mengirim ulang nilai komponen kustom (option_menu), jadi pilihan menu dipasang di setiap rerun
+        for key, value in menu_state.items():
+            at.session_state[key] = value
+        start = time.perf_counter()
+        try:
+            at.run()
+            error = next((e.value for e in at.exception), None)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        results.append({'step': step, 'ms': (time.perf_counter() - start) * 1000, 'error': error})
+        if think_s:
+            time.sleep(think_s)
+    return at, results
+
+
+# --- Memori ---
+def rss_kb():
+    """RSS proses saat ini (Linux), atau puncak RSS jika /proc tidak tersedia."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def deep_size(obj, seen=None):
+    """Perkiraan ukuran objek beserta isi container, DataFrame, dan tabel Arrow (byte)."""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return int(np.sum(obj.memory_usage(deep=True)))
+    if isinstance(obj, (pa.Table, pa.Array, pa.ChunkedArray)):
+        return obj.nbytes
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_size(item, seen) for item in obj)
+    return size
+
+
+def cache_sizes(db):
+    live = cache._live_collections.get(db, {})
+    snapshot = get_performance_snapshot(db, create=False)
+    query_cache = cache.query_cache(db)
+    return {
+        'live_collections_kb': {name: round(deep_size(collection._docs) / 1024, 1) for name, collection in live.items()},
+        'query_cache_entries': len(query_cache._entries),
+        'query_cache_kb': round(deep_size(query_cache._entries) / 1024, 1),
+        'performance_snapshot_kb': round(snapshot._table.nbytes / 1024, 1) if snapshot and snapshot._table is not None else 0,
+    }
+
+
+def latency_summary(durations):
+    durations = np.array(durations)
+    return {
+        'count': len(durations),
+        'p50_ms': round(float(np.percentile(durations, 50)), 1),
+        'p95_ms': round(float(np.percentile(durations, 95)), 1),
+        'p99_ms': round(float(np.percentile(durations, 99)), 1),
+        'max_ms': round(float(durations.max()), 1),
+    }
+
+
+def pick_users(dataset, n_users, rng):
+    by_role = {}
+    for uid, user in dataset['users'].items():
+        by_role.setdefault(user['role'], []).append(user)
+    roles = [role for role in ROLE_WEIGHTS if by_role.get(role)]
+    weights = [ROLE_WEIGHTS[role] for role in roles]
+    return [(role, rng.choice(by_role[role])) for role in rng.choices(roles, weights, k=n_users)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Uji beban sesi Streamlit bersamaan untuk KSAC DBMS.")
+    parser.add_argument('--users', type=int, default=200, help="jumlah pengguna virtual (sesi)")
+    parser.add_argument('--concurrency', type=int, default=50, help="sesi yang berjalan bersamaan")
+    parser.add_argument('--records', type=int, default=10000, help="jumlah performance_records")
+    parser.add_argument('--latency', type=int, default=0, help="latensi round-trip Firestore palsu (ms)")
+    parser.add_argument('--jitter', type=int, default=0)
+    parser.add_argument('--think-ms', type=int, default=0, help="jeda antar langkah setiap pengguna")
+    parser.add_argument('--timeout', type=float, default=120, help="batas waktu satu rerun AppTest (detik)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="file JSON hasil (default: stdout)")
+    args = parser.parse_args(argv)
+
+    logging.getLogger('streamlit').setLevel(logging.ERROR)
+    rng = random.Random(args.seed)
+    dataset = generate_dataset(args.records, seed=args.seed, now=datetime.now())
+    client = FakeFirestoreClient(seed=args.seed)
+    backend = FirestoreBackend(client)
+    load_dataset(backend, dataset)
+    for athlete_id in dataset['athletes']:
+        database.rebuild_personal_bests(backend, athlete_id)
+    client.latency = LatencyModel(args.latency, args.jitter, seed=args.seed)
+    db = MeteredBackend(backend, UsageMeter())
+
+    athlete_ids = list(dataset['athletes'])
+    journeys = [build_journey(role, user, rng.choice(athlete_ids)) for role, user in pick_users(dataset, args.users, rng)]
+
+    sessions = []
+    with patched_firebase(db, FakeAuth(dataset['users'])), shared_runtime():
+        # Satu sesi pemanasan berurutan: bytecode app.py masuk ScriptCache dan cache proses
+        # terisi (seperti server yang sudah melayani pengguna pertama) sebelum beban dimulai
+        coach = next(user for user in dataset['users'].values() if user['role'] == 'coach')
+        run_session(build_journey('coach', coach, athlete_ids[0]), args.timeout, 0)
+        gc.collect()
+        rss_start = rss_kb()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            futures = [executor.submit(run_session, journey, args.timeout, args.think_ms / 1000) for journey in journeys]
+            for i, future in enumerate(futures, 1):
+                at, results = future.result()
+                sessions.append((at, results))
+                if i % 50 == 0:
+                    print(f"  {i}/{len(journeys)} sesi selesai", file=sys.stderr)
+        wall_s = time.perf_counter() - started
+
+    steps = [result for _, results in sessions for result in results if result['ms'] is not None]
+    per_step = {}
+    for result in steps:
+        per_step.setdefault(result['step'], []).append(result['ms'])
+    errors = [result for _, results in sessions for result in results if result['error']]
+
+    # Sesi tetap hidup (seperti tab browser yang masih terbuka) saat memori diukur
+    gc.collect()
+    rss_sessions = rss_kb()
+    state_sizes = np.array([deep_size(dict(at.session_state.filtered_state)) / 1024 for at, _ in sessions])
+    caches = cache_sizes(db)
+    sessions.clear()
+    gc.collect()
+    rss_released = rss_kb()
+
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': git_commit(),
+        'records': args.records,
+        'users': args.users,
+        'concurrency': args.concurrency,
+        'latency_ms': args.latency,
+        'wall_s': round(wall_s, 2),
+        'throughput_reruns_per_s': round(len(steps) / wall_s, 2),
+        'sessions_per_s': round(args.users / wall_s, 2),
+        'rerun_latency': latency_summary([result['ms'] for result in steps]),
+        'per_step': {step: latency_summary(durations) for step, durations in per_step.items()},
+        'errors': {'count': len(errors), 'examples': sorted({result['error'] for result in errors})[:10]},
+        'rpc_calls': client.latency.stats(),
+        'memory': {
+            'rss_start_kb': rss_start,
+            'rss_with_sessions_kb': rss_sessions,
+            'rss_after_release_kb': rss_released,
+            'growth_per_session_kb': round((rss_sessions - rss_start) / max(args.users, 1), 1),
+            'session_state_kb': {'mean': round(float(state_sizes.mean()), 1), 'max': round(float(state_sizes.max()), 1),
+                                 'total': round(float(state_sizes.sum()), 1)} if len(state_sizes) else None,
+            'process_caches': caches,
+        },
+    }
+
+    get_log_writer(db).close()
+    db.close()
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
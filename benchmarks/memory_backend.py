@@ -0,0 +1,134 @@
+import copy
+import itertools
+import threading
+from utils.storage import StorageBackend, Document, DELETE_FIELD, DESCENDING, DOCUMENT_ID, project_fields, _without_deletes
+from utils.sqlite_storage import _deep_merge
+
+
+def _field_value(doc_id, data, field):
+    """Nilai field (mendukung path bertitik); mengembalikan (ada, nilai)."""
+    if field == DOCUMENT_ID:
+        return True, doc_id
+    value = data
+    for part in field.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return False, None
+        value = value[part]
+    return True, value
+
+
+def _matches(doc_id, data, filters):
+    for field, op, expected in filters or []:
+        present, value = _field_value(doc_id, data, field)
+        # Seperti Firestore: dokumen tanpa field tidak cocok dengan filter apa pun
+        if not present:
+            return False
+        try:
+            if op == '==': ok = value == expected
+            elif op == '!=': ok = value != expected
+            elif op == '<': ok = value < expected
+            elif op == '<=': ok = value <= expected
+            elif op == '>': ok = value > expected
+            elif op == '>=': ok = value >= expected
+            elif op == 'in': ok = value in expected
+            elif op == 'not-in': ok = value not in expected
+            elif op == 'array_contains': ok = isinstance(value, list) and expected in value
+            else: raise ValueError(f"Operator tidak didukung: {op}")
+        except TypeError:
+            # Tipe berbeda tidak pernah cocok (Firestore membandingkan per tipe)
+            ok = False
+        if not ok:
+            return False
+    return True
+
+
+class MemoryBackend(StorageBackend):
+    """
+    Backend palsu di memori proses untuk benchmark: tanpa I/O, tanpa index
+    (setiap query memindai koleksi). Dokumen selalu disalin saat dibaca dan
+    ditulis, seperti klien Firestore yang mengembalikan dict baru.
+    """
+    name = "memory"
+
+    def __init__(self):
+        self._collections = {}
+        self._lock = threading.RLock()
+        self._ids = itertools.count(1)
+
+    def _docs(self, collection):
+        return self._collections.setdefault(collection, {})
+
+    def get(self, collection, doc_id):
+        with self._lock:
+            data = self._docs(collection).get(doc_id)
+            return copy.deepcopy(data) if data is not None else None
+
+    def get_many(self, collection, doc_ids):
+        with self._lock:
+            docs = self._docs(collection)
+            return {doc_id: copy.deepcopy(docs[doc_id]) for doc_id in doc_ids if doc_id in docs}
+
+    def query(self, collection, filters=None, order_by=None, limit=None, start_after=None, select=None):
+        order_by = list(order_by or [])
+        with self._lock:
+            rows = []
+            for doc_id, data in self._docs(collection).items():
+                if not _matches(doc_id, data, filters):
+                    continue
+                values = [_field_value(doc_id, data, field) for field, _ in order_by]
+                # Dokumen tanpa field pengurut tidak ikut
+                if all(present for present, _ in values):
+                    rows.append((doc_id, data, [value for _, value in values]))
+            # Urutkan stabil dari kunci terakhir ke pertama agar arah tiap kunci bisa berbeda
+            for i in reversed(range(len(order_by))):
+                rows.sort(key=lambda row: row[2][i], reverse=order_by[i][1] == DESCENDING)
+            if start_after:
+                cursor = [start_after[field] for field, _ in order_by]
+                rows = [row for row in rows if self._after_cursor(row[2], cursor, order_by)]
+            if limit:
+                rows = rows[:int(limit)]
+            return [Document(doc_id, copy.deepcopy(project_fields(data, select))) for doc_id, data, _ in rows]
+
+    @staticmethod
+    def _after_cursor(values, cursor, order_by):
+        for value, cursor_value, (_, direction) in zip(values, cursor, order_by):
+            if value != cursor_value:
+                return value < cursor_value if direction == DESCENDING else value > cursor_value
+        return False
+
+    def add(self, collection, data):
+        doc_id = f"doc{next(self._ids):08d}"
+        self.set(collection, doc_id, data)
+        return doc_id
+
+    def set(self, collection, doc_id, data, merge=False):
+        with self._lock:
+            docs = self._docs(collection)
+            if merge:
+                docs[doc_id] = _deep_merge(docs.get(doc_id, {}), data)
+            else:
+                docs[doc_id] = _without_deletes(data)
+
+    def update(self, collection, doc_id, data):
+        with self._lock:
+            docs = self._docs(collection)
+            if doc_id not in docs:
+                raise KeyError(f"Dokumen {collection}/{doc_id} tidak ditemukan.")
+            current = docs[doc_id]
+            for field_path, value in data.items():
+                *parents, leaf = field_path.split('.')
+                target = current
+                for part in parents:
+                    target = target.setdefault(part, {})
+                if value is DELETE_FIELD:
+                    target.pop(leaf, None)
+                else:
+                    target[leaf] = _without_deletes(value)
+
+    def delete(self, collection, doc_id):
+        with self._lock:
+            self._docs(collection).pop(doc_id, None)
+
+    def batch_write(self, operations):
+        with self._lock:
+            return super().batch_write(operations)
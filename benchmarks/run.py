@@ -0,0 +1,286 @@
+"""
+Benchmark fungsi utils/database.py dan persiapan data halaman (Manajemen & Analisa,
+SPP, Personal Best) terhadap backend palsu di memori pada beberapa skala data.
+
+    python -m benchmarks.run --scales 1000 10000 100000 --output benchmark.json
+
+Hasil berupa JSON: latensi (mean/p50/p95/maks), throughput, dan puncak memori per kasus.
+"""
+import argparse
+import gc
+import inspect
+import json
+import logging
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+from datetime import date, datetime
+import numpy as np
+
+from benchmarks.data import generate_dataset, load_dataset, format_time
+from benchmarks.memory_backend import MemoryBackend
+from utils import database
+from utils.cache import live_collection
+from utils.log_writer import get_log_writer
+from utils import performance_snapshot
+from utils.performance_snapshot import filter_performance_table
+from utils.sqlite_storage import SQLiteBackend
+from views.manajemen_klub.spp import build_spp_frame, filter_spp_frame, build_spp_pivot, arrears_report, month_keys
+from views.performa_atlet.manajemen_performa import _build_table_frames, _build_chart
+from views.performa_atlet.personalbest_coach import best_times_frame, filter_best_times, format_best_times
+
+DEFAULT_SCALES = [1000, 10000, 100000]
+ACTOR = {'uid': 'coach0', 'displayName': "Coach 0", 'role': 'coach'}
+# Fungsi yang butuh Firebase Auth sungguhan sehingga tidak bisa dijalankan offline
+SKIPPED = {
+    'create_user_account': "membutuhkan Firebase Auth (Pyrebase)",
+    'delete_user_account': "membutuhkan Firebase Admin Auth",
+}
+
+
+def make_backend(name):
+    if name == 'sqlite':
+        return SQLiteBackend(":memory:")
+    return MemoryBackend()
+
+
+def build_cases(db, dataset, rng, archive_dir):
+    """List (grup, nama, fungsi tanpa argumen). Kasus tulis memakai target berbeda di setiap iterasi."""
+    athlete_ids = list(dataset['athletes'])
+    record_ids = list(dataset['performance_records'])
+    months = sorted({payment['month'] for payment in dataset['spp_records'].values()})
+    coach_ids = [uid for uid, user in dataset['users'].items() if user['role'] == 'coach']
+    busiest = Counter(r['athlete_id'] for r in dataset['performance_records'].values()).most_common(1)[0][0]
+    sample = dataset['performance_records'][record_ids[0]]
+    added_athletes = []
+
+    def new_record():
+        record = dict(dataset['performance_records'][rng.choice(record_ids)])
+        record['time_ms'] = rng.randint(25000, 900000)
+        record['time_formatted'] = format_time(record['time_ms'])
+        record.pop('created_at', None)
+        return record
+
+    def pick_month():
+        year, month = map(int, rng.choice(months).split('-'))
+        return year, month
+
+    def add_athlete():
+        name = f"Benchmark {rng.randint(0, 10**9)}"
+        database.add_athlete(db, name, date(2012, 5, 1), 1, "Boy", ACTOR)
+        added_athletes.extend(a['id'] for a in database.load_athletes(db) if a['name'] == name)
+
+    def delete_athlete():
+        if added_athletes:
+            database.delete_athlete(db, added_athletes.pop(), ACTOR, "Benchmark")
+
+    def update_spp_payment():
+        year, month = pick_month()
+        details = {'amount': 250000, 'payment_date': date(year, month, 5), 'method': "Transfer", 'notes': ""}
+        database.update_spp_payment(db, year, month, rng.choice(athlete_ids), details, ACTOR, "Benchmark")
+
+    legacy_months = iter(f"{year}-{month:02d}" for year in range(1990, 2000) for month in range(1, 13))
+
+    def migrate_spp_payments():
+        # Setiap iterasi menyisipkan satu dokumen bulanan format lama (bulan di luar data) untuk dipindahkan
+        month_key = next(legacy_months)
+        payments = {athlete_id: {'status': 'Lunas', 'amount': 250000, 'payment_date': f"{month_key}-05", 'method': "Transfer", 'notes': ""}
+                    for athlete_id in athlete_ids}
+        db.set(database.LEGACY_SPP_COLLECTION, month_key, {'payments': payments})
+        return database.migrate_spp_payments(db, ACTOR)
+
+    def delete_performance_record():
+        record_id = record_ids.pop()
+        database.delete_performance_record(db, record_id, ACTOR, "Benchmark", "00:30.00")
+
+    def cold_performance_table():
+        performance_snapshot._snapshots.pop(db, None)
+        return database.load_performance_table(db)
+
+    def manajemen_performa_prep():
+        table = database.load_performance_table(db)
+        query_filters = {'athlete_id': busiest, 'stroke': sample['stroke'], 'distance': sample['distance']}
+        page = filter_performance_table(table, limit=26)
+        _build_table_frames(page[:25], 0)
+        history = filter_performance_table(table, **query_filters)
+        _build_table_frames(history, 0)
+        _build_chart(history, "Grafik Progres")
+
+    def spp_prep():
+        year, month = pick_month()
+        df_spp = build_spp_frame(database.load_athletes(db), database.load_spp_for_month(db, year, month))
+        filter_spp_frame(df_spp, "a", "Semua Level", "Lunas")
+        df_spp['amount'].sum()
+
+    def spp_year_range():
+        end = datetime(*map(int, months[-1].split('-')), 1)
+        return datetime(end.year - 1, end.month, 1), end
+
+    def spp_arrears_prep():
+        start, end = spp_year_range()
+        athletes = database.load_athletes(db)
+        arrears_report(athletes, build_spp_pivot(athletes, database.load_spp_range(db, start, end), month_keys(start, end)))
+
+    def personal_best_prep():
+        best_records = database.get_personal_bests(db, rng.choice(athlete_ids))
+        if best_records:
+            format_best_times(filter_best_times(best_times_frame(best_records), "Semua Gaya"))
+
+    cases = [
+        ('read', 'check_email_exists', lambda: database.check_email_exists(db, "coach0@ksac.test")),
+        ('read', 'get_logs', lambda: database.get_logs(db, limit=100)),
+        ('read', 'get_logs[role,page=25]', lambda: database.get_logs(db, limit=26, user_role='coach')),
+        ('read', 'log_shard_migration_pending', lambda: database.log_shard_migration_pending(db)),
+        ('read', 'get_all_users', lambda: database.get_all_users(db)),
+        ('read', 'get_user_options', lambda: database.get_user_options(db)),
+        ('read', 'load_athletes', lambda: database.load_athletes(db)),
+        ('read', 'get_unlinked_athletes', lambda: database.get_unlinked_athletes(db)),
+        ('read', 'get_athlete_by_id', lambda: database.get_athlete_by_id(db, rng.choice(athlete_ids))),
+        ('read', 'get_athletes_by_ids', lambda: database.get_athletes_by_ids(db, rng.sample(athlete_ids, min(20, len(athlete_ids))))),
+        ('read', 'load_spp_for_month', lambda: database.load_spp_for_month(db, *pick_month())),
+        ('read', 'load_spp_range[13 bulan]', lambda: database.load_spp_range(db, *spp_year_range())),
+        ('read', 'get_performance_records[all]', lambda: database.get_performance_records(db)),
+        ('read', 'get_performance_records[athlete]', lambda: database.get_performance_records(db, athlete_id=rng.choice(athlete_ids))),
+        ('read', 'get_performance_records[athlete,stroke,distance]', lambda: database.get_performance_records(
+            db, athlete_id=busiest, stroke=sample['stroke'], distance=sample['distance'])),
+        ('read', 'get_performance_records[page=25]', lambda: database.get_performance_records(db, limit=26)),
+        ('read', 'load_performance_table[warm]', lambda: database.load_performance_table(db)),
+        ('read', 'load_performance_table[cold]', cold_performance_table),
+        ('read', 'get_personal_bests', lambda: database.get_personal_bests(db, rng.choice(athlete_ids))),
+        ('read', 'rebuild_personal_bests', lambda: database.rebuild_personal_bests(db, rng.choice(athlete_ids))),
+        ('write', 'log_activity', lambda: database.log_activity(db, ACTOR, "Benchmark")),
+        # pemanasan memindahkan semua log lama; iterasi terukur = pemindaian rutin setelahnya
+        ('write', 'archive_old_logs', lambda: database.archive_old_logs(db, ACTOR, archive_dir=archive_dir)),
+        # dibaca setelah arsip agar ringkasan harian sudah terisi
+        ('read', 'get_log_summaries', lambda: database.get_log_summaries(db)),
+        ('write', 'migrate_log_shards', lambda: database.migrate_log_shards(db, ACTOR)),
+        ('write', 'add_athlete', add_athlete),
+        ('write', 'update_athlete', lambda: database.update_athlete(db, rng.choice(athlete_ids), {'level': rng.choice([1, 2, 3])}, ACTOR)),
+        ('write', 'delete_athlete', delete_athlete),
+        ('write', 'update_user_profile', lambda: database.update_user_profile(db, rng.choice(coach_ids), {'displayName': "Coach"}, ACTOR)),
+        ('write', 'update_spp_payment', update_spp_payment),
+        ('write', 'migrate_spp_payments', migrate_spp_payments),
+        ('write', 'add_performance_record', lambda: database.add_performance_record(db, new_record(), ACTOR)),
+        ('write', 'add_performance_records_bulk[100]', lambda: database.add_performance_records_bulk(
+            db, [new_record() for _ in range(100)], ACTOR, "benchmark")),
+        ('write', 'update_performance_record', lambda: database.update_performance_record(
+            db, rng.choice(record_ids[:len(record_ids) // 2]), {'time_ms': rng.randint(25000, 900000)}, ACTOR, "Benchmark")),
+        ('write', 'delete_performance_record', delete_performance_record),
+        ('page', 'manajemen_performa', manajemen_performa_prep),
+        ('page', 'spp', spp_prep),
+        ('page', 'spp_arrears', spp_arrears_prep),
+        ('page', 'personal_best', personal_best_prep),
+    ]
+    return cases
+
+
+def public_database_functions():
+    return sorted(name for name, value in inspect.getmembers(database, inspect.isfunction)
+                  if not name.startswith('_') and value.__module__ == database.__name__)
+
+
+def measure(fn, iterations):
+    fn()  # pemanasan (cache, import, index)
+    durations = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        durations.append((time.perf_counter() - start) * 1000)
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    durations = np.array(durations)
+    return {
+        'iterations': iterations,
+        'mean_ms': round(float(durations.mean()), 3),
+        'p50_ms': round(float(np.percentile(durations, 50)), 3),
+        'p95_ms': round(float(np.percentile(durations, 95)), 3),
+        'max_ms': round(float(durations.max()), 3),
+        'ops_per_s': round(iterations / (durations.sum() / 1000), 2) if durations.sum() else None,
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+def run_scale(n_records, backend_name, iterations, seed):
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    dataset = generate_dataset(n_records, seed=seed)
+    generate_s = time.perf_counter() - started
+
+    db = make_backend(backend_name)
+    started = time.perf_counter()
+    load_dataset(db, dataset)
+    load_s = time.perf_counter() - started
+    for athlete_id in dataset['athletes']:
+        database.rebuild_personal_bests(db, athlete_id)
+
+    results = []
+    # Arsip log benchmark ditulis ke direktori sementara, bukan ARCHIVE_DIR milik aplikasi
+    with tempfile.TemporaryDirectory(prefix="ksac_log_archive_") as archive_dir:
+        for group, name, fn in build_cases(db, dataset, rng, archive_dir):
+            print(f"  {n_records:>7} {name}", file=sys.stderr)
+            results.append({'group': group, 'name': name, **measure(fn, iterations)})
+
+    covered = {result['name'].split('[')[0] for result in results}
+    missing = [name for name in public_database_functions() if name not in covered and name not in SKIPPED]
+
+    get_log_writer(db).close()
+    live_athletes = live_collection(db, 'athletes', create=False)
+    if live_athletes:
+        live_athletes.close()
+    return {
+        'records': n_records,
+        'collections': {collection: len(docs) for collection, docs in dataset.items()},
+        'generate_s': round(generate_s, 3),
+        'load_s': round(load_s, 3),
+        'results': results,
+        'skipped': SKIPPED,
+        'not_covered': missing,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark KSAC DBMS terhadap backend palsu di memori.")
+    parser.add_argument('--scales', type=int, nargs='+', default=DEFAULT_SCALES, help="jumlah performance_records per skala")
+    parser.add_argument('--iterations', type=int, default=10)
+    parser.add_argument('--backend', choices=['memory', 'sqlite'], default='memory')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="file JSON hasil (default: stdout)")
+    args = parser.parse_args(argv)
+
+    # st.error di luar runtime Streamlit hanya menghasilkan peringatan "missing ScriptRunContext"
+    logging.getLogger('streamlit').setLevel(logging.ERROR)
+
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'backend': args.backend,
+        'iterations': args.iterations,
+        'scales': [run_scale(n, args.backend, args.iterations, args.seed) for n in args.scales],
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""
+Mengukur waktu render halaman lewat Streamlit AppTest saat Firestore lambat: data
+sintetis dimuat ke FakeFirestoreClient, lalu setiap halaman dijalankan pada beberapa
+latensi round-trip tanpa akses jaringan.
+
+    python -m benchmarks.slow_link --latencies 0 50 100 200 300 --records 5000 --output slow_link.json
+
+Per halaman dicatat render pertama (cache proses masih kosong) dan rerun berikutnya:
+durasi, jumlah RPC ke Firestore, dan dokumen yang dibaca.
+"""
+import argparse
+import json
+import logging
+import sys
+import time
+from datetime import datetime
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.data import generate_dataset, load_dataset
+from benchmarks.fake_firestore import FakeFirestoreClient, LatencyModel
+from benchmarks.run import git_commit
+from utils import database
+from utils.cache import live_collection
+from utils.log_writer import get_log_writer
+from utils.monitoring import MonitoredBackend
+from utils.storage import FirestoreBackend
+
+DEFAULT_LATENCIES = [0, 50, 100, 200, 300]
+COACH = {'uid': 'coach0', 'displayName': "Coach 0", 'role': 'coach'}
+RERUNS = 3
+
+
+def _page_script(module_name, db, user_profile):
+    """Script AppTest: menjalankan satu halaman seperti run_page di app.py."""
+    import importlib
+    import streamlit as st
+    from utils.monitoring import span
+    from utils.request_cache import begin_request, end_request
+
+    page = importlib.import_module(module_name)
+    begin_request()
+    try:
+        with span('page', module_name) as frame:
+            page.show_page(db, user_profile)
+    finally:
+        st.session_state.request_cache_stats = end_request()
+        st.session_state.slow_link_reads = frame['reads']
+
+
+def _select_athlete(at, athlete_id):
+    """Personal Best baru memuat data setelah atlet dipilih."""
+    at.selectbox[0].set_value(athlete_id)
+
+
+# (modul halaman, aksi setelah render pertama atau None)
+PAGES = [
+    ('views.performa_atlet.manajemen_performa', None),
+    ('views.manajemen_klub.spp', None),
+    ('views.manajemen_klub.atlet', None),
+    ('views.performa_atlet.personalbest_coach', _select_athlete),
+]
+
+
+def timed_run(at, client):
+    calls_before = client.latency.stats()['total_calls']
+    start = time.perf_counter()
+    at.run()
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    return {
+        'ms': round(elapsed_ms, 1),
+        'rpcs': client.latency.stats()['total_calls'] - calls_before,
+        'reads': at.session_state['slow_link_reads'] if 'slow_link_reads' in at.session_state else None,
+        'exception': [e.value for e in at.exception] or None,
+    }
+
+
+def run_latency(dataset, latency_ms, jitter_ms, error_rate, seed, timeout):
+    client = FakeFirestoreClient(seed=seed)
+    backend = FirestoreBackend(client)
+    load_dataset(backend, dataset)
+    for athlete_id in dataset['athletes']:
+        database.rebuild_personal_bests(backend, athlete_id)
+    db = MonitoredBackend(backend)
+    # Latensi baru dipasang setelah data dimuat agar seeding tidak ikut terhitung
+    client.latency = LatencyModel(latency_ms, jitter_ms, error_rate, seed)
+
+    athlete_id = next(iter(dataset['athletes']))
+    pages = []
+    for module_name, action in PAGES:
+        print(f"  {latency_ms:>4} ms {module_name}", file=sys.stderr)
+        at = AppTest.from_function(_page_script, args=(module_name, db, COACH), default_timeout=timeout)
+        first = timed_run(at, client)
+        if action:
+            action(at, athlete_id)
+            first = timed_run(at, client)
+        reruns = [timed_run(at, client) for _ in range(RERUNS)]
+        pages.append({
+            'page': module_name,
+            'first_render': first,
+            'rerun_ms': [run['ms'] for run in reruns],
+            'rerun_rpcs': [run['rpcs'] for run in reruns],
+            'rerun_reads': [run['reads'] for run in reruns],
+            'exceptions': [run['exception'] for run in reruns if run['exception']],
+        })
+
+    get_log_writer(db).close()
+    for collection in ('athletes', 'users'):
+        live = live_collection(db, collection, create=False)
+        if live:
+            live.close()
+    return {'latency_ms': latency_ms, 'jitter_ms': jitter_ms, 'error_rate': error_rate,
+            'rpc_calls': client.latency.stats(), 'pages': pages}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Waktu render halaman KSAC DBMS pada Firestore palsu yang lambat.")
+    parser.add_argument('--latencies', type=int, nargs='+', default=DEFAULT_LATENCIES, help="latensi round-trip (ms)")
+    parser.add_argument('--jitter', type=int, default=0, help="jitter latensi ± ms")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="peluang setiap RPC gagal (ServiceUnavailable)")
+    parser.add_argument('--records', type=int, default=5000, help="jumlah performance_records")
+    parser.add_argument('--timeout', type=float, default=120, help="batas waktu satu render AppTest (detik)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="file JSON hasil (default: stdout)")
+    args = parser.parse_args(argv)
+
+    logging.getLogger('streamlit').setLevel(logging.ERROR)
+    # SPP dan dashboard memakai bulan berjalan, jadi data dibuat sampai hari ini
+    dataset = generate_dataset(args.records, seed=args.seed, now=datetime.now())
+
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': git_commit(),
+        'records': args.records,
+        'results': [run_latency(dataset, latency, args.jitter, args.error_rate, args.seed, args.timeout)
+                    for latency in args.latencies],
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
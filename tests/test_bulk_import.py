@@ -0,0 +1,52 @@
+import pandas as pd
+from benchmarks.memory_backend import MemoryBackend
+from utils.database import add_performance_records_bulk
+from utils.storage import MAX_BATCH_SIZE
+from views.performa_atlet.input import prepare_bulk_records, BULK_COLUMNS
+
+ATHLETES = [
+    {'id': 'a1', 'name': "Budi Santoso", 'date_of_birth': "2012-05-01"},
+    {'id': 'a2', 'name': " budi santoso ", 'date_of_birth': "2011-03-02"},
+    {'id': 'a3', 'name': "Citra Dewi", 'date_of_birth': "2013-07-09"},
+]
+
+
+def _rows(*names):
+    return pd.DataFrame([[name, "Kejuaraan Klub", "10/01/2025", "Gaya Bebas", 50, "00:35.20"] for name in names],
+                        columns=BULK_COLUMNS)
+
+
+def test_ambiguous_name_is_rejected_not_assigned_to_first_athlete():
+    records, df_errors = prepare_bulk_records(_rows("BUDI SANTOSO", "Citra Dewi"), ATHLETES, "Coach")
+    assert [r['athlete_id'] for r in records] == ['a3']
+    assert df_errors['Baris'].tolist() == [2]
+    assert "ambigu" in df_errors['Kesalahan'].iloc[0]
+
+
+def test_unknown_name_still_reported():
+    records, df_errors = prepare_bulk_records(_rows("Tidak Ada"), ATHLETES, "Coach")
+    assert records == []
+    assert df_errors['Kesalahan'].tolist() == ["Atlet tidak ditemukan"]
+
+
+class FailingSecondBatchBackend(MemoryBackend):
+    def __init__(self):
+        super().__init__()
+        self.batches = 0
+
+    def batch_write(self, operations):
+        self.batches += 1
+        if self.batches == 2:
+            raise RuntimeError("batch gagal")
+        return super().batch_write(operations)
+
+
+def test_partial_bulk_import_reports_committed_count_and_syncs_their_personal_bests():
+    db = FailingSecondBatchBackend()
+    records = [{'athlete_id': 'a1' if index < MAX_BATCH_SIZE else 'a3', 'athlete_name': "Budi", 'stroke': "Gaya Bebas",
+                'distance': 50, 'time_ms': 40000 - index, 'time_formatted': "00:40.00"} for index in range(MAX_BATCH_SIZE + 10)]
+    saved = add_performance_records_bulk(db, records, {'uid': 'c1', 'displayName': "Coach", 'role': 'coach'}, "Kejuaraan Klub")
+    assert saved == MAX_BATCH_SIZE
+    assert len(db.query('performance_records')) == MAX_BATCH_SIZE
+    assert db.get('personal_bests', 'a1')['bests']['50_Gaya Bebas']['time_ms'] == 40000 - (MAX_BATCH_SIZE - 1)
+    assert db.get('personal_bests', 'a3') is None
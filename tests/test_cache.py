@@ -0,0 +1,40 @@
+from benchmarks.fake_firestore import FakeFirestoreClient
+from benchmarks.memory_backend import MemoryBackend
+from utils.cache import live_collection
+from utils.database import load_athletes
+from utils.storage import FirestoreBackend
+
+
+class CountingBackend(MemoryBackend):
+    def __init__(self):
+        super().__init__()
+        self.queries = 0
+
+    def query(self, collection, *args, **kwargs):
+        self.queries += 1
+        return super().query(collection, *args, **kwargs)
+
+
+def test_backend_without_listener_uses_query_cache_not_polling():
+    db = CountingBackend()
+    db.set('athletes', 'a1', {'name': "Budi"})
+    assert live_collection(db, 'athletes') is None
+    assert [a['id'] for a in load_athletes(db)] == ['a1']
+    load_athletes(db)
+    assert db.queries == 1
+
+
+def test_dropped_listener_falls_back_and_resubscribes():
+    db = FirestoreBackend(FakeFirestoreClient(watch_interval=0.01))
+    db.set('athletes', 'a1', {'name': "Budi"})
+    live = live_collection(db, 'athletes', order_field='name')
+    try:
+        assert [a['id'] for a in live.snapshot()] == ['a1']
+        dropped = live._watch
+        dropped.unsubscribe()
+        # Pembacaan pertama setelah terputus memasang listener baru, lalu snapshot awalnya dipakai
+        assert live.snapshot() is None
+        assert live._watch is not dropped and live._watch.is_active
+        assert [a['id'] for a in live.snapshot()] == ['a1']
+    finally:
+        live.close()
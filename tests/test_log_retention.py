@@ -0,0 +1,68 @@
+import glob
+import gzip
+import json
+import os
+import time as time_module
+from datetime import datetime, timezone
+import pytest
+from benchmarks.fake_firestore import FakeFirestoreClient
+from benchmarks.memory_backend import MemoryBackend
+from utils.log_retention import run_log_retention, SUMMARY_COLLECTION
+from utils.storage import FirestoreBackend
+
+
+@pytest.fixture
+def jakarta_tz(monkeypatch):
+    monkeypatch.setenv('TZ', 'Asia/Jakarta')
+    time_module.tzset()
+    yield
+    monkeypatch.undo()
+    time_module.tzset()
+
+
+def test_day_bucket_uses_utc_not_server_local_time(jakarta_tz, tmp_path):
+    db = FirestoreBackend(FakeFirestoreClient())
+    # 20:00 UTC = 03:00 WIB hari berikutnya; ringkasan tetap masuk hari UTC
+    db.set('activity_logs', 'log1', {'timestamp': datetime(2026, 1, 10, 20, 0, tzinfo=timezone.utc), 'shard': 0,
+                                     'user_id': 'u1', 'user_name': "Admin", 'user_role': 'admin', 'action': "Login"})
+    result = run_log_retention(db, retention_days=30, archive_dir=str(tmp_path),
+                               now=datetime(2026, 3, 1, tzinfo=timezone.utc))
+    assert result['archived'] == 1
+    assert [day.isoformat() for day in result['days']] == ['2026-01-10']
+    assert db.get(SUMMARY_COLLECTION, '2026-01-10')['total'] == 1
+    assert db.get(SUMMARY_COLLECTION, '2026-01-11') is None
+    assert db.get('activity_logs', 'log1') is None
+
+
+def test_cutoff_keeps_logs_inside_retention_window(jakarta_tz, tmp_path):
+    db = FirestoreBackend(FakeFirestoreClient())
+    db.set('activity_logs', 'recent', {'timestamp': datetime(2026, 2, 28, 23, 0, tzinfo=timezone.utc), 'shard': 1,
+                                       'user_role': 'coach', 'action': "Login"})
+    result = run_log_retention(db, retention_days=1, archive_dir=str(tmp_path),
+                               now=datetime(2026, 3, 1, 1, 0, tzinfo=timezone.utc))
+    assert result['archived'] == 0
+    assert db.get('activity_logs', 'recent') is not None
+
+
+class FailingBatchBackend(MemoryBackend):
+    fail = True
+
+    def batch_write(self, operations):
+        if self.fail:
+            raise RuntimeError("commit gagal")
+        return super().batch_write(operations)
+
+
+def test_rerun_after_failed_batch_does_not_duplicate_archive_rows(tmp_path):
+    db = FailingBatchBackend()
+    for index in range(3):
+        db.set('activity_logs', f"log{index}", {'timestamp': datetime(2026, 1, 10, 8, index), 'shard': 0, 'action': "Login"})
+    with pytest.raises(RuntimeError):
+        run_log_retention(db, retention_days=30, archive_dir=str(tmp_path), now=datetime(2026, 3, 1))
+    db.fail = False
+    result = run_log_retention(db, retention_days=30, archive_dir=str(tmp_path), now=datetime(2026, 3, 1))
+    assert result['archived'] == 3
+    (path,) = result['files']
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        assert [json.loads(line)['id'] for line in f] == ['log0', 'log1', 'log2']
+    assert not glob.glob(os.path.join(str(tmp_path), '**', '*.tmp'), recursive=True)
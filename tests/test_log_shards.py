@@ -0,0 +1,31 @@
+from datetime import datetime
+from benchmarks.memory_backend import MemoryBackend
+from utils.database import get_logs, log_shard_migration_pending, migrate_log_shards, LOG_SHARD_MARKER
+from utils.log_retention import run_log_retention
+
+ADMIN = {'uid': 'admin', 'displayName': "Admin", 'role': 'admin'}
+
+
+def _legacy_db():
+    db = MemoryBackend()
+    db.set('activity_logs', 'legacy', {'timestamp': datetime(2025, 1, 5, 9, 0), 'user_role': 'coach', 'action': "Login"})
+    db.set('activity_logs', 'sharded', {'timestamp': datetime(2025, 1, 6, 9, 0), 'user_role': 'coach', 'action': "Login", 'shard': 3})
+    return db
+
+
+def test_reads_do_not_migrate_implicitly(tmp_path):
+    db = _legacy_db()
+    assert [log['id'] for log in get_logs(db)] == ['sharded']
+    run_log_retention(db, retention_days=30, archive_dir=str(tmp_path), now=datetime(2025, 1, 1))
+    assert 'shard' not in db.get('activity_logs', 'legacy')
+    assert log_shard_migration_pending(db)
+
+
+def test_explicit_migration_makes_legacy_logs_visible_and_is_idempotent():
+    db = _legacy_db()
+    assert migrate_log_shards(db, ADMIN) == 1
+    assert [log['id'] for log in get_logs(db)] == ['sharded', 'legacy']
+    assert db.get('activity_logs', 'legacy')['shard'] in range(8)
+    assert not log_shard_migration_pending(db)
+    assert migrate_log_shards(db, ADMIN) == 0
+    assert db.get(*LOG_SHARD_MARKER)['migrated'] == 0
@@ -0,0 +1,29 @@
+from datetime import datetime
+from benchmarks.memory_backend import MemoryBackend
+from utils.database import get_performance_records
+
+
+def _db():
+    db = MemoryBackend()
+    for index in range(7):
+        # Dua catatan per tanggal agar cursor harus memakai id sebagai pemecah seri
+        db.set('performance_records', f"r{index}", {'athlete_id': 'a1', 'stroke': "Gaya Bebas", 'distance': 50,
+                                                    'event_date': datetime(2025, 1, 1 + index // 2), 'time_ms': 35000 + index})
+    return db
+
+
+def test_cursor_pagination_walks_every_record_once_in_order():
+    db = _db()
+    pages, cursor = [], None
+    while True:
+        page = get_performance_records(db, athlete_id='a1', limit=3, start_after=cursor)
+        if not page:
+            break
+        pages.append([record['id'] for record in page])
+        cursor = (page[-1]['event_date'], page[-1]['id'])
+    assert pages == [['r6', 'r5', 'r4'], ['r3', 'r2', 'r1'], ['r0']]
+
+
+def test_field_projection_returns_only_requested_fields():
+    records = get_performance_records(_db(), limit=1, fields=['time_ms'])
+    assert records == [{'id': 'r6', 'time_ms': 35006}]
@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+from benchmarks.memory_backend import MemoryBackend
+from utils.performance_snapshot import PerformanceSnapshot, TOMBSTONE_COLLECTION, TOMBSTONE_RETENTION
+
+
+def _record(index, **overrides):
+    now = datetime.now()
+    return {'athlete_id': 'a1', 'athlete_name': "Budi", 'stroke': "Gaya Bebas", 'distance': 50, 'time_ms': 35000 + index,
+            'event_date': datetime(2025, 1, 1 + index), 'created_at': now, **overrides}
+
+
+def _ids(snapshot):
+    return snapshot.table()['id'].to_pylist()
+
+
+def test_delta_sync_applies_new_updated_and_tombstoned_records():
+    db = MemoryBackend()
+    db.set('performance_records', 'r0', _record(0))
+    db.set('performance_records', 'r1', _record(1))
+    snapshot = PerformanceSnapshot(db)
+    assert _ids(snapshot) == ['r1', 'r0']
+
+    db.set('performance_records', 'r2', _record(2))
+    db.update('performance_records', 'r0', {'time_ms': 30000, 'updated_at': datetime.now()})
+    db.delete('performance_records', 'r1')
+    db.set(TOMBSTONE_COLLECTION, 'r1', {'record_id': 'r1', 'deleted_at': datetime.now()})
+    snapshot.mark_stale()
+    table = snapshot.table()
+    assert table['id'].to_pylist() == ['r2', 'r0']
+    assert table['time_ms'].to_pylist() == [35002, 30000]
+
+
+def test_malformed_record_is_coerced_or_skipped_not_fatal():
+    db = MemoryBackend()
+    db.set('performance_records', 'ok', _record(0))
+    db.set('performance_records', 'coerced', _record(1, distance="100", event_date="2025-01-05"))
+    db.set('performance_records', 'broken', _record(2, time_ms="cepat"))
+    table = PerformanceSnapshot(db).table()
+    assert table['id'].to_pylist() == ['coerced', 'ok']
+    assert table['distance'].to_pylist() == [100, 50]
+
+
+def test_old_tombstones_are_pruned_and_expired_snapshot_reloads():
+    db = MemoryBackend()
+    db.set('performance_records', 'r0', _record(0))
+    old = datetime.now() - TOMBSTONE_RETENTION - timedelta(days=1)
+    db.set(TOMBSTONE_COLLECTION, 'old', {'record_id': 'old', 'deleted_at': old})
+    db.set(TOMBSTONE_COLLECTION, 'recent', {'record_id': 'recent', 'deleted_at': datetime.now()})
+    snapshot = PerformanceSnapshot(db)
+    snapshot.table()
+    assert db.get(TOMBSTONE_COLLECTION, 'old') is None
+    assert db.get(TOMBSTONE_COLLECTION, 'recent') is not None
+
+    # Snapshot yang tidak sync melewati masa simpan tombstone harus dimuat penuh, bukan delta
+    db.delete('performance_records', 'r0')
+    snapshot._synced_at = old
+    snapshot.mark_stale()
+    assert _ids(snapshot) == []
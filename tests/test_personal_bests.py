@@ -0,0 +1,69 @@
+from benchmarks.memory_backend import MemoryBackend
+from utils.database import (add_performance_record, update_performance_record, delete_performance_record,
+                            get_personal_bests, rebuild_personal_bests, BEST_TIME_FIELDS)
+
+ACTOR = {'uid': 'c1', 'displayName': "Coach", 'role': 'coach'}
+
+
+def _record(time_ms, stroke="Gaya Bebas", distance=50, athlete_id='a1'):
+    return {'athlete_id': athlete_id, 'athlete_name': "Budi", 'stroke': stroke, 'distance': distance,
+            'time_ms': time_ms, 'time_formatted': str(time_ms), 'competition_name': "Kejuaraan Klub", 'event_date': "2025-01-10"}
+
+
+def _add(db, time_ms, **kwargs):
+    add_performance_record(db, _record(time_ms, **kwargs), ACTOR)
+    (doc,) = [doc for doc in db.query('performance_records') if doc.data['time_ms'] == time_ms]
+    return doc.id
+
+
+def _best(db, key='50_Gaya Bebas', athlete_id='a1'):
+    return db.get('personal_bests', athlete_id)['bests'].get(key)
+
+
+def test_add_keeps_only_the_fastest_time():
+    db = MemoryBackend()
+    _add(db, 40000)
+    fastest = _add(db, 35000)
+    _add(db, 38000)
+    assert _best(db)['record_id'] == fastest
+    assert _best(db)['time_ms'] == 35000
+
+
+def test_deleting_the_best_falls_back_to_next_fastest_and_removes_empty_event():
+    db = MemoryBackend()
+    fastest = _add(db, 35000)
+    second = _add(db, 38000)
+    delete_performance_record(db, fastest, ACTOR, "Budi", "35000")
+    assert _best(db)['record_id'] == second
+    delete_performance_record(db, second, ACTOR, "Budi", "38000")
+    assert _best(db) is None
+
+
+def test_slower_update_or_event_change_recomputes_the_best():
+    db = MemoryBackend()
+    fastest = _add(db, 35000)
+    second = _add(db, 38000)
+    update_performance_record(db, fastest, {'time_ms': 39000}, ACTOR, "Budi")
+    assert _best(db)['record_id'] == second
+    update_performance_record(db, second, {'stroke': "Gaya Dada"}, ACTOR, "Budi")
+    assert _best(db)['record_id'] == fastest
+    assert _best(db, '50_Gaya Dada')['record_id'] == second
+
+
+def test_incremental_sync_matches_full_rebuild():
+    db = MemoryBackend()
+    ids = [_add(db, time_ms, stroke=stroke) for time_ms, stroke in [(40000, "Gaya Bebas"), (36000, "Gaya Bebas"), (45000, "Gaya Dada")]]
+    update_performance_record(db, ids[1], {'time_ms': 41000}, ACTOR, "Budi")
+    delete_performance_record(db, ids[2], ACTOR, "Budi", "45000")
+    incremental = db.get('personal_bests', 'a1')['bests']
+    assert incremental == rebuild_personal_bests(db, 'a1')
+
+
+def test_first_read_builds_the_document_and_projects_fields():
+    db = MemoryBackend()
+    record_id = db.add('performance_records', _record(35000))
+    assert db.get('personal_bests', 'a1') is None
+    (best,) = get_personal_bests(db, 'a1', fields=BEST_TIME_FIELDS)
+    assert best['id'] == record_id
+    assert set(best) == {'id', *BEST_TIME_FIELDS}
+    assert db.get('personal_bests', 'a1') is not None
@@ -0,0 +1,55 @@
+from utils.request_cache import begin_request, end_request, request_memoized, clears_request_cache, request_failed
+
+calls = []
+
+
+@request_memoized
+def read(_db, key):
+    calls.append(key)
+    if _db.get('fail'):
+        request_failed()
+        return []
+    return [{'key': key}]
+
+
+@request_memoized
+def read_outer(_db, key):
+    return read(_db, key)
+
+
+@clears_request_cache
+def write(_db):
+    pass
+
+
+def setup_function():
+    calls.clear()
+    begin_request()
+
+
+def teardown_function():
+    end_request()
+
+
+def test_hits_share_the_memoized_value_without_copying():
+    db = {}
+    first = read(db, 'a')
+    assert read(db, 'a') is first
+    assert calls == ['a']
+
+
+def test_write_clears_the_memo():
+    db = {}
+    read(db, 'a')
+    write(db)
+    read(db, 'a')
+    assert calls == ['a', 'a']
+
+
+def test_failed_reads_are_not_memoized_even_through_callers():
+    db = {'fail': True}
+    assert read_outer(db, 'a') == []
+    db['fail'] = False
+    assert read_outer(db, 'a') == [{'key': 'a'}]
+    assert read_outer(db, 'a') == [{'key': 'a'}]
+    assert calls == ['a', 'a']
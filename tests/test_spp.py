@@ -0,0 +1,55 @@
+from datetime import datetime
+from benchmarks.memory_backend import MemoryBackend
+from utils.cache import query_cache
+from utils.database import load_spp_for_month, load_spp_range, update_spp_payment, LEGACY_SPP_COLLECTION, SPP_COLLECTION
+from views.manajemen_klub.spp import build_spp_pivot, arrears_report, month_keys
+
+ATHLETES = [
+    {'id': 'a1', 'name': "Budi", 'level': "Pemula", 'created_at': datetime(2025, 1, 1)},
+    {'id': 'a2', 'name': "Citra", 'level': 2, 'created_at': datetime(2025, 1, 1)},
+]
+
+
+def _payment(amount):
+    return {'status': 'Lunas', 'amount': amount, 'payment_date': "2025-02-05", 'method': "Transfer", 'notes': ""}
+
+
+def _legacy_db():
+    db = MemoryBackend()
+    db.set(LEGACY_SPP_COLLECTION, '2025-02', {'month_year': "02-2025", 'payments': {'a1': _payment(300000), 'a2': _payment(300000)}})
+    return db
+
+
+def test_legacy_only_month_is_loaded():
+    payments = load_spp_for_month(_legacy_db(), 2025, 2)
+    assert set(payments) == {'a1', 'a2'}
+    assert payments['a1']['status'] == 'Lunas'
+
+
+def test_new_record_overrides_legacy_payment_in_same_month():
+    db = _legacy_db()
+    db.set(SPP_COLLECTION, '2025-02_a1', {'month': '2025-02', 'athlete_id': 'a1', **_payment(250000)})
+    payments = load_spp_for_month(db, 2025, 2)
+    assert payments['a1']['amount'] == 250000
+    assert payments['a2']['amount'] == 300000
+
+
+def test_arrears_report_counts_legacy_payments():
+    db = _legacy_db()
+    start, end = datetime(2025, 1, 1), datetime(2025, 2, 1)
+    months = month_keys(start, end)
+    report = arrears_report(ATHLETES, build_spp_pivot(ATHLETES, load_spp_range(db, start, end), months))
+    assert report.set_index('athlete_id')['months'].to_dict() == {'a1': "Jan 2025", 'a2': "Jan 2025"}
+
+
+def test_payment_invalidates_only_affected_month_and_covering_ranges():
+    db = _legacy_db()
+    cache = query_cache(db)
+    load_spp_for_month(db, 2025, 2)
+    load_spp_for_month(db, 2025, 3)
+    load_spp_range(db, datetime(2025, 1, 1), datetime(2025, 2, 1))
+    load_spp_range(db, datetime(2025, 3, 1), datetime(2025, 4, 1))
+    update_spp_payment(db, 2025, 2, 'a1', {'amount': 250000, 'payment_date': datetime(2025, 2, 3), 'method': "Tunai", 'notes': ""},
+                       {'uid': 'admin', 'displayName': "Admin", 'role': 'admin'}, "Budi")
+    assert {key for collection, key in cache._entries if collection == SPP_COLLECTION} == {'2025-03', '2025-03..2025-04'}
+    assert load_spp_for_month(db, 2025, 2)['a1']['amount'] == 250000
@@ -0,0 +1,26 @@
+import pytest
+from benchmarks.memory_backend import MemoryBackend
+from utils.sqlite_storage import SQLiteBackend
+from utils.storage import DELETE_FIELD
+
+
+@pytest.fixture(params=['sqlite', 'memory'])
+def db(request):
+    return SQLiteBackend(":memory:") if request.param == 'sqlite' else MemoryBackend()
+
+
+def test_merge_set_with_nested_delete_on_missing_map(db):
+    db.set('c', 'doc', {'x': 1})
+    db.set('c', 'doc', {'a': {'b': DELETE_FIELD, 'c': 2}}, merge=True)
+    assert db.get('c', 'doc') == {'x': 1, 'a': {'c': 2}}
+
+
+def test_update_with_nested_delete_in_map_value(db):
+    db.set('c', 'doc', {'m': {'x': 1, 'y': 2}})
+    db.update('c', 'doc', {'m': {'x': DELETE_FIELD, 'z': 3}})
+    assert db.get('c', 'doc') == {'m': {'z': 3}}
+
+
+def test_plain_set_drops_nested_delete(db):
+    db.set('c', 'doc', {'a': {'b': DELETE_FIELD}, 'c': DELETE_FIELD, 'd': 1})
+    assert db.get('c', 'doc') == {'a': {}, 'd': 1}
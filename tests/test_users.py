@@ -0,0 +1,23 @@
+from benchmarks.memory_backend import MemoryBackend
+from utils.database import get_user_options, update_user_profile
+
+
+class CountingBackend(MemoryBackend):
+    def __init__(self):
+        super().__init__()
+        self.queries = 0
+
+    def query(self, collection, *args, **kwargs):
+        self.queries += 1
+        return super().query(collection, *args, **kwargs)
+
+
+def test_user_options_are_cached_until_a_user_changes():
+    db = CountingBackend()
+    db.set('users', 'u1', {'displayName': "Budi", 'role': 'coach', 'email': "budi@example.com"})
+    assert get_user_options(db) == [{'uid': 'u1', 'displayName': "Budi", 'role': 'coach'}]
+    get_user_options(db)
+    assert db.queries == 1
+
+    update_user_profile(db, 'u1', {'displayName': "Budi S."}, {'uid': 'admin', 'displayName': "Admin", 'role': 'admin'})
+    assert get_user_options(db)[0]['displayName'] == "Budi S."
@@ -1,10 +1,12 @@
 import streamlit as st
+from utils.request_cache import request_memoized, request_failed
 
+@request_memoized
 def load_user_profile(_db, uid):
     if not _db or not uid: return {}
     try:
-        user_doc = _db.collection('users').document(uid).get()
-        return user_doc.to_dict() if user_doc.exists else {}
+        return _db.get('users', uid) or {}
     except Exception as e:
         st.warning(f"Gagal memuat profil pengguna: {e}")
+        request_failed()
         return {}
\ No newline at end of file
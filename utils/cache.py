@@ -0,0 +1,189 @@
+import copy
+import threading
+import time
+import weakref
+from utils.storage import DELETE_FIELD, project_fields
+
+
+class QueryCache:
+    """
+    Cache hasil baca per proses dengan invalidasi per koleksi dan per kunci.
+    Entri diberi nama (collection, key) sehingga sebuah penulisan cukup
+    menghapus atau menambal entri yang terdampak, bukan seluruh cache.
+    Nilai selalu dikembalikan sebagai salinan agar pemanggil bebas mengubahnya.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.RLock()
+
+    def get_or_load(self, collection, key, loader, ttl=None):
+        with self._lock:
+            entry = self._entries.get((collection, key))
+            if entry is not None and (entry[1] is None or entry[1] > time.monotonic()):
+                return copy.deepcopy(entry[0])
+        value = loader()
+        with self._lock:
+            expires_at = time.monotonic() + ttl if ttl else None
+            self._entries[(collection, key)] = (value, expires_at)
+        return copy.deepcopy(value)
+
+    def invalidate(self, collection, key=None):
+        """Menghapus satu entri, atau semua entri koleksi jika key None."""
+        with self._lock:
+            if key is not None:
+                self._entries.pop((collection, key), None)
+            else:
+                for entry_key in [k for k in self._entries if k[0] == collection]:
+                    del self._entries[entry_key]
+
+    def invalidate_matching(self, collection, match):
+        """Menghapus entri koleksi yang kuncinya memenuhi match(key)."""
+        with self._lock:
+            for entry_key in [k for k in self._entries if k[0] == collection and match(k[1])]:
+                del self._entries[entry_key]
+
+    def patch(self, collection, key, patch_fn):
+        """Menerapkan patch_fn(value) -> value baru pada entri yang sudah ada (jika ada)."""
+        with self._lock:
+            entry = self._entries.get((collection, key))
+            if entry is not None:
+                self._entries[(collection, key)] = (patch_fn(entry[0]), entry[1])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Batas tunggu snapshot awal listener; setelahnya pembaca memakai QueryCache
+FIRST_SNAPSHOT_TIMEOUT_S = 1.0
+# Jeda sebelum listener yang mati dipasang ulang (detik), bertambah pada setiap kegagalan
+RESUBSCRIBE_BACKOFF_S = (1, 2, 5, 15, 60)
+
+
+class LiveCollection:
+    """
+    Salinan satu koleksi di memori proses yang dijaga terbaru oleh listener watch() backend
+    (on_snapshot di Firestore). Pembacaan tidak menyentuh database sama sekali; hanya dokumen
+    yang berubah yang diterapkan. Jika listener mati (error stream), pembacaan mengembalikan
+    None (pemanggil jatuh ke QueryCache) dan listener dipasang ulang dengan backoff.
+    """
+
+    def __init__(self, _db, collection, order_field=None):
+        self.collection = collection
+        self.order_field = order_field
+        self._db = weakref.ref(_db)
+        self._lock = threading.RLock()
+        self._ready = threading.Event()
+        self._failures = 0
+        self._retry_at = 0
+        self._subscribe()
+
+    def _subscribe(self):
+        with self._lock:
+            self._docs = {}
+            self._sorted = None
+            self._ready.clear()
+            self._watch = self._db().watch(self.collection, self._apply_changes)
+
+    def _healthy(self):
+        """False jika listener berhenti; listener dipasang ulang saat jeda backoff sudah lewat."""
+        if self._watch.is_active:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            if self._watch.is_active or now < self._retry_at or self._db() is None:
+                return self._watch.is_active
+            self._retry_at = now + RESUBSCRIBE_BACKOFF_S[min(self._failures, len(RESUBSCRIBE_BACKOFF_S) - 1)]
+            self._failures += 1
+            print(f"Error listener {self.collection}: terputus, memasang ulang (percobaan {self._failures})")
+            try:
+                self._subscribe()
+            except Exception as e:
+                print(f"Error listener {self.collection}: {e}")
+        return False
+
+    def _apply_changes(self, changes):
+        with self._lock:
+            for change in changes:
+                if change.type == 'REMOVED':
+                    self._docs.pop(change.document.id, None)
+                else:
+                    self._docs[change.document.id] = change.document.data
+            self._sorted = None
+            self._failures = 0
+        self._ready.set()
+
+    def apply_local(self, doc_id, changes=None):
+        """Menerapkan penulisan proses ini langsung, sebelum event listener tiba; changes=None berarti dihapus."""
+        with self._lock:
+            if changes is None:
+                self._docs.pop(doc_id, None)
+            else:
+                updated = dict(self._docs.get(doc_id, {}))
+                for field, value in changes.items():
+                    if value is DELETE_FIELD:
+                        updated.pop(field, None)
+                    else:
+                        updated[field] = value
+                self._docs[doc_id] = updated
+            self._sorted = None
+
+    def get_many(self, doc_ids):
+        """Dokumen {id: data} dari cache, atau None jika cache belum hangat (tanpa menunggu)."""
+        if not self._healthy() or not self._ready.is_set():
+            return None
+        with self._lock:
+            return {doc_id: copy.deepcopy(self._docs[doc_id]) for doc_id in doc_ids if doc_id in self._docs}
+
+    def snapshot(self, timeout=FIRST_SNAPSHOT_TIMEOUT_S, fields=None):
+        """
+        List dokumen {'id': ..., **data} terurut, atau None jika snapshot awal belum tersedia
+        atau listener sedang terputus. fields membatasi field yang disalin (selain 'id').
+        """
+        if not self._healthy() or not self._ready.wait(timeout):
+            return None
+        with self._lock:
+            if self._sorted is None:
+                docs = [{'id': doc_id, **data} for doc_id, data in self._docs.items()]
+                if self.order_field:
+                    # Sama seperti order_by Firestore: dokumen tanpa field pengurut tidak ikut
+                    docs = sorted((d for d in docs if self.order_field in d), key=lambda d: d[self.order_field])
+                self._sorted = docs
+            if fields is not None:
+                return [{'id': doc['id'], **copy.deepcopy(project_fields(doc, fields))} for doc in self._sorted]
+            return copy.deepcopy(self._sorted)
+
+    def close(self):
+        self._watch.unsubscribe()
+
+
+_caches = weakref.WeakKeyDictionary()
+_caches_lock = threading.Lock()
+_live_collections = weakref.WeakKeyDictionary()
+
+
+def query_cache(_db):
+    """Mengembalikan QueryCache milik sebuah backend penyimpanan (satu per proses)."""
+    with _caches_lock:
+        if _db not in _caches:
+            _caches[_db] = QueryCache()
+        return _caches[_db]
+
+
+def live_collection(_db, collection, order_field=None, create=True):
+    """
+    Mengembalikan LiveCollection milik backend untuk koleksi ini (dibuat sekali per proses).
+    Dengan create=False hanya mengembalikan yang sudah ada (atau None). Backend tanpa listener
+    server (live_updates False) tidak mendapat LiveCollection: polling seluruh koleksi setiap
+    detik lebih mahal daripada cache TTL, jadi None dikembalikan dan pemanggil memakai QueryCache.
+    """
+    if not _db.live_updates:
+        return None
+    with _caches_lock:
+        collections = _live_collections.setdefault(_db, {})
+        if collection not in collections:
+            if not create:
+                return None
+            collections[collection] = LiveCollection(_db, collection, order_field)
+        return collections[collection]
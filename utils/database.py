@@ -1,52 +1,172 @@
 import streamlit as st
 from datetime import datetime, time
-from google.cloud.firestore_v1.base_query import FieldFilter
-from google.cloud.firestore_v1 import DELETE_FIELD
 from firebase_admin import auth as admin_auth
+from utils.storage import DELETE_FIELD, ASCENDING, DESCENDING, DOCUMENT_ID, MAX_BATCH_SIZE, project_fields
+from utils.cache import query_cache, live_collection
+from utils.log_writer import get_log_writer, log_shard, LOG_SHARDS, LOG_SHARD_VALUES
+from utils.log_retention import run_log_retention, RETENTION_DAYS, ARCHIVE_DIR, SUMMARY_COLLECTION
+from utils.performance_snapshot import get_performance_snapshot, TOMBSTONE_COLLECTION
+from utils.request_cache import request_memoized, clears_request_cache, request_failed
+from utils.monitoring import instrument_module
 
 # --- FUNGSI BARU ---
+@request_memoized
 def check_email_exists(_db, email):
     """Mengecek apakah email sudah terdaftar di koleksi users."""
     try:
         # Mencari dokumen di koleksi 'users' yang field 'email'-nya cocok
-        users_ref = _db.collection('users').where(filter=FieldFilter('email', '==', email)).limit(1).stream()
+        users = _db.query('users', filters=[('email', '==', email)], limit=1)
         # Jika ada dokumen yang ditemukan, return True
-        return len(list(users_ref)) > 0
+        return len(users) > 0
     except Exception as e:
         st.error(f"Terjadi kesalahan saat validasi email: {e}")
+        request_failed()
         return False
 
 # --- FUNGSI LOG AKTIVITAS ---
 def log_activity(_db, user_profile, action):
+    """Mencatat aktivitas lewat penulis log di background (tidak menunggu Firestore)."""
     try:
         log_entry = {
             "timestamp": datetime.now(),
             "user_id": user_profile.get('uid', 'N/A'),
             "user_name": user_profile.get('displayName', 'N/A'),
             "user_role": user_profile.get('role', 'N/A'),
-            "action": action
+            "action": action,
+            "shard": log_shard()
         }
-        _db.collection('activity_logs').add(log_entry)
+        get_log_writer(_db).submit(log_entry)
     except Exception as e:
         print(f"Error logging activity: {e}")
 
-def get_logs(_db, limit=100):
+@request_memoized
+def get_logs(_db, limit=100, fields=None, user_id=None, user_role=None, start_date=None, end_date=None, start_after=None):
+    """
+    Mengambil log aktivitas terbaru dengan filter dijalankan di sisi server (composite
+    index user_id/user_role + shard + timestamp). Semua shard dibaca dengan satu query 'in'
+    dan server menggabungkannya sesuai urutan timestamp; log lama tanpa shard baru tampil
+    setelah migrate_log_shards dijalankan. start_date dan end_date bersifat inklusif;
+    hasil diurutkan menurun berdasarkan (timestamp, id) dan start_after adalah cursor
+    (timestamp, id) dari baris terakhir halaman sebelumnya.
+    fields: list field yang diambil (projection di server); 'id' selalu ada.
+    """
     try:
-        logs_ref = _db.collection('activity_logs').order_by("timestamp", direction="DESCENDING").limit(limit).stream()
-        return [doc.to_dict() for doc in logs_ref]
+        filters = [('shard', 'in', LOG_SHARD_VALUES)]
+        if user_id:
+            filters.append(('user_id', '==', user_id))
+        if user_role:
+            filters.append(('user_role', '==', user_role))
+        if start_date:
+            filters.append(('timestamp', '>=', datetime.combine(start_date, time.min)))
+        if end_date:
+            filters.append(('timestamp', '<=', datetime.combine(end_date, time.max)))
+        cursor = None
+        if start_after:
+            cursor = {'timestamp': start_after[0], DOCUMENT_ID: start_after[1]}
+        logs = _db.query('activity_logs', filters=filters, order_by=[("timestamp", DESCENDING), (DOCUMENT_ID, DESCENDING)],
+                         limit=limit, start_after=cursor, select=fields)
+        return [{'id': doc.id, **doc.data} for doc in logs]
     except Exception as e:
         st.error(f"Gagal memuat log aktivitas: {e}")
+        request_failed()
         return []
 
+@request_memoized
+def get_log_summaries(_db, start_date=None, end_date=None, limit=31):
+    """Ringkasan harian log yang sudah diarsip (terbaru lebih dulu); start_date dan end_date inklusif."""
+    try:
+        filters = []
+        if start_date:
+            filters.append(('date', '>=', datetime.combine(start_date, time.min)))
+        if end_date:
+            filters.append(('date', '<=', datetime.combine(end_date, time.min)))
+        docs = _db.query(SUMMARY_COLLECTION, filters=filters, order_by=[('date', DESCENDING)], limit=limit)
+        return [{'id': doc.id, **doc.data} for doc in docs]
+    except Exception as e:
+        st.error(f"Gagal memuat ringkasan log: {e}")
+        request_failed()
+        return []
+
+@clears_request_cache
+def archive_old_logs(_db, actor_profile, retention_days=RETENTION_DAYS, archive_format="ndjson", archive_dir=ARCHIVE_DIR):
+    """Menjalankan retensi log (lihat utils/log_retention.py). Mengembalikan hasilnya atau None jika gagal."""
+    try:
+        result = run_log_retention(_db, retention_days=retention_days, archive_dir=archive_dir, archive_format=archive_format)
+        if result['archived']:
+            log_activity(_db, actor_profile, f"Mengarsip {result['archived']} log aktivitas sebelum {result['cutoff']:%d-%m-%Y}")
+        return result
+    except Exception as e:
+        st.error(f"Gagal mengarsip log aktivitas: {e}")
+        return None
+
+# Dokumen penanda yang ditulis setelah semua log lama (sebelum sharding) diberi shard
+LOG_SHARD_MARKER = ('app_meta', 'activity_log_shards')
+
+def log_shard_migration_pending(_db):
+    """True jika migrate_log_shards belum pernah selesai (penanda belum ada)."""
+    try:
+        marker = query_cache(_db).get_or_load(*LOG_SHARD_MARKER, lambda: _db.get(*LOG_SHARD_MARKER), ttl=300)
+        return marker is None
+    except Exception as e:
+        print(f"Error checking log shard migration: {e}")
+        return False
+
+@clears_request_cache
+def migrate_log_shards(_db, actor_profile):
+    """
+    Migrasi sekali jalan: log yang ditulis sebelum sharding belum punya field shard sehingga
+    tidak terbaca get_logs dan retensi. Aman dijalankan berulang; setelah selesai penanda
+    LOG_SHARD_MARKER ditulis. Mengembalikan jumlah log yang diberi shard, atau None jika gagal.
+    """
+    try:
+        migrated, cursor = 0, None
+        while True:
+            docs = _db.query('activity_logs', order_by=[(DOCUMENT_ID, ASCENDING)], limit=MAX_BATCH_SIZE,
+                             start_after=cursor, select=['shard'])
+            if not docs:
+                break
+            updates = [('update', 'activity_logs', doc.id, {'shard': log_shard()}) for doc in docs if 'shard' not in doc.data]
+            if updates:
+                _db.batch_write(updates)
+            migrated += len(updates)
+            cursor = {DOCUMENT_ID: docs[-1].id}
+        _db.set(*LOG_SHARD_MARKER, {'shards': LOG_SHARDS, 'migrated': migrated, 'completed_at': datetime.now()})
+        query_cache(_db).invalidate(*LOG_SHARD_MARKER)
+        if migrated:
+            log_activity(_db, actor_profile, f"Migrasi shard untuk {migrated} log aktivitas lama")
+        return migrated
+    except Exception as e:
+        st.error(f"Gagal memigrasi shard log: {e}")
+        return None
+
 # --- FUNGSI PENGGUNA (USERS) ---
-def get_all_users(_db):
+@request_memoized
+def get_all_users(_db, fields=None):
+    """fields: list field yang diambil (projection di server); 'uid' selalu ada."""
+    try:
+        users = _db.query('users', select=fields)
+        return [{'uid': doc.id, **doc.data} for doc in users]
+    except Exception as e:
+        st.error(f"Gagal memuat data pengguna: {e}")
+        request_failed()
+        return []
+
+@request_memoized
+def get_user_options(_db):
+    """
+    Daftar ringkas pengguna (uid, displayName, role) untuk pilihan filter, dibagi semua sesi
+    lewat cache proses; dibuang setiap kali pengguna dibuat, diubah, atau dihapus.
+    """
     try:
-        users_ref = _db.collection('users').stream()
-        return [{'uid': doc.id, **doc.to_dict()} for doc in users_ref]
+        def _load():
+            return [{'uid': doc.id, **doc.data} for doc in _db.query('users', select=['displayName', 'role'])]
+        return query_cache(_db).get_or_load('users', 'options', _load, ttl=300)
     except Exception as e:
         st.error(f"Gagal memuat data pengguna: {e}")
+        request_failed()
         return []
 
+@clears_request_cache
 def create_user_account(pyrebase_auth, _db, email, password, display_name, role, actor_profile, child_athlete_ids=None, linked_athlete_id=None):
     try:
         user = pyrebase_auth.auth().create_user_with_email_and_password(email, password)
@@ -60,11 +180,13 @@ def create_user_account(pyrebase_auth, _db, email, password, display_name, role,
         if role == 'parent' and child_athlete_ids:
             user_profile['child_athlete_ids'] = child_athlete_ids
         
-        _db.collection('users').document(uid).set(user_profile)
+        _db.set('users', uid, user_profile)
+        query_cache(_db).invalidate('users')
         admin_auth.set_custom_user_claims(uid, {'role': role})
         
         if role == 'athlete' and linked_athlete_id:
-            _db.collection('athletes').document(linked_athlete_id).update({'uid': uid})
+            _db.update('athletes', linked_athlete_id, {'uid': uid})
+            _patch_cached_athlete(_db, linked_athlete_id, {'uid': uid})
         
         log_activity(_db, actor_profile, f"Membuat pengguna baru: {display_name} ({role})")
         return True, "Sukses"
@@ -74,30 +196,35 @@ def create_user_account(pyrebase_auth, _db, email, password, display_name, role,
         if "WEAK_PASSWORD" in error_message: return False, "Password terlalu lemah."
         return False, error_message
 
+@clears_request_cache
 def update_user_profile(_db, uid, new_data, actor_profile):
     try:
-        user_doc = _db.collection('users').document(uid).get()
-        original_role = user_doc.to_dict().get('role') if user_doc.exists else None
+        user_doc = _db.get('users', uid)
+        original_role = user_doc.get('role') if user_doc else None
         
         new_role = new_data.get('role')
         new_linked_athlete_id = new_data.pop('linked_athlete_id', None)
 
         if original_role == 'athlete' and new_role != 'athlete':
-            old_link_query = _db.collection('athletes').where(filter=FieldFilter('uid', '==', uid)).limit(1).stream()
+            old_link_query = _db.query('athletes', filters=[('uid', '==', uid)], limit=1)
             for doc in old_link_query:
-                doc.reference.update({'uid': DELETE_FIELD})
+                _db.update('athletes', doc.id, {'uid': DELETE_FIELD})
+                _patch_cached_athlete(_db, doc.id, {'uid': DELETE_FIELD})
 
         if new_role == 'athlete' and new_linked_athlete_id:
-            old_link_query = _db.collection('athletes').where(filter=FieldFilter('uid', '==', uid)).limit(1).stream()
+            old_link_query = _db.query('athletes', filters=[('uid', '==', uid)], limit=1)
             for doc in old_link_query:
                 if doc.id != new_linked_athlete_id:
-                    doc.reference.update({'uid': DELETE_FIELD})
-            _db.collection('athletes').document(new_linked_athlete_id).update({'uid': uid})
+                    _db.update('athletes', doc.id, {'uid': DELETE_FIELD})
+                    _patch_cached_athlete(_db, doc.id, {'uid': DELETE_FIELD})
+            _db.update('athletes', new_linked_athlete_id, {'uid': uid})
+            _patch_cached_athlete(_db, new_linked_athlete_id, {'uid': uid})
 
         if new_data.get('child_athlete_ids') is None:
             new_data['child_athlete_ids'] = DELETE_FIELD
 
-        _db.collection('users').document(uid).update(new_data)
+        _db.update('users', uid, new_data)
+        query_cache(_db).invalidate('users')
         if 'role' in new_data:
             admin_auth.set_custom_user_claims(uid, {'role': new_data['role']})
         
@@ -107,10 +234,12 @@ def update_user_profile(_db, uid, new_data, actor_profile):
         st.error(f"Gagal mengupdate profil: {e}")
         return False
 
+@clears_request_cache
 def delete_user_account(_db, uid, actor_profile):
     try:
         admin_auth.delete_user(uid)
-        _db.collection('users').document(uid).delete()
+        _db.delete('users', uid)
+        query_cache(_db).invalidate('users')
         log_activity(_db, actor_profile, f"Menghapus pengguna (UID: {uid})")
         return True, "Sukses"
     except Exception as e:
@@ -118,57 +247,109 @@ def delete_user_account(_db, uid, actor_profile):
 
 
 # --- FUNGSI ATLET ---
-@st.cache_data(ttl=30)
-def load_athletes(_db):
+@request_memoized
+def load_athletes(_db, fields=None):
+    """
+    Daftar atlet terurut nama dari cache hidup (listener) milik proses. Jika backend tidak
+    punya listener, snapshot awal belum siap, atau listener terputus, jatuh ke query biasa
+    dengan cache TTL.
+    fields membatasi field yang dikembalikan (selain 'id') agar salinan per rerun lebih kecil.
+    """
     if not _db: return []
     try:
-        athletes_ref = _db.collection('athletes').order_by("name").stream()
-        return [{'id': doc.id, **doc.to_dict()} for doc in athletes_ref]
+        live_athletes = live_collection(_db, 'athletes', order_field='name')
+        athletes = live_athletes.snapshot(fields=fields) if live_athletes else None
+        if athletes is not None:
+            return athletes
+        def _load():
+            athletes = _db.query('athletes', order_by=[("name", ASCENDING)])
+            return [{'id': doc.id, **doc.data} for doc in athletes]
+        # Cache TTL tetap menyimpan dokumen penuh (dipakai bersama dan ditambal _patch_cached_athlete)
+        athletes = query_cache(_db).get_or_load('athletes', 'all', _load, ttl=30)
+        if fields is not None:
+            return [{'id': athlete['id'], **project_fields(athlete, fields)} for athlete in athletes]
+        return athletes
     except Exception as e:
         st.error(f"Gagal memuat data atlet: {e}")
+        request_failed()
         return []
 
+def _patch_cached_athlete(_db, athlete_id, changes=None):
+    """Menambal daftar atlet di cache secara langsung; changes=None berarti atlet dihapus."""
+    live_athletes = live_collection(_db, 'athletes', create=False)
+    if live_athletes:
+        live_athletes.apply_local(athlete_id, changes)
+    def _apply(athletes):
+        others = [a for a in athletes if a['id'] != athlete_id]
+        if changes is None:
+            return others
+        updated = dict(next((a for a in athletes if a['id'] == athlete_id), {'id': athlete_id}))
+        for field, value in changes.items():
+            if value is DELETE_FIELD:
+                updated.pop(field, None)
+            else:
+                updated[field] = value
+        return sorted(others + [updated], key=lambda a: a.get('name', ''))
+    query_cache(_db).patch('athletes', 'all', _apply)
+
+@request_memoized
 def get_unlinked_athletes(_db):
     """Mengambil daftar atlet yang belum memiliki akun pengguna (uid)."""
     all_athletes = load_athletes(_db)
     return [athlete for athlete in all_athletes if 'uid' not in athlete]
 
+@request_memoized
 def get_athlete_by_id(_db, athlete_id):
     if not _db or not athlete_id: return None
+    athletes = get_athletes_by_ids(_db, [athlete_id])
+    return athletes[0] if athletes else None
+
+@request_memoized
+def get_athletes_by_ids(_db, athlete_ids):
+    """
+    Mengambil beberapa atlet sekaligus (urutan mengikuti athlete_ids, id yang tidak ada dilewati).
+    Dilayani dari cache atlet bersama jika sudah hangat, selain itu satu panggilan get_all.
+    """
+    if not _db or not athlete_ids: return []
     try:
-        doc_ref = _db.collection('athletes').document(athlete_id)
-        doc = doc_ref.get()
-        if doc.exists:
-            return {'id': doc.id, **doc.to_dict()}
-        return None
+        live_athletes = live_collection(_db, 'athletes', create=False)
+        docs = live_athletes.get_many(athlete_ids) if live_athletes else None
+        if docs is None:
+            docs = _db.get_many('athletes', list(dict.fromkeys(athlete_ids)))
+        return [{'id': athlete_id, **docs[athlete_id]} for athlete_id in athlete_ids if athlete_id in docs]
     except Exception as e:
         st.error(f"Gagal mengambil data atlet: {e}")
-        return None
+        request_failed()
+        return []
 
+@clears_request_cache
 def add_athlete(_db, name, dob, level, gender, actor_profile):
     try:
-        _db.collection('athletes').add({'name': name, 'date_of_birth': dob.strftime('%Y-%m-%d'), 'level': level, 'gender': gender, 'created_at': datetime.now()})
-        st.cache_data.clear()
+        athlete_data = {'name': name, 'date_of_birth': dob.strftime('%Y-%m-%d'), 'level': level, 'gender': gender, 'created_at': datetime.now()}
+        athlete_id = _db.add('athletes', athlete_data)
+        _patch_cached_athlete(_db, athlete_id, athlete_data)
         log_activity(_db, actor_profile, f"Menambahkan atlet baru: {name}")
         return True
     except Exception as e:
         st.error(f"Gagal menambahkan atlet: {e}")
         return False
 
+@clears_request_cache
 def update_athlete(_db, athlete_id, new_data, actor_profile):
     try:
-        _db.collection('athletes').document(athlete_id).update(new_data)
-        st.cache_data.clear()
+        _db.update('athletes', athlete_id, new_data)
+        _patch_cached_athlete(_db, athlete_id, new_data)
         log_activity(_db, actor_profile, f"Mengupdate data atlet: {new_data.get('name')}")
         return True
     except Exception as e:
         st.error(f"Gagal mengupdate atlet: {e}")
         return False
 
+@clears_request_cache
 def delete_athlete(_db, athlete_id, actor_profile, athlete_name):
     try:
-        _db.collection('athletes').document(athlete_id).delete()
-        st.cache_data.clear()
+        _db.delete('athletes', athlete_id)
+        _patch_cached_athlete(_db, athlete_id)
         log_activity(_db, actor_profile, f"Menghapus atlet: {athlete_name}")
         return True
     except Exception as e:
@@ -176,37 +357,137 @@ def delete_athlete(_db, athlete_id, actor_profile, athlete_name):
         return False
 
 # --- FUNGSI SPP ---
+# Satu dokumen per atlet per bulan (id 'YYYY-MM_<athlete_id>', field month 'YYYY-MM') agar
+# pembayaran yang dicatat bersamaan tidak berebut satu dokumen bulanan.
+SPP_COLLECTION = 'spp_records'
+# Format lama: satu dokumen per bulan dengan map payments {athlete_id: detail}
+LEGACY_SPP_COLLECTION = 'spp_payments'
+
+def _spp_doc_id(month_key, athlete_id):
+    return f"{month_key}_{athlete_id}"
+
+def _spp_range_key(start_key, end_key):
+    return f"{start_key}..{end_key}"
+
+def _spp_range_covers(cache_key, month_key):
+    """True jika cache_key adalah entri rentang load_spp_range yang memuat month_key."""
+    start_key, separator, end_key = cache_key.partition('..')
+    return bool(separator) and start_key <= month_key <= end_key
+
+def _legacy_spp_payments(_db, month_keys):
+    """{month_key: {athlete_id: detail}} dari dokumen bulanan lama yang belum dimigrasi."""
+    legacy = _db.get_many(LEGACY_SPP_COLLECTION, month_keys)
+    return {month_key: {athlete_id: {**detail, 'month': month_key, 'athlete_id': athlete_id}
+                        for athlete_id, detail in data.get('payments', {}).items()}
+            for month_key, data in legacy.items()}
+
+@request_memoized
 def load_spp_for_month(_db, year, month):
+    """
+    Pembayaran SPP satu bulan {athlete_id: detail}, dirakit dari satu query pada field month
+    dan ditumpuk di atas dokumen bulanan lama (jika belum dimigrasi).
+    """
     if not all([_db, year, month]): return {}
     try:
-        doc_id = f"{year}-{month:02d}"
-        doc_ref = _db.collection('spp_payments').document(doc_id)
-        doc = doc_ref.get()
-        if doc.exists:
-            return doc.to_dict().get('payments', {})
-        return {}
+        month_key = f"{year}-{month:02d}"
+        def _load():
+            docs = _db.query(SPP_COLLECTION, filters=[('month', '==', month_key)])
+            payments = _legacy_spp_payments(_db, [month_key]).get(month_key, {})
+            payments.update({doc.data['athlete_id']: doc.data for doc in docs})
+            return payments
+        return query_cache(_db).get_or_load(SPP_COLLECTION, month_key, _load, ttl=30)
     except Exception as e:
         st.error(f"Gagal memuat data SPP: {e}")
+        request_failed()
         return {}
 
+@request_memoized
+def load_spp_range(_db, start, end):
+    """
+    Semua pembayaran SPP dari bulan start sampai bulan end (date/datetime, inklusif) sebagai
+    list detail ber-field month dan athlete_id, diambil dengan satu query rentang pada month
+    ditambah satu get_many dokumen bulanan lama (dokumen per atlet didahulukan).
+    """
+    if not all([_db, start, end]): return []
+    try:
+        start_key, end_key = f"{start.year}-{start.month:02d}", f"{end.year}-{end.month:02d}"
+        months = [f"{index // 12}-{index % 12 + 1:02d}" for index in range(start.year * 12 + start.month - 1, end.year * 12 + end.month)]
+        def _load():
+            docs = _db.query(SPP_COLLECTION, filters=[('month', '>=', start_key), ('month', '<=', end_key)])
+            payments = {(month_key, athlete_id): detail for month_key, month_payments in _legacy_spp_payments(_db, months).items()
+                        for athlete_id, detail in month_payments.items()}
+            payments.update({(doc.data['month'], doc.data['athlete_id']): doc.data for doc in docs})
+            return list(payments.values())
+        return query_cache(_db).get_or_load(SPP_COLLECTION, _spp_range_key(start_key, end_key), _load, ttl=30)
+    except Exception as e:
+        st.error(f"Gagal memuat data SPP: {e}")
+        request_failed()
+        return []
+
+@clears_request_cache
 def update_spp_payment(_db, year, month, athlete_id, payment_details, actor_profile, athlete_name):
     try:
-        doc_id = f"{year}-{month:02d}"
-        doc_ref = _db.collection('spp_payments').document(doc_id)
-        update_data = {'status': 'Lunas', 'amount': payment_details['amount'], 'payment_date': payment_details['payment_date'].strftime('%Y-%m-%d'), 'method': payment_details['method'], 'notes': payment_details['notes'], 'updated_by': actor_profile['displayName'], 'updated_at': datetime.now()}
-        doc_ref.set({'month_year': f"{month:02d}-{year}", 'payments': { athlete_id: update_data }}, merge=True)
-        st.cache_data.clear()
+        month_key = f"{year}-{month:02d}"
+        update_data = {'month': month_key, 'athlete_id': athlete_id, 'status': 'Lunas', 'amount': payment_details['amount'], 'payment_date': payment_details['payment_date'].strftime('%Y-%m-%d'), 'method': payment_details['method'], 'notes': payment_details['notes'], 'updated_by': actor_profile['displayName'], 'updated_at': datetime.now()}
+        _db.set(SPP_COLLECTION, _spp_doc_id(month_key, athlete_id), update_data, merge=True)
+        # Hanya entri bulan ini dan rentang (rekap) yang memuat bulan ini yang usang
+        query_cache(_db).invalidate(SPP_COLLECTION, month_key)
+        query_cache(_db).invalidate_matching(SPP_COLLECTION, lambda key: _spp_range_covers(key, month_key))
         log_activity(_db, actor_profile, f"Mencatat pembayaran SPP untuk {athlete_name} (Bulan: {month}-{year})")
         return True
     except Exception as e:
         st.error(f"Gagal memperbarui status SPP: {e}")
         return False
 
+@clears_request_cache
+def migrate_spp_payments(_db, actor_profile):
+    """
+    Migrasi sekali jalan dari dokumen SPP bulanan lama ke dokumen per atlet. Pembayaran yang
+    sudah ada di format baru tidak ditimpa; dokumen bulanan dihapus setelah dipindahkan.
+    Mengembalikan jumlah pembayaran yang dipindahkan, atau None jika gagal.
+    """
+    try:
+        migrated = 0
+        for month_doc in _db.query(LEGACY_SPP_COLLECTION):
+            month_key = month_doc.id
+            existing = {doc.data.get('athlete_id') for doc in _db.query(SPP_COLLECTION, filters=[('month', '==', month_key)], select=['athlete_id'])}
+            operations = [('set', SPP_COLLECTION, _spp_doc_id(month_key, athlete_id), {**detail, 'month': month_key, 'athlete_id': athlete_id})
+                          for athlete_id, detail in month_doc.data.get('payments', {}).items() if athlete_id not in existing]
+            # Dokumen bulanan dihapus pada batch terakhir, setelah semua pembayarannya tersalin
+            operations.append(('delete', LEGACY_SPP_COLLECTION, month_key, None))
+            for start in range(0, len(operations), MAX_BATCH_SIZE):
+                _db.batch_write(operations[start:start + MAX_BATCH_SIZE])
+            migrated += len(operations) - 1
+        query_cache(_db).invalidate(SPP_COLLECTION)
+        if migrated:
+            log_activity(_db, actor_profile, f"Migrasi {migrated} pembayaran SPP ke dokumen per atlet")
+        return migrated
+    except Exception as e:
+        st.error(f"Gagal memigrasi data SPP: {e}")
+        return None
+
 # --- FUNGSI PERFORMA ATLET ---
+def _mark_performance_snapshot_stale(db):
+    # Snapshot Arrow di proses ini langsung delta sync pada pembacaan berikutnya
+    snapshot = get_performance_snapshot(db, create=False)
+    if snapshot:
+        snapshot.mark_stale()
+
+def load_performance_table(db):
+    """Snapshot Arrow performance_records yang dibagi semua sesi (lihat utils/performance_snapshot.py)."""
+    try:
+        return get_performance_snapshot(db).table()
+    except Exception as e:
+        st.error(f"Gagal memuat catatan waktu: {e}")
+        return None
+
+@clears_request_cache
 def add_performance_record(db, record_data, actor_profile):
     try:
         record_data['created_at'] = datetime.now()
-        db.collection('performance_records').add(record_data)
+        record_id = db.add('performance_records', record_data)
+        _sync_personal_best_on_add(db, record_id, record_data)
+        _mark_performance_snapshot_stale(db)
         # --- PERBAIKAN DI SINI: Menggunakan 'db' bukan '_db' ---
         log_activity(db, actor_profile, f"Menambahkan catatan waktu untuk {record_data['athlete_name']}")
         return True
@@ -214,39 +495,219 @@ def add_performance_record(db, record_data, actor_profile):
         st.error(f"Gagal menyimpan catatan waktu: {e}")
         return False
 
-def get_performance_records(db, athlete_id=None):
+@clears_request_cache
+def add_performance_records_bulk(db, records, actor_profile, summary):
+    """
+    Menyimpan banyak catatan waktu sekaligus (import hasil event) dengan batch write
+    (maksimal 500 dokumen per WriteBatch) dan satu entri log ringkasan.
+    Setiap batch atomik, tetapi import yang lebih besar tidak: jika satu batch gagal, batch
+    sebelumnya tetap tersimpan. Mengembalikan jumlah catatan yang benar-benar tersimpan
+    (catatan pertama sesuai urutan records); personal best disinkronkan untuk catatan itu.
+    """
+    created_at = datetime.now()
+    records = [{**record, 'created_at': created_at} for record in records]
+    committed = []
+    try:
+        for start in range(0, len(records), MAX_BATCH_SIZE):
+            chunk = records[start:start + MAX_BATCH_SIZE]
+            record_ids = db.batch_write([('add', 'performance_records', None, record) for record in chunk])
+            committed.extend(zip(record_ids, chunk))
+    except Exception as e:
+        st.error(f"Gagal menyimpan catatan waktu: {e} ({len(committed)} dari {len(records)} catatan sudah tersimpan)")
+    if committed:
+        _sync_personal_bests_bulk(db, committed)
+        _mark_performance_snapshot_stale(db)
+        log_activity(db, actor_profile, f"Import massal {len(committed)} catatan waktu ({summary})")
+    return len(committed)
+
+@request_memoized
+def get_performance_records(db, athlete_id=None, stroke=None, distance=None, start_date=None, end_date=None, limit=None, start_after=None, fields=None):
+    """
+    Mengambil catatan waktu dengan filter, urutan, dan limit dijalankan di sisi server
+    (memakai composite index athlete_id/stroke/distance + event_date menurun).
+    start_date dan end_date bersifat inklusif; hasil diurutkan menurun berdasarkan (event_date, id).
+    start_after adalah cursor (event_date, id) dari baris terakhir halaman sebelumnya.
+    fields: list field yang diambil (projection di server); 'id' selalu ada.
+    Seperti order_by Firestore, catatan tanpa event_date tidak ikut. Halaman aplikasi memakai
+    snapshot Arrow (load_performance_table); fungsi ini untuk skrip dan benchmark.
+    """
     if not db:
         return []
     try:
-        query = db.collection('performance_records')
+        filters = []
         if athlete_id:
-            query = query.where(filter=FieldFilter('athlete_id', '==', athlete_id))
-        
-        docs = query.stream()
-        records = [{'id': doc.id, **doc.to_dict()} for doc in docs]
-        
-        sorted_records = sorted(records, key=lambda x: x.get('event_date', datetime.min), reverse=True)
-        
-        return sorted_records
+            filters.append(('athlete_id', '==', athlete_id))
+        if stroke:
+            filters.append(('stroke', '==', stroke))
+        if distance:
+            filters.append(('distance', '==', distance))
+        if start_date:
+            filters.append(('event_date', '>=', datetime.combine(start_date, time.min)))
+        if end_date:
+            filters.append(('event_date', '<=', datetime.combine(end_date, time.max)))
+
+        order_by = [('event_date', DESCENDING), (DOCUMENT_ID, DESCENDING)]
+        cursor = None
+        if start_after:
+            cursor = {'event_date': start_after[0], DOCUMENT_ID: start_after[1]}
+        docs = db.query('performance_records', filters=filters, order_by=order_by, limit=limit, start_after=cursor, select=fields)
+        return [{'id': doc.id, **doc.data} for doc in docs]
     except Exception as e:
         st.error(f"Gagal memuat catatan waktu: {e}")
+        request_failed()
         return []
 
+@clears_request_cache
 def update_performance_record(db, record_id, new_data, actor_profile, athlete_name):
     try:
         new_data['updated_at'] = datetime.now()
-        db.collection('performance_records').document(record_id).update(new_data)
+        old_record = db.get('performance_records', record_id)
+        db.update('performance_records', record_id, new_data)
+        if old_record:
+            _sync_personal_best_on_update(db, record_id, old_record, {**old_record, **new_data})
+        _mark_performance_snapshot_stale(db)
         log_activity(db, actor_profile, f"Mengupdate catatan waktu untuk {athlete_name}")
         return True
     except Exception as e:
         st.error(f"Gagal memperbarui catatan waktu: {e}")
         return False
 
+@clears_request_cache
 def delete_performance_record(db, record_id, actor_profile, athlete_name, time_formatted):
     try:
-        db.collection('performance_records').document(record_id).delete()
+        old_record = db.get('performance_records', record_id)
+        db.delete('performance_records', record_id)
+        # Tombstone agar snapshot di proses lain ikut menghapus baris ini saat delta sync
+        db.set(TOMBSTONE_COLLECTION, record_id, {'record_id': record_id, 'deleted_at': datetime.now()})
+        if old_record:
+            _sync_personal_best_on_delete(db, record_id, old_record)
+        _mark_performance_snapshot_stale(db)
         log_activity(db, actor_profile, f"Menghapus catatan waktu {time_formatted} untuk {athlete_name}")
         return True
     except Exception as e:
         st.error(f"Gagal menghapus catatan waktu: {e}")
         return False
+
+# --- FUNGSI PERSONAL BEST (materialisasi) ---
+# Satu dokumen personal_bests/{athlete_id} menyimpan map 'bests' dengan kunci
+# "{distance}_{stroke}", dijaga tetap terbaru oleh fungsi tambah/ubah/hapus catatan waktu.
+PB_FIELDS = ['athlete_id', 'athlete_name', 'competition_name', 'event_date', 'stroke', 'distance', 'time_ms', 'time_formatted', 'age_at_event', 'ku_at_event']
+
+def _pb_key(distance, stroke):
+    return f"{distance}_{stroke}"
+
+def _pb_entry(record_id, record):
+    return {'record_id': record_id, **{field: record.get(field) for field in PB_FIELDS}}
+
+def rebuild_personal_bests(db, athlete_id):
+    """Menghitung ulang semua personal best satu atlet dari seluruh catatan waktunya."""
+    bests = {}
+    for doc in db.query('performance_records', filters=[('athlete_id', '==', athlete_id)]):
+        key = _pb_key(doc.data.get('distance'), doc.data.get('stroke'))
+        if key not in bests or doc.data.get('time_ms', float('inf')) < bests[key]['time_ms']:
+            bests[key] = _pb_entry(doc.id, doc.data)
+    db.set('personal_bests', athlete_id, {'athlete_id': athlete_id, 'bests': bests, 'updated_at': datetime.now()})
+    return bests
+
+def _recompute_personal_best(db, athlete_id, distance, stroke):
+    """Fallback saat PB saat ini dihapus/memburuk: ambil waktu tercepat yang tersisa."""
+    docs = db.query(
+        'performance_records',
+        filters=[('athlete_id', '==', athlete_id), ('stroke', '==', stroke), ('distance', '==', distance)],
+        order_by=[('time_ms', ASCENDING)], limit=1
+    )
+    entry = _pb_entry(docs[0].id, docs[0].data) if docs else DELETE_FIELD
+    db.set('personal_bests', athlete_id, {'bests': {_pb_key(distance, stroke): entry}, 'updated_at': datetime.now()}, merge=True)
+
+def _sync_personal_best_on_add(db, record_id, record):
+    try:
+        athlete_id = record['athlete_id']
+        pb_doc = db.get('personal_bests', athlete_id)
+        if pb_doc is None:
+            rebuild_personal_bests(db, athlete_id)
+            return
+        key = _pb_key(record['distance'], record['stroke'])
+        current = pb_doc.get('bests', {}).get(key)
+        if current is None or record['time_ms'] < current['time_ms']:
+            db.set('personal_bests', athlete_id, {'bests': {key: _pb_entry(record_id, record)}, 'updated_at': datetime.now()}, merge=True)
+    except Exception as e:
+        print(f"Error updating personal best: {e}")
+
+def _sync_personal_bests_bulk(db, records_with_ids):
+    """Memperbarui personal best untuk hasil import: satu get_many untuk semua atlet terdampak."""
+    try:
+        by_athlete = {}
+        for record_id, record in records_with_ids:
+            by_athlete.setdefault(record['athlete_id'], []).append((record_id, record))
+        pb_docs = db.get_many('personal_bests', list(by_athlete))
+        for athlete_id, athlete_records in by_athlete.items():
+            if athlete_id not in pb_docs:
+                rebuild_personal_bests(db, athlete_id)
+                continue
+            bests = pb_docs[athlete_id].get('bests', {})
+            improved = {}
+            for record_id, record in athlete_records:
+                key = _pb_key(record['distance'], record['stroke'])
+                current = improved.get(key) or bests.get(key)
+                if current is None or record['time_ms'] < current['time_ms']:
+                    improved[key] = _pb_entry(record_id, record)
+            if improved:
+                db.set('personal_bests', athlete_id, {'bests': improved, 'updated_at': datetime.now()}, merge=True)
+    except Exception as e:
+        print(f"Error updating personal best: {e}")
+
+def _sync_personal_best_on_update(db, record_id, old_record, new_record):
+    try:
+        athlete_id = new_record['athlete_id']
+        pb_doc = db.get('personal_bests', athlete_id)
+        if pb_doc is None:
+            rebuild_personal_bests(db, athlete_id)
+            return
+        bests = pb_doc.get('bests', {})
+        old_key = _pb_key(old_record.get('distance'), old_record.get('stroke'))
+        new_key = _pb_key(new_record['distance'], new_record['stroke'])
+        was_best = bests.get(old_key, {}).get('record_id') == record_id
+        if was_best and (old_key != new_key or new_record['time_ms'] > old_record.get('time_ms', 0)):
+            _recompute_personal_best(db, athlete_id, old_record.get('distance'), old_record.get('stroke'))
+            if old_key == new_key:
+                return
+        current = bests.get(new_key)
+        if current is None or current.get('record_id') == record_id or new_record['time_ms'] < current['time_ms']:
+            db.set('personal_bests', athlete_id, {'bests': {new_key: _pb_entry(record_id, new_record)}, 'updated_at': datetime.now()}, merge=True)
+    except Exception as e:
+        print(f"Error updating personal best: {e}")
+
+def _sync_personal_best_on_delete(db, record_id, old_record):
+    try:
+        athlete_id = old_record['athlete_id']
+        pb_doc = db.get('personal_bests', athlete_id)
+        key = _pb_key(old_record.get('distance'), old_record.get('stroke'))
+        if pb_doc and pb_doc.get('bests', {}).get(key, {}).get('record_id') == record_id:
+            _recompute_personal_best(db, athlete_id, old_record.get('distance'), old_record.get('stroke'))
+    except Exception as e:
+        print(f"Error updating personal best: {e}")
+
+# Field personal best yang dipakai tabel halaman Personal Best (coach, atlet, orang tua)
+BEST_TIME_FIELDS = ['distance', 'stroke', 'time_ms', 'time_formatted', 'competition_name', 'event_date']
+
+@request_memoized
+def get_personal_bests(db, athlete_id, fields=None):
+    """
+    Mengambil personal best (waktu tercepat per jarak & gaya) satu atlet dari
+    dokumen materialisasi. Dokumen dibangun sekali dari catatan waktu jika belum ada.
+    fields membatasi field setiap entri (selain 'id'); key map bests dinamis sehingga
+    pemangkasan dilakukan setelah dokumen dibaca.
+    """
+    if not db or not athlete_id:
+        return []
+    try:
+        pb_doc = db.get('personal_bests', athlete_id)
+        bests = pb_doc.get('bests', {}) if pb_doc is not None else rebuild_personal_bests(db, athlete_id)
+        return [{'id': entry['record_id'], **project_fields(entry, fields)} for entry in bests.values()]
+    except Exception as e:
+        st.error(f"Gagal memuat personal best: {e}")
+        request_failed()
+        return []
+
+# --- Instrumentasi: setiap fungsi publik di modul ini diukur waktunya (panel Performa Sistem) ---
+instrument_module(globals())
@@ -2,12 +2,20 @@ import streamlit as st
 import pyrebase
 import firebase_admin
 from firebase_admin import credentials, firestore
+from utils.storage import FirestoreBackend
+from utils.sqlite_storage import SQLiteBackend
+from utils.metering import MeteredBackend, UsageMeter
 
 @st.cache_resource
 def initialize_firebase():
     """
     Menginisialisasi Pyrebase (untuk auth) dan Firebase Admin (untuk DB).
     Menggunakan st.secrets untuk keamanan dan menambahkan penanganan error.
+
+    Backend penyimpanan dipilih lewat bagian [storage] di secrets.toml:
+    backend = "firestore" (default) atau "sqlite" dengan sqlite_path.
+    Bagian [metering] opsional: page_read_budget (batas baca dokumen per eksekusi
+    halaman) dan [metering.page_budgets] untuk batas per modul halaman.
     """
     try:
         if not firebase_admin._apps:
@@ -23,7 +31,18 @@ def initialize_firebase():
             admin_creds = credentials.Certificate(creds_dict)
             firebase_admin.initialize_app(admin_creds)
         
-        db = firestore.client()
+        storage_config = dict(st.secrets.get("storage", {}))
+        if storage_config.get("backend", "firestore") == "sqlite":
+            db = SQLiteBackend(storage_config.get("sqlite_path", "ksac.db"))
+        else:
+            db = FirestoreBackend(firestore.client())
+        # Menghitung dokumen dibaca/ditulis per sesi, halaman, dan fungsi (panel Performa Sistem)
+        metering_config = dict(st.secrets.get("metering", {}))
+        meter = UsageMeter(
+            page_read_budget=metering_config.get("page_read_budget"),
+            page_budgets=metering_config.get("page_budgets", {})
+        )
+        db = MeteredBackend(db, meter)
 
     except Exception as e:
         st.error(f"Gagal terhubung ke Firestore (Admin SDK): {e}. Periksa format file .streamlit/secrets.toml Anda.")
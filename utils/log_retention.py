@@ -0,0 +1,107 @@
+import gzip
+import json
+import os
+import re
+from datetime import datetime, timedelta, time, timezone
+import pyarrow as pa
+import pyarrow.parquet as pq
+from utils.log_writer import LOG_SHARD_VALUES
+from utils.storage import ASCENDING, DOCUMENT_ID, MAX_BATCH_SIZE
+
+# --- Konfigurasi retensi log aktivitas ---
+# Log mentah disimpan selama RETENTION_DAYS hari; yang lebih lama diringkas per hari lalu diarsip ke file
+RETENTION_DAYS = int(os.environ.get("KSAC_LOG_RETENTION_DAYS", 90))
+ARCHIVE_DIR = os.environ.get("KSAC_LOG_ARCHIVE_DIR", "log_archive")
+ARCHIVE_FORMATS = ("ndjson", "parquet")
+SUMMARY_COLLECTION = 'activity_log_daily'
+# Satu dokumen ringkasan + penghapusan log mentah satu hari masuk ke satu WriteBatch (atomik)
+CHUNK_SIZE = MAX_BATCH_SIZE - 1
+
+# Bagian dinamis pesan log (nama, angka, detail) dimulai di salah satu penanda ini
+_ACTION_DETAIL = re.compile(r":| untuk | \(|\d")
+
+
+def action_type(action):
+    """Jenis aktivitas tanpa detail, mis. 'Menghapus catatan waktu 00:31.20 untuk X' -> 'Menghapus catatan waktu'."""
+    return _ACTION_DETAIL.split(action or "", maxsplit=1)[0].strip().rstrip('.') or "Lainnya"
+
+
+def _naive_utc(value):
+    # Firestore mengembalikan datetime ber-timezone (UTC); hari ringkasan dihitung dalam UTC
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _archive_path(archive_dir, day, archive_format, part):
+    directory = os.path.join(archive_dir, f"{day:%Y}", f"{day:%m}")
+    os.makedirs(directory, exist_ok=True)
+    # Satu file per potongan, dinamai id log pertamanya: job yang diulang setelah batch gagal
+    # menimpa file yang sama alih-alih menambah baris ganda
+    extension = "parquet" if archive_format == "parquet" else "ndjson.gz"
+    return os.path.join(directory, f"activity_logs_{day}_{part}.{extension}")
+
+
+def _write_archive(path, archive_format, rows):
+    # Ditulis ke file sementara lalu dipindah, sehingga file arsip tidak pernah setengah jadi
+    tmp_path = f"{path}.tmp"
+    if archive_format == "parquet":
+        pq.write_table(pa.Table.from_pylist(rows), tmp_path, compression='zstd')
+    else:
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            for row in rows:
+                f.write(json.dumps(row, default=lambda v: v.isoformat() if isinstance(v, datetime) else str(v)) + "\n")
+    os.replace(tmp_path, path)
+
+
+def _merge_summary(summary, day, rows, path):
+    summary = summary or {'date': datetime.combine(day, time.min), 'total': 0, 'by_role': {}, 'by_action': {}, 'by_user': {}, 'archives': []}
+    summary['total'] += len(rows)
+    for row in rows:
+        role = row.get('user_role') or 'N/A'
+        summary['by_role'][role] = summary['by_role'].get(role, 0) + 1
+        kind = action_type(row.get('action'))
+        summary['by_action'][kind] = summary['by_action'].get(kind, 0) + 1
+        user = summary['by_user'].setdefault(row.get('user_id') or 'N/A', {'name': row.get('user_name'), 'role': role, 'count': 0})
+        user['count'] += 1
+    if path not in summary['archives']:
+        summary['archives'].append(path)
+    summary['updated_at'] = datetime.now()
+    return summary
+
+
+def run_log_retention(_db, retention_days=RETENTION_DAYS, archive_dir=ARCHIVE_DIR, archive_format="ndjson", now=None):
+    """
+    Memindahkan log aktivitas yang lebih tua dari retention_days: entri mentah diarsip ke
+    file terkompresi (NDJSON gzip atau Parquet) di archive_dir, dihitung ke dokumen ringkasan
+    harian (SUMMARY_COLLECTION, id 'YYYY-MM-DD' dalam UTC), lalu dihapus dari activity_logs.
+    Arsip ditulis lebih dulu ke file per potongan (ditimpa jika job diulang); ringkasan dan
+    penghapusan satu hari dijalankan dalam satu batch sehingga job yang terhenti bisa
+    dijalankan ulang tanpa menghitung ganda, baik di ringkasan maupun di arsip.
+    """
+    if archive_format not in ARCHIVE_FORMATS:
+        raise ValueError(f"Format arsip tidak dikenal: {archive_format}")
+    now = _naive_utc(now) if now else datetime.now(timezone.utc).replace(tzinfo=None)
+    cutoff = datetime.combine((now - timedelta(days=retention_days)).date(), time.min)
+    result = {'cutoff': cutoff, 'archived': 0, 'days': set(), 'files': set()}
+    while True:
+        docs = _db.query('activity_logs', filters=[('shard', 'in', LOG_SHARD_VALUES), ('timestamp', '<', cutoff)],
+                         order_by=[('timestamp', ASCENDING), (DOCUMENT_ID, ASCENDING)], limit=CHUNK_SIZE)
+        if not docs:
+            break
+        by_day = {}
+        for doc in docs:
+            row = {'id': doc.id, **{k: _naive_utc(v) for k, v in doc.data.items()}}
+            by_day.setdefault(row['timestamp'].date(), []).append(row)
+        for day, rows in sorted(by_day.items()):
+            path = _archive_path(archive_dir, day, archive_format, rows[0]['id'])
+            _write_archive(path, archive_format, rows)
+            summary = _merge_summary(_db.get(SUMMARY_COLLECTION, day.isoformat()), day, rows, path)
+            _db.batch_write([('set', SUMMARY_COLLECTION, day.isoformat(), summary)] +
+                            [('delete', 'activity_logs', row['id'], None) for row in rows])
+            result['archived'] += len(rows)
+            result['days'].add(day)
+            result['files'].add(path)
+    result['days'] = sorted(result['days'])
+    result['files'] = sorted(result['files'])
+    return result
@@ -0,0 +1,152 @@
+import atexit
+import queue
+import random
+import threading
+import time
+import weakref
+
+# --- Konfigurasi penulis log ---
+MAX_QUEUE_SIZE = 1000
+BATCH_SIZE = 50
+FLUSH_INTERVAL_MS = 500
+# Waktu tunggu maksimum saat antrean penuh sebelum entri dibuang
+BACKPRESSURE_TIMEOUT_S = 0.05
+# Log dibagi ke beberapa shard (field 'shard', diawali di setiap composite index) agar penulisan
+# beruntun tidak menumpuk di ujung index timestamp yang sama. Jumlah shard hanya boleh dinaikkan.
+# Index single-field timestamp activity_logs dinonaktifkan (fieldOverrides) karena itulah index
+# yang menumpuk. Aman: semua query log (get_logs, retensi) memakai filter shard dan dilayani
+# composite index, dan migrasi shard (migrate_log_shards) berjalan per id dokumen.
+LOG_SHARDS = 8
+LOG_SHARD_VALUES = list(range(LOG_SHARDS))
+
+
+def log_shard():
+    return random.randrange(LOG_SHARDS)
+
+
+class ActivityLogWriter:
+    """
+    Penulis log aktivitas di background. log_activity hanya memasukkan entri ke
+    antrean terbatas; thread penulis mengirimnya dengan batch_write setiap
+    BATCH_SIZE entri atau FLUSH_INTERVAL_MS milidetik, dan sisa antrean
+    dikirim saat proses berhenti.
+    """
+
+    def __init__(self, _db, collection='activity_logs', max_queue_size=MAX_QUEUE_SIZE,
+                 batch_size=BATCH_SIZE, flush_interval_ms=FLUSH_INTERVAL_MS):
+        self._db = _db
+        self.collection = collection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._lock = threading.Lock()
+        self._flush_requested = threading.Event()
+        self._flushed = threading.Condition()
+        self._pending = 0
+        self._closed = False
+        self._stats = {'submitted': 0, 'written': 0, 'batches': 0, 'dropped': 0, 'backpressure_waits': 0, 'failed': 0}
+        self._thread = threading.Thread(target=self._run, name="activity-log-writer", daemon=True)
+        self._thread.start()
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self._stats[key] += amount
+
+    def submit(self, entry):
+        """Memasukkan entri ke antrean. Mengembalikan False jika entri dibuang karena antrean penuh."""
+        if self._closed:
+            self._count('dropped')
+            return False
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self._count('backpressure_waits')
+            try:
+                self._queue.put(entry, timeout=BACKPRESSURE_TIMEOUT_S)
+            except queue.Full:
+                self._count('dropped')
+                return False
+        with self._flushed:
+            self._pending += 1
+        self._count('submitted')
+        return True
+
+    def _run(self):
+        buffer = []
+        deadline = None
+        stopping = False
+        while not stopping:
+            timeout = self.flush_interval if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                entry = self._queue.get(timeout=timeout)
+                if entry is None:
+                    stopping = True
+                else:
+                    buffer.append(entry)
+            except queue.Empty:
+                pass
+            flush_requested = self._flush_requested.is_set() or stopping
+            if flush_requested:
+                # Ambil semua yang sudah antre agar dikirim dalam batch penuh
+                while True:
+                    try:
+                        entry = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if entry is None:
+                        stopping = True
+                    else:
+                        buffer.append(entry)
+            if buffer and deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+            if buffer and (len(buffer) >= self.batch_size or flush_requested or time.monotonic() >= deadline):
+                for start in range(0, len(buffer), self.batch_size):
+                    self._write(buffer[start:start + self.batch_size])
+                buffer, deadline = [], None
+            if flush_requested:
+                self._flush_requested.clear()
+
+    def _write(self, entries):
+        try:
+            self._db.batch_write([('add', self.collection, None, entry) for entry in entries])
+            self._count('written', len(entries))
+            self._count('batches')
+        except Exception as e:
+            self._count('failed', len(entries))
+            print(f"Error writing activity logs: {e}")
+        with self._flushed:
+            self._pending -= len(entries)
+            self._flushed.notify_all()
+
+    def flush(self, timeout=5.0):
+        """Meminta penulisan segera dan menunggu sampai antrean kosong."""
+        self._flush_requested.set()
+        with self._flushed:
+            return self._flushed.wait_for(lambda: self._pending <= 0, timeout=timeout)
+
+    def close(self, timeout=5.0):
+        """Menulis sisa antrean lalu menghentikan thread penulis."""
+        if self._closed:
+            return
+        self.flush(timeout)
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats, 'queued': self._queue.qsize()}
+
+
+_writers = weakref.WeakKeyDictionary()
+_writers_lock = threading.Lock()
+
+
+def get_log_writer(_db):
+    """Mengembalikan ActivityLogWriter milik backend (satu per proses)."""
+    with _writers_lock:
+        if _db not in _writers:
+            writer = ActivityLogWriter(_db)
+            atexit.register(writer.close)
+            _writers[_db] = writer
+        return _writers[_db]
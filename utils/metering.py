@@ -0,0 +1,163 @@
+import atexit
+import os
+import socket
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from utils.monitoring import MonitoredBackend, active_spans
+
+# --- Konfigurasi metering ---
+USAGE_COLLECTION = 'usage_daily'
+# Interval penyimpanan total harian ke database (detik)
+PERSIST_INTERVAL_S = 60
+# Jumlah sesi terakhir yang hitungannya disimpan di memori
+MAX_TRACKED_SESSIONS = 200
+BACKGROUND = "(background)"
+
+
+def _empty_counts():
+    return {'reads': 0, 'writes': 0, 'deletes': 0}
+
+
+def _add(target, reads, writes, deletes):
+    target['reads'] += reads
+    target['writes'] += writes
+    target['deletes'] += deletes
+
+
+class UsageMeter:
+    """
+    Penghitung dokumen dibaca/ditulis/dihapus (dasar tagihan Firestore) per sesi,
+    per halaman, dan per fungsi database. Total harian proses ini disimpan berkala
+    ke koleksi usage_daily (satu dokumen per tanggal per proses).
+    """
+
+    def __init__(self, page_read_budget=None, page_budgets=None):
+        self.page_read_budget = page_read_budget
+        self.page_budgets = dict(page_budgets or {})
+        self.process_id = f"{socket.gethostname()}-{os.getpid()}"
+        self._lock = threading.RLock()
+        self._sessions = OrderedDict()
+        self._day = None
+        # Hitungan hari sebelumnya yang belum tersimpan saat tanggal berganti
+        self._unsaved_day = None
+        self._dirty = False
+        self._reset_day()
+
+    def _reset_day(self):
+        if self._day is not None:
+            self._unsaved_day = self.today()
+        self._day = datetime.now().strftime('%Y-%m-%d')
+        self._totals = _empty_counts()
+        self._pages = {}
+        self._functions = {}
+        self._budget_exceeded = {}
+
+    def record(self, reads=0, writes=0, deletes=0):
+        spans = active_spans()
+        page = next((frame['name'] for frame in reversed(spans) if frame['kind'] == 'page'), BACKGROUND)
+        function = next((frame['name'] for frame in reversed(spans) if frame['kind'] == 'function'), BACKGROUND)
+        ctx = get_script_run_ctx(suppress_warning=True)
+        session_id = ctx.session_id if ctx else BACKGROUND
+        with self._lock:
+            if datetime.now().strftime('%Y-%m-%d') != self._day:
+                self._reset_day()
+            self._dirty = True
+            _add(self._totals, reads, writes, deletes)
+            _add(self._pages.setdefault(page, _empty_counts()), reads, writes, deletes)
+            _add(self._functions.setdefault(function, _empty_counts()), reads, writes, deletes)
+            if session_id not in self._sessions:
+                self._sessions[session_id] = _empty_counts()
+                if len(self._sessions) > MAX_TRACKED_SESSIONS:
+                    self._sessions.popitem(last=False)
+            self._sessions.move_to_end(session_id)
+            _add(self._sessions[session_id], reads, writes, deletes)
+
+    def budget_for(self, page):
+        return self.page_budgets.get(page, self.page_read_budget)
+
+    def check_page_budget(self, page, reads):
+        """Mencatat peringatan jika satu eksekusi halaman membaca lebih dari budget-nya."""
+        budget = self.budget_for(page)
+        if budget is None or reads <= budget:
+            return False
+        with self._lock:
+            self._budget_exceeded[page] = self._budget_exceeded.get(page, 0) + 1
+        print(f"Warning: halaman {page} membaca {reads} dokumen (budget {budget}).")
+        return True
+
+    def session_counts(self, session_id):
+        with self._lock:
+            return dict(self._sessions.get(session_id, _empty_counts()))
+
+    def today(self):
+        """Salinan hitungan hari ini di proses ini."""
+        with self._lock:
+            return {
+                'date': self._day,
+                'process': self.process_id,
+                'totals': dict(self._totals),
+                'pages': {name: dict(counts) for name, counts in self._pages.items()},
+                'functions': {name: dict(counts) for name, counts in self._functions.items()},
+                'budget_exceeded': dict(self._budget_exceeded),
+            }
+
+    def persist(self, backend):
+        """Menyimpan total hari ini ke usage_daily/{tanggal}_{proses} lewat backend mentah (tidak ikut dihitung)."""
+        with self._lock:
+            if not self._dirty and not self._unsaved_day:
+                return
+            days = [self._unsaved_day, self.today()] if self._unsaved_day else [self.today()]
+            self._unsaved_day = None
+            self._dirty = False
+        try:
+            for usage in days:
+                backend.set(USAGE_COLLECTION, f"{usage['date']}_{usage['process']}", {**usage, 'updated_at': datetime.now()})
+        except Exception as e:
+            print(f"Error persisting usage totals: {e}")
+
+
+class MeteredBackend(MonitoredBackend):
+    """
+    MonitoredBackend yang juga mencatat setiap dokumen ke UsageMeter, termasuk
+    dokumen yang diterima listener watch() di background.
+    """
+
+    def __init__(self, backend, meter):
+        super().__init__(backend)
+        self.meter = meter
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._persist_loop, name="usage-meter", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _count(self, reads=0, writes=0, deletes=0):
+        super()._count(reads=reads, writes=writes, deletes=deletes)
+        self.meter.record(reads=reads, writes=writes, deletes=deletes)
+
+    def watch(self, collection, callback, interval=1.0):
+        def _metered(changes):
+            self.meter.record(reads=len(changes))
+            callback(changes)
+        return self.backend.watch(collection, _metered, interval)
+
+    def _persist_loop(self):
+        while not self._stop.wait(PERSIST_INTERVAL_S):
+            self.meter.persist(self.backend)
+
+    def close(self):
+        if not self._stop.is_set():
+            self._stop.set()
+            self.meter.persist(self.backend)
+
+
+def load_daily_usage(backend, date):
+    """Total semua proses untuk satu tanggal (YYYY-MM-DD) dari koleksi usage_daily."""
+    totals = _empty_counts()
+    pages = {}
+    for doc in backend.query(USAGE_COLLECTION, filters=[('date', '==', date)]):
+        _add(totals, **doc.data.get('totals', _empty_counts()))
+        for page, counts in doc.data.get('pages', {}).items():
+            _add(pages.setdefault(page, _empty_counts()), **counts)
+    return {'date': date, 'totals': totals, 'pages': pages}
@@ -0,0 +1,162 @@
+import functools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+import numpy as np
+from utils.storage import StorageBackend
+
+# Jumlah sampel terakhir yang disimpan per halaman / per fungsi
+RING_BUFFER_SIZE = 500
+
+
+class PerformanceMonitor:
+    """
+    Ring buffer durasi dan jumlah dokumen per halaman dan per fungsi database,
+    dibagi semua sesi dalam satu proses. Sampel lama otomatis terbuang sehingga
+    persentil mencerminkan beban terbaru.
+    """
+
+    def __init__(self, size=RING_BUFFER_SIZE):
+        self.size = size
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, kind, name, duration_ms, reads=0, writes=0, deletes=0):
+        with self._lock:
+            buffer = self._samples.get((kind, name))
+            if buffer is None:
+                buffer = self._samples[(kind, name)] = deque(maxlen=self.size)
+            buffer.append((duration_ms, reads, writes, deletes))
+
+    def summary(self, kind):
+        """List ringkasan per nama: jumlah sampel, p50/p95/p99/maks (ms) dan rata-rata dokumen."""
+        with self._lock:
+            samples = {name: list(buffer) for (k, name), buffer in self._samples.items() if k == kind}
+        rows = []
+        for name, values in samples.items():
+            data = np.array(values, dtype=float)
+            p50, p95, p99 = np.percentile(data[:, 0], [50, 95, 99])
+            rows.append({
+                'name': name, 'count': len(data),
+                'p50_ms': p50, 'p95_ms': p95, 'p99_ms': p99, 'max_ms': data[:, 0].max(),
+                'avg_reads': data[:, 1].mean(), 'avg_writes': data[:, 2].mean(), 'avg_deletes': data[:, 3].mean(),
+            })
+        return sorted(rows, key=lambda row: row['p95_ms'], reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+
+
+monitor = PerformanceMonitor()
+
+# Tumpukan span aktif di eksekusi script ini (tuple frame, yang terdalam di akhir)
+_active_spans = ContextVar('active_spans', default=())
+
+
+@contextmanager
+def span(kind, name):
+    """Mengukur durasi sebuah halaman / fungsi beserta dokumen yang dibaca dan ditulis di dalamnya."""
+    frame = {'kind': kind, 'name': name, 'reads': 0, 'writes': 0, 'deletes': 0}
+    token = _active_spans.set(_active_spans.get() + (frame,))
+    start = time.perf_counter()
+    try:
+        yield frame
+    finally:
+        duration_ms = (time.perf_counter() - start) * 1000
+        _active_spans.reset(token)
+        monitor.record(kind, name, duration_ms, frame['reads'], frame['writes'], frame['deletes'])
+
+
+def active_spans():
+    return _active_spans.get()
+
+
+def count_documents(reads=0, writes=0, deletes=0):
+    """Menambahkan jumlah dokumen ke semua span yang sedang aktif (halaman dan fungsi yang memanggil)."""
+    for frame in _active_spans.get():
+        frame['reads'] += reads
+        frame['writes'] += writes
+        frame['deletes'] += deletes
+
+
+def timed_function(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with span('function', func.__name__):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def instrument_module(namespace):
+    """Membungkus setiap fungsi publik yang didefinisikan di modul (globals()) dengan span 'function'."""
+    module_name = namespace['__name__']
+    for name, value in list(namespace.items()):
+        if callable(value) and not name.startswith('_') and getattr(value, '__module__', None) == module_name:
+            namespace[name] = timed_function(value)
+
+
+class MonitoredBackend(StorageBackend):
+    """
+    Pembungkus backend penyimpanan yang menghitung dokumen dibaca/ditulis/dihapus
+    untuk span aktif. Hitungan mengikuti cara Firestore menagih: query tanpa hasil
+    tetap dihitung satu baca, get dokumen yang tidak ada juga dihitung satu baca.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.name = backend.name
+        self.live_updates = backend.live_updates
+
+    @property
+    def location(self):
+        return self.backend.location
+
+    def _count(self, reads=0, writes=0, deletes=0):
+        count_documents(reads=reads, writes=writes, deletes=deletes)
+
+    def get(self, collection, doc_id):
+        data = self.backend.get(collection, doc_id)
+        self._count(reads=1)
+        return data
+
+    def get_many(self, collection, doc_ids):
+        doc_ids = list(doc_ids)
+        docs = self.backend.get_many(collection, doc_ids)
+        self._count(reads=len(doc_ids))
+        return docs
+
+    def query(self, collection, filters=None, order_by=None, limit=None, start_after=None, select=None):
+        docs = self.backend.query(collection, filters=filters, order_by=order_by, limit=limit, start_after=start_after, select=select)
+        self._count(reads=max(len(docs), 1))
+        return docs
+
+    def add(self, collection, data):
+        doc_id = self.backend.add(collection, data)
+        self._count(writes=1)
+        return doc_id
+
+    def set(self, collection, doc_id, data, merge=False):
+        self.backend.set(collection, doc_id, data, merge=merge)
+        self._count(writes=1)
+
+    def update(self, collection, doc_id, data):
+        self.backend.update(collection, doc_id, data)
+        self._count(writes=1)
+
+    def delete(self, collection, doc_id):
+        self.backend.delete(collection, doc_id)
+        self._count(deletes=1)
+
+    def batch_write(self, operations):
+        operations = list(operations)
+        doc_ids = self.backend.batch_write(operations)
+        deletes = sum(1 for op in operations if op[0] == 'delete')
+        self._count(writes=len(operations) - deletes, deletes=deletes)
+        return doc_ids
+
+    def watch(self, collection, callback, interval=1.0):
+        # Listener berjalan di thread background, di luar span halaman mana pun
+        return self.backend.watch(collection, callback, interval)
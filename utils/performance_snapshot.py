@@ -0,0 +1,289 @@
+import hashlib
+import os
+import threading
+import time
+import weakref
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+import pyarrow as pa
+import pyarrow.compute as pc
+from utils.storage import MAX_BATCH_SIZE
+
+# --- Konfigurasi snapshot ---
+SNAPSHOT_DIR = ".cache"
+# Jarak minimum antar delta sync (detik)
+SYNC_INTERVAL_S = 5
+# Tumpang tindih watermark untuk menoleransi selisih jam antar server
+SYNC_OVERLAP = timedelta(seconds=60)
+TOMBSTONE_COLLECTION = 'deleted_performance_records'
+# Tombstone lebih tua dari ini dihapus; snapshot yang terakhir sync sebelum batas ini dimuat penuh
+TOMBSTONE_RETENTION = timedelta(days=7)
+# Jarak minimum antar pembersihan tombstone per proses (detik)
+PRUNE_INTERVAL_S = 3600
+# Watermark awal bila koleksi belum punya timestamp sama sekali
+_EPOCH = datetime(1970, 1, 1)
+
+SCHEMA = pa.schema([
+    ('id', pa.string()),
+    ('athlete_id', pa.string()),
+    ('athlete_name', pa.string()),
+    ('competition_name', pa.string()),
+    ('event_date', pa.timestamp('us')),
+    ('stroke', pa.string()),
+    ('distance', pa.int64()),
+    ('time_ms', pa.int64()),
+    ('time_formatted', pa.string()),
+    ('recorded_by', pa.string()),
+    ('age_at_event', pa.int64()),
+    ('ku_at_event', pa.string()),
+    ('created_at', pa.timestamp('us')),
+    ('updated_at', pa.timestamp('us')),
+])
+_SORT_KEYS = [('event_date', 'descending'), ('id', 'descending')]
+# Hanya kolom skema yang diambil dari server (projection), field lain dibuang oleh tabel
+_RECORD_FIELDS = [name for name in SCHEMA.names if name != 'id']
+
+
+def _naive_utc(value):
+    # Firestore mengembalikan datetime ber-timezone (UTC); simpan semuanya sebagai UTC naive
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _max_timestamp(rows, fields, current):
+    for row in rows:
+        for field in fields:
+            value = _naive_utc(row.get(field))
+            if isinstance(value, datetime) and (current is None or value > current):
+                current = value
+    return current
+
+
+def _coerce(value, arrow_type):
+    """Menyamakan nilai dengan tipe kolom skema; ValueError/TypeError jika tidak bisa."""
+    if value is None:
+        return None
+    if pa.types.is_timestamp(arrow_type):
+        if isinstance(value, datetime):
+            return _naive_utc(value)
+        if isinstance(value, date):
+            return datetime.combine(value, dt_time.min)
+        if isinstance(value, str):
+            return _naive_utc(datetime.fromisoformat(value))
+        raise TypeError(f"bukan tanggal: {value!r}")
+    if pa.types.is_integer(arrow_type):
+        number = float(value) if isinstance(value, str) else value
+        if isinstance(number, bool) or not isinstance(number, (int, float)) or number != int(number):
+            raise TypeError(f"bukan bilangan bulat: {value!r}")
+        return int(number)
+    return value if isinstance(value, str) else str(value)
+
+
+def _coerce_rows(rows):
+    """Baris yang tipenya bisa disamakan dengan SCHEMA; baris yang tidak bisa dilewati dan dicatat."""
+    coerced = []
+    for row in rows:
+        try:
+            coerced.append({field.name: _coerce(row.get(field.name), field.type) for field in SCHEMA})
+        except (TypeError, ValueError, OverflowError) as e:
+            print(f"Error performance record {row.get('id')}: dilewati dari snapshot ({e})")
+    return coerced
+
+
+class PerformanceSnapshot:
+    """
+    Snapshot kolumnar (Arrow) koleksi performance_records yang dibagi semua sesi
+    dalam satu proses. Disimpan di disk sebagai file Arrow IPC dan di-memory-map
+    saat start; setelah itu hanya perubahan (created_at/updated_at di atas
+    watermark dan tombstone penghapusan) yang diambil dari database.
+    Tabel yang dikembalikan tidak pernah diubah; setiap sync membuat tabel baru.
+    Tombstone disimpan TOMBSTONE_RETENTION; snapshot yang lebih lama dari itu dimuat penuh.
+    """
+
+    def __init__(self, _db, path=None):
+        self._db = _db
+        self.path = path
+        self._lock = threading.Lock()
+        self._table = None
+        self._records_watermark = None
+        self._deletes_watermark = None
+        self._synced_at = None
+        self._last_sync = 0.0
+        self._last_prune = 0.0
+        self._stale = True
+        if path and os.path.exists(path):
+            self._load_from_disk()
+
+    # --- Disk ---
+    def _load_from_disk(self):
+        try:
+            with pa.memory_map(self.path, 'r') as source:
+                table = pa.ipc.open_file(source).read_all()
+            metadata = table.schema.metadata or {}
+            self._records_watermark = self._parse_watermark(metadata.get(b'records_watermark'))
+            self._deletes_watermark = self._parse_watermark(metadata.get(b'deletes_watermark'))
+            self._synced_at = self._parse_watermark(metadata.get(b'synced_at'))
+            self._table = table.replace_schema_metadata(None)
+        except Exception as e:
+            print(f"Error loading performance snapshot: {e}")
+            self._table = None
+
+    @staticmethod
+    def _parse_watermark(raw):
+        return datetime.fromisoformat(raw.decode()) if raw else None
+
+    def _save_to_disk(self):
+        if not self.path:
+            return
+        try:
+            metadata = {
+                'records_watermark': self._records_watermark.isoformat() if self._records_watermark else '',
+                'deletes_watermark': self._deletes_watermark.isoformat() if self._deletes_watermark else '',
+                'synced_at': self._synced_at.isoformat() if self._synced_at else '',
+            }
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with pa.OSFile(tmp_path, 'wb') as sink:
+                with pa.ipc.new_file(sink, self._table.schema.with_metadata(metadata)) as writer:
+                    writer.write_table(self._table)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Error saving performance snapshot: {e}")
+
+    # --- Sinkronisasi ---
+    @staticmethod
+    def _to_table(docs):
+        rows = [{**{k: _naive_utc(v) for k, v in doc.data.items()}, 'id': doc.id} for doc in docs]
+        try:
+            return pa.Table.from_pylist(rows, schema=SCHEMA), rows
+        except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError, ValueError, OverflowError):
+            # Satu dokumen bertipe salah tidak boleh menggagalkan seluruh snapshot
+            return pa.Table.from_pylist(_coerce_rows(rows), schema=SCHEMA), rows
+
+    def _full_load(self):
+        self._synced_at = datetime.now()
+        table, rows = self._to_table(self._db.query('performance_records', select=_RECORD_FIELDS))
+        latest_tombstone = self._db.query(TOMBSTONE_COLLECTION, order_by=[('deleted_at', 'DESCENDING')], limit=1)
+        self._records_watermark = _max_timestamp(rows, ['created_at', 'updated_at'], None)
+        self._deletes_watermark = _max_timestamp([doc.data for doc in latest_tombstone], ['deleted_at'], None)
+        self._table = table.sort_by(_SORT_KEYS)
+
+    def _delta_sync(self):
+        synced_at = datetime.now()
+        changed = {}
+        for field in ['created_at', 'updated_at']:
+            since = (self._records_watermark or _EPOCH) - SYNC_OVERLAP
+            for doc in self._db.query('performance_records', filters=[(field, '>=', since)], select=_RECORD_FIELDS):
+                changed[doc.id] = doc
+        since = (self._deletes_watermark or _EPOCH) - SYNC_OVERLAP
+        tombstones = self._db.query(TOMBSTONE_COLLECTION, filters=[('deleted_at', '>=', since)])
+
+        # Tombstone yang lebih lama dari penulisan ulang dokumen tidak berlaku
+        deleted_ids = {doc.data.get('record_id', doc.id) for doc in tombstones} - set(changed)
+        self._deletes_watermark = _max_timestamp([doc.data for doc in tombstones], ['deleted_at'], self._deletes_watermark)
+        self._synced_at = synced_at
+        if not changed and not deleted_ids:
+            return False
+
+        new_rows, rows = self._to_table(changed.values())
+        self._records_watermark = _max_timestamp(rows, ['created_at', 'updated_at'], self._records_watermark)
+        removed_ids = pa.array(list(set(changed) | deleted_ids), type=pa.string())
+        kept = self._table.filter(pc.invert(pc.is_in(self._table['id'], value_set=removed_ids)))
+        self._table = pa.concat_tables([kept, new_rows]).sort_by(_SORT_KEYS).combine_chunks()
+        return True
+
+    def _expired(self):
+        # Tombstone sejak sync terakhir mungkin sudah dihapus; hanya muat penuh yang aman
+        return self._synced_at is None or self._synced_at < datetime.now() - TOMBSTONE_RETENTION + SYNC_OVERLAP
+
+    def _prune_tombstones(self):
+        """
+        Menghapus tombstone yang lebih tua dari TOMBSTONE_RETENTION dan dari watermark snapshot
+        ini. Snapshot lain yang belum sync sejak batas itu memuat ulang penuh (_expired).
+        """
+        cutoff = datetime.now() - TOMBSTONE_RETENTION
+        if self._deletes_watermark is not None:
+            cutoff = min(cutoff, self._deletes_watermark - SYNC_OVERLAP)
+        while True:
+            docs = self._db.query(TOMBSTONE_COLLECTION, filters=[('deleted_at', '<', cutoff)], limit=MAX_BATCH_SIZE, select=['deleted_at'])
+            if not docs:
+                return
+            self._db.batch_write([('delete', TOMBSTONE_COLLECTION, doc.id, None) for doc in docs])
+
+    def mark_stale(self):
+        """Dipanggil setelah penulisan di proses ini agar pembacaan berikutnya langsung sync."""
+        self._stale = True
+
+    def table(self):
+        """Tabel Arrow terbaru (immutable) setelah delta sync bila sudah waktunya."""
+        if self._table is not None and not self._stale and time.monotonic() - self._last_sync < SYNC_INTERVAL_S:
+            return self._table
+        with self._lock:
+            if self._table is None or self._stale or time.monotonic() - self._last_sync >= SYNC_INTERVAL_S:
+                self._stale = False
+                try:
+                    if self._table is None or self._expired():
+                        self._full_load()
+                        self._save_to_disk()
+                    elif self._delta_sync():
+                        self._save_to_disk()
+                except Exception as e:
+                    print(f"Error syncing performance snapshot: {e}")
+                    if self._table is None:
+                        raise
+                self._last_sync = time.monotonic()
+                if self._last_sync - self._last_prune >= PRUNE_INTERVAL_S:
+                    self._last_prune = self._last_sync
+                    try:
+                        self._prune_tombstones()
+                    except Exception as e:
+                        print(f"Error pruning performance tombstones: {e}")
+            return self._table
+
+
+def filter_performance_table(table, athlete_id=None, stroke=None, distance=None, limit=None, start_after=None):
+    """
+    Menerapkan filter Manajemen & Analisa pada snapshot tanpa menyentuh database.
+    Urutan sama dengan get_performance_records: (event_date, id) menurun, start_after
+    adalah cursor (event_date, id). Mengembalikan list dict seperti get_performance_records.
+    """
+    mask = None
+    conditions = []
+    if athlete_id:
+        conditions.append(pc.equal(table['athlete_id'], athlete_id))
+    if stroke:
+        conditions.append(pc.equal(table['stroke'], stroke))
+    if distance:
+        conditions.append(pc.equal(table['distance'], distance))
+    if start_after:
+        cursor_date = pa.scalar(_naive_utc(start_after[0]), type=pa.timestamp('us'))
+        conditions.append(pc.or_(
+            pc.less(table['event_date'], cursor_date),
+            pc.and_(pc.equal(table['event_date'], cursor_date), pc.less(table['id'], start_after[1]))
+        ))
+    for condition in conditions:
+        mask = condition if mask is None else pc.and_(mask, condition)
+    if mask is not None:
+        table = table.filter(mask)
+    if limit:
+        table = table.slice(0, limit)
+    return table.to_pylist()
+
+
+_snapshots = weakref.WeakKeyDictionary()
+_snapshots_lock = threading.Lock()
+
+
+def get_performance_snapshot(_db, create=True):
+    """PerformanceSnapshot milik backend (satu per proses); file disk dinamai sesuai lokasi backend."""
+    with _snapshots_lock:
+        if _db not in _snapshots:
+            if not create:
+                return None
+            location = getattr(_db, 'location', None)
+            path = None
+            if location:
+                digest = hashlib.sha1(f"{_db.name}:{location}".encode()).hexdigest()[:12]
+                path = os.path.join(SNAPSHOT_DIR, f"performance_records_{digest}.arrow")
+            _snapshots[_db] = PerformanceSnapshot(_db, path)
+        return _snapshots[_db]
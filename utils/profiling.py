@@ -0,0 +1,164 @@
+import cProfile
+import itertools
+import json
+import marshal
+import os
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+
+# Profiling aktif sejak start bila KSAC_PROFILE=1; admin bisa menyalakan/mematikan dari panel Performa Sistem
+PROFILE_ENV_VAR = "KSAC_PROFILE"
+# Jumlah profil terakhir yang disimpan di memori proses
+MAX_PROFILES = 20
+# Batas pohon panggilan untuk speedscope: kedalaman stack dan cabang terkecil (porsi dari total waktu)
+MAX_STACK_DEPTH = 80
+MIN_BRANCH_SHARE = 0.0005
+
+
+class ProfileStore:
+    """
+    Penyimpan profil cProfile per rerun (semua sesi dalam satu proses) dengan kapasitas
+    tetap: profil terlama otomatis terbuang. Data disimpan dalam format file pstats.
+    """
+
+    def __init__(self, size=MAX_PROFILES, enabled=False):
+        self.enabled = enabled
+        self._profiles = deque(maxlen=size)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def add(self, profiler, tags, duration_ms):
+        stats = pstats.Stats(profiler)
+        top = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+        entry = {
+            'id': next(self._ids),
+            'created_at': datetime.now(),
+            'page': tags.get('page'),
+            'role': tags.get('role'),
+            'duration_ms': duration_ms,
+            'functions': len(stats.stats),
+            'top_functions': [{'function': pstats.func_std_string(func), 'calls': nc, 'tottime_ms': tt * 1000, 'cumtime_ms': ct * 1000}
+                              for func, (cc, nc, tt, ct, callers) in top[:15]],
+            'pstats': marshal.dumps(stats.stats),
+        }
+        with self._lock:
+            self._profiles.append(entry)
+        return entry
+
+    def list(self):
+        """Profil terbaru lebih dulu."""
+        with self._lock:
+            return list(reversed(self._profiles))
+
+    def get(self, profile_id):
+        with self._lock:
+            return next((entry for entry in self._profiles if entry['id'] == profile_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._profiles.clear()
+
+
+profile_store = ProfileStore(enabled=os.environ.get(PROFILE_ENV_VAR) == "1")
+
+# Tag profil rerun yang sedang berjalan (None bila profiling tidak aktif)
+_current_tags = ContextVar('profile_tags', default=None)
+
+
+@contextmanager
+def profile_rerun(role=None):
+    """Membungkus satu eksekusi script dengan cProfile bila profiling aktif; hasilnya masuk profile_store."""
+    if not profile_store.enabled:
+        yield None
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError as e:
+        # Python 3.12+: hanya satu profiler aktif per proses, sesi lain sedang diprofil
+        print(f"Error memulai profiler: {e}")
+        yield None
+        return
+    tags = {'page': 'login' if role is None else 'main', 'role': role}
+    token = _current_tags.set(tags)
+    start = time.perf_counter()
+    try:
+        yield tags
+    finally:
+        profiler.disable()
+        _current_tags.reset(token)
+        profile_store.add(profiler, tags, (time.perf_counter() - start) * 1000)
+
+
+def tag_profile(**tags):
+    """Menambahkan tag (mis. page) ke profil rerun yang sedang berjalan, jika ada."""
+    current = _current_tags.get()
+    if current is not None:
+        current.update(tags)
+
+
+def profile_filename(entry, extension):
+    page = (entry['page'] or 'app').rsplit('.', 1)[-1]
+    return f"profile_{entry['id']}_{page}_{entry['created_at']:%Y%m%d_%H%M%S}.{extension}"
+
+
+def to_speedscope(entry):
+    """
+    Mengubah data pstats menjadi file speedscope (profil 'sampled' berbobot waktu).
+    cProfile hanya menyimpan pasangan pemanggil -> fungsi, jadi waktu setiap fungsi
+    dibagi ke pemanggilnya secara proporsional untuk membentuk stack.
+    """
+    stats = marshal.loads(entry['pstats'])
+    callees = {}
+    for func, (cc, nc, tt, ct, callers) in stats.items():
+        for caller, caller_stats in callers.items():
+            # Nilai per pemanggil: (cc, nc, tt, ct)
+            callees.setdefault(caller, []).append((func, caller_stats[3]))
+
+    frames, frame_index = [], {}
+    def frame_id(func):
+        if func not in frame_index:
+            filename, line, name = func
+            frame_index[func] = len(frames)
+            frames.append({'name': name, 'file': filename, 'line': line} if filename != '~' else {'name': name})
+        return frame_index[func]
+
+    roots = [func for func, values in stats.items() if not values[4]]
+    min_time = sum(stats[root][3] for root in roots) * MIN_BRANCH_SHARE
+    samples, weights = [], []
+    def walk(func, allotted, stack):
+        cc, nc, tt, ct, callers = stats[func]
+        share = allotted / ct if ct else 0
+        stack = stack + [frame_id(func)]
+        if tt * share > 0:
+            samples.append(stack)
+            weights.append(tt * share * 1000)
+        if len(stack) >= MAX_STACK_DEPTH:
+            return
+        for callee, edge_time in callees.get(func, []):
+            # Rekursi dilewati agar pohon tetap berhingga
+            if edge_time * share > min_time and frame_index.get(callee) not in stack:
+                walk(callee, edge_time * share, stack)
+
+    for root in roots:
+        walk(root, stats[root][3], [])
+
+    name = f"{entry['page'] or 'app'} ({entry['role'] or '-'}) {entry['created_at']:%Y-%m-%d %H:%M:%S}"
+    document = {
+        '$schema': "https://www.speedscope.app/file-format-schema.json",
+        'name': name,
+        'exporter': "ksac-dbms",
+        'activeProfileIndex': 0,
+        'shared': {'frames': frames},
+        'profiles': [{
+            'type': 'sampled', 'name': name, 'unit': 'milliseconds',
+            'startValue': 0, 'endValue': sum(weights),
+            'samples': samples, 'weights': weights,
+        }],
+    }
+    return json.dumps(document).encode('utf-8')
@@ -0,0 +1,109 @@
+import functools
+from contextvars import ContextVar
+
+
+class RequestCache:
+    """
+    Memo baca untuk satu kali eksekusi script (satu rerun). Dibuat di awal app.py
+    dan dibuang di akhir, sehingga pembacaan identik dalam satu rerun hanya
+    sampai ke database sekali. Nilai dibagi (tidak disalin) oleh semua pemanggil di rerun
+    yang sama dan harus diperlakukan read-only; salinan sudah dibuat sekali oleh QueryCache /
+    LiveCollection saat miss. Hasil pemanggilan yang gagal (request_failed) tidak dimemo.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+
+    def get_or_call(self, key, func):
+        if key in self._entries:
+            self.hits += 1
+            return self._entries[key]
+        self.misses += 1
+        failures = self.failures
+        value = func()
+        if self.failures == failures:
+            self._entries[key] = value
+        return value
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+
+# Setiap sesi Streamlit menjalankan script di thread sendiri; ContextVar memisahkan memo antar sesi
+_current = ContextVar('request_cache', default=None)
+
+
+def begin_request():
+    """Memulai memo baru untuk rerun ini (memo sebelumnya, jika ada, dibuang)."""
+    cache = RequestCache()
+    _current.set(cache)
+    return cache
+
+
+def end_request():
+    """Membuang memo rerun ini dan mengembalikan statistik hit/miss-nya."""
+    cache = _current.get()
+    _current.set(None)
+    return cache.stats() if cache else None
+
+
+def current_request_cache():
+    return _current.get()
+
+
+def request_failed():
+    """
+    Dipanggil di blok except fungsi baca sebelum mengembalikan nilai fallback ([] / None):
+    fallback itu (dan hasil fungsi memo yang memanggilnya) tidak dimemo untuk rerun ini.
+    """
+    cache = _current.get()
+    if cache is not None:
+        cache.failures += 1
+
+
+def _freeze(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+def request_memoized(func):
+    """
+    Decorator fungsi baca dengan argumen pertama _db. Di luar rerun (tanpa
+    begin_request, mis. thread background) fungsi dipanggil langsung.
+    """
+    @functools.wraps(func)
+    def wrapper(_db, *args, **kwargs):
+        cache = _current.get()
+        if cache is None:
+            return func(_db, *args, **kwargs)
+        try:
+            key = (func.__qualname__, id(_db), _freeze(args), _freeze(kwargs))
+            hash(key)
+        except TypeError:
+            return func(_db, *args, **kwargs)
+        return cache.get_or_call(key, lambda: func(_db, *args, **kwargs))
+    return wrapper
+
+
+def clears_request_cache(func):
+    """Decorator fungsi tulis: memo rerun dikosongkan agar pembacaan berikutnya melihat perubahan."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            cache = _current.get()
+            if cache is not None:
+                cache.clear()
+    return wrapper
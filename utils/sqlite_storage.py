@@ -0,0 +1,264 @@
+import json
+import re
+import secrets
+import sqlite3
+import string
+import threading
+from datetime import datetime
+from utils.storage import StorageBackend, Document, DELETE_FIELD, DESCENDING, DOCUMENT_ID, _without_deletes
+
+# Index per koleksi (berdasarkan pola query di utils/database.py)
+INDEXES = {
+    'performance_records': [
+        ('athlete_id', 'event_date'),
+        ('athlete_id', 'stroke', 'distance', 'event_date'),
+        ('athlete_id', 'stroke', 'distance', 'time_ms'),
+        ('stroke', 'distance', 'event_date'),
+        ('event_date',),
+    ],
+    'athletes': [('name',), ('uid',)],
+    'users': [('email',)],
+    # Tanpa prefix shard: SQLite tidak punya hotspot index, dan filter shard 'in' cukup dicek per baris
+    'activity_logs': [('timestamp',), ('user_id', 'timestamp'), ('user_role', 'timestamp'), ('user_id', 'user_role', 'timestamp')],
+    'activity_log_daily': [('date',)],
+    'spp_records': [('month',)],
+    'deleted_performance_records': [('deleted_at',)],
+}
+
+_DATETIME_PREFIX = "__dt__:"
+_DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
+_COLLECTION_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+_OPERATORS = {'==': '=', '!=': '!=', '<': '<', '<=': '<=', '>': '>', '>=': '>='}
+_ID_ALPHABET = string.ascii_letters + string.digits
+
+
+def _encode(value):
+    """Mengubah nilai Python ke bentuk JSON; datetime disimpan sebagai string ISO yang bisa diurutkan."""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone().replace(tzinfo=None)
+        return _DATETIME_PREFIX + value.strftime(_DATETIME_FORMAT)
+    if isinstance(value, dict):
+        return {k: _encode(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(v) for v in value]
+    return value
+
+
+def _decode(value):
+    if isinstance(value, str) and value.startswith(_DATETIME_PREFIX):
+        return datetime.strptime(value[len(_DATETIME_PREFIX):], _DATETIME_FORMAT)
+    if isinstance(value, dict):
+        return {k: _decode(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_decode(v) for v in value]
+    return value
+
+
+def _json_path(field):
+    return "$" + "".join('."' + part.replace('"', '\\"') + '"' for part in field.split('.'))
+
+
+def _field_expr(field):
+    if field == DOCUMENT_ID:
+        return "id"
+    # Ekspresi harus identik dengan ekspresi index agar SQLite memakai index tersebut
+    return f"json_extract(data, '{_json_path(field)}')"
+
+
+def _deep_merge(target, updates):
+    for key, value in updates.items():
+        if value is DELETE_FIELD:
+            target.pop(key, None)
+        elif isinstance(value, dict) and isinstance(target.get(key), dict):
+            _deep_merge(target[key], value)
+        else:
+            target[key] = _without_deletes(value)
+    return target
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    Backend tertanam (embedded) berbasis SQLite untuk klub yang self-hosted
+    dan untuk benchmark offline. Setiap koleksi disimpan sebagai tabel
+    (id, data JSON) dengan index ekspresi pada field yang sering di-query.
+    """
+    name = "sqlite"
+
+    def __init__(self, path=":memory:"):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.RLock()
+        self._tables = set()
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+
+    @property
+    def location(self):
+        # Database :memory: tidak punya lokasi yang bisa dipakai ulang antar proses
+        return None if self.path == ":memory:" else self.path
+
+    # --- Helper internal ---
+    def _table(self, collection):
+        if not _COLLECTION_NAME.match(collection):
+            raise ValueError(f"Nama koleksi tidak valid: {collection}")
+        if collection not in self._tables:
+            self._conn.execute(f'CREATE TABLE IF NOT EXISTS "{collection}" (id TEXT PRIMARY KEY, data TEXT NOT NULL)')
+            for fields in INDEXES.get(collection, []):
+                index_name = f"idx_{collection}_{'_'.join(fields)}"
+                columns = ", ".join(_field_expr(f) for f in fields)
+                self._conn.execute(f'CREATE INDEX IF NOT EXISTS "{index_name}" ON "{collection}" ({columns})')
+            self._tables.add(collection)
+        return f'"{collection}"'
+
+    def _read(self, table, doc_id):
+        row = self._conn.execute(f"SELECT data FROM {table} WHERE id = ?", (doc_id,)).fetchone()
+        return _decode(json.loads(row[0])) if row else None
+
+    def _write(self, table, doc_id, data):
+        self._conn.execute(
+            f"INSERT INTO {table} (id, data) VALUES (?, ?) ON CONFLICT(id) DO UPDATE SET data = excluded.data",
+            (doc_id, json.dumps(_encode(data)))
+        )
+
+    @staticmethod
+    def _where_clause(filters):
+        clauses, params = [], []
+        for field, op, value in filters or []:
+            expr = _field_expr(field)
+            if op in _OPERATORS:
+                clauses.append(f"{expr} {_OPERATORS[op]} ?")
+                params.append(_encode(value))
+            elif op in ('in', 'not-in'):
+                values = [_encode(v) for v in value]
+                placeholders = ", ".join("?" for _ in values) or "NULL"
+                clauses.append(f"{expr} {'IN' if op == 'in' else 'NOT IN'} ({placeholders})")
+                params.extend(values)
+            elif op == 'array_contains':
+                clauses.append(f"EXISTS (SELECT 1 FROM json_each(data, '{_json_path(field)}') WHERE value = ?)")
+                params.append(_encode(value))
+            else:
+                raise ValueError(f"Operator tidak didukung: {op}")
+        return clauses, params
+
+    @staticmethod
+    def _cursor_clause(order_by, start_after):
+        """Kondisi keyset: (f1 > v1) OR (f1 = v1 AND f2 > v2) OR ... sesuai arah urutan."""
+        alternatives, params = [], []
+        for i, (field, direction) in enumerate(order_by):
+            terms = []
+            for prev_field, _ in order_by[:i]:
+                terms.append(f"{_field_expr(prev_field)} = ?")
+                params.append(_encode(start_after[prev_field]))
+            terms.append(f"{_field_expr(field)} {'<' if direction == DESCENDING else '>'} ?")
+            params.append(_encode(start_after[field]))
+            alternatives.append("(" + " AND ".join(terms) + ")")
+        return "(" + " OR ".join(alternatives) + ")", params
+
+    # --- Implementasi StorageBackend ---
+    def get(self, collection, doc_id):
+        with self._lock:
+            return self._read(self._table(collection), doc_id)
+
+    def get_many(self, collection, doc_ids):
+        doc_ids = list(doc_ids)
+        if not doc_ids:
+            return {}
+        with self._lock:
+            table = self._table(collection)
+            placeholders = ", ".join("?" for _ in doc_ids)
+            rows = self._conn.execute(f"SELECT id, data FROM {table} WHERE id IN ({placeholders})", doc_ids).fetchall()
+        return {doc_id: _decode(json.loads(data)) for doc_id, data in rows}
+
+    def query(self, collection, filters=None, order_by=None, limit=None, start_after=None, select=None):
+        order_by = list(order_by or [])
+        with self._lock:
+            table = self._table(collection)
+            clauses, params = self._where_clause(filters)
+            order_terms = []
+            for field, direction in order_by:
+                # Sama seperti Firestore: dokumen tanpa field pengurut tidak ikut
+                clauses.append(f"{_field_expr(field)} IS NOT NULL")
+                order_terms.append(f"{_field_expr(field)} {'DESC' if direction == DESCENDING else 'ASC'}")
+            if start_after:
+                cursor_clause, cursor_params = self._cursor_clause(order_by, start_after)
+                clauses.append(cursor_clause)
+                params.extend(cursor_params)
+            columns = "data"
+            if select is not None:
+                # Pemangkasan kolom di SQLite: hanya field terpilih yang di-parse dari JSON
+                columns = "json_object(" + ", ".join(f"'{i}', {_field_expr(field)}" for i, field in enumerate(select)) + ")" if select else "'{}'"
+            sql = f"SELECT id, {columns} FROM {table}"
+            if clauses:
+                sql += " WHERE " + " AND ".join(clauses)
+            if order_terms:
+                sql += " ORDER BY " + ", ".join(order_terms)
+            if limit:
+                sql += " LIMIT ?"
+                params.append(int(limit))
+            rows = self._conn.execute(sql, params).fetchall()
+        if select is None:
+            return [Document(doc_id, _decode(json.loads(data))) for doc_id, data in rows]
+        select = list(select)
+        docs = []
+        for doc_id, values in rows:
+            values = json.loads(values)
+            data = {}
+            for i, field in enumerate(select):
+                # json_extract memberi NULL untuk field yang tidak ada; seperti select() Firestore, field itu tidak ikut
+                if values[str(i)] is not None:
+                    *parents, leaf = field.split('.')
+                    target = data
+                    for part in parents:
+                        target = target.setdefault(part, {})
+                    target[leaf] = _decode(values[str(i)])
+            docs.append(Document(doc_id, data))
+        return docs
+
+    def add(self, collection, data):
+        doc_id = "".join(secrets.choice(_ID_ALPHABET) for _ in range(20))
+        self.set(collection, doc_id, data)
+        return doc_id
+
+    def batch_write(self, operations):
+        """Semua operasi dijalankan dalam satu transaksi SQLite."""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                doc_ids = super().batch_write(operations)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return doc_ids
+
+    def set(self, collection, doc_id, data, merge=False):
+        with self._lock:
+            table = self._table(collection)
+            if merge:
+                data = _deep_merge(self._read(table, doc_id) or {}, data)
+            else:
+                data = _without_deletes(data)
+            self._write(table, doc_id, data)
+
+    def update(self, collection, doc_id, data):
+        with self._lock:
+            table = self._table(collection)
+            current = self._read(table, doc_id)
+            if current is None:
+                raise KeyError(f"Dokumen {collection}/{doc_id} tidak ditemukan.")
+            for field_path, value in data.items():
+                *parents, leaf = field_path.split('.')
+                target = current
+                for part in parents:
+                    target = target.setdefault(part, {})
+                if value is DELETE_FIELD:
+                    target.pop(leaf, None)
+                else:
+                    target[leaf] = _without_deletes(value)
+            self._write(table, doc_id, current)
+
+    def delete(self, collection, doc_id):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self._table(collection)} WHERE id = ?", (doc_id,))
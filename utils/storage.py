@@ -0,0 +1,270 @@
+import copy
+import threading
+from collections import namedtuple
+from google.cloud.firestore_v1.base_query import FieldFilter
+from google.cloud.firestore_v1 import DELETE_FIELD as FIRESTORE_DELETE_FIELD
+
+# Dokumen hasil baca: id dokumen + isi (dict)
+Document = namedtuple('Document', ['id', 'data'])
+# Perubahan dokumen dari watch(): type = 'ADDED' | 'MODIFIED' | 'REMOVED'
+Change = namedtuple('Change', ['type', 'document'])
+
+
+class _DeleteField:
+    """Penanda untuk menghapus sebuah field pada update()."""
+    def __repr__(self):
+        return "DELETE_FIELD"
+
+    # Penanda harus tetap singleton agar pengecekan `is DELETE_FIELD` berlaku setelah disalin
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+DELETE_FIELD = _DeleteField()
+
+
+def _without_deletes(value):
+    """Salinan dalam nilai tanpa DELETE_FIELD di map bersarang (seperti set/update Firestore)."""
+    if isinstance(value, dict):
+        return {k: _without_deletes(v) for k, v in value.items() if v is not DELETE_FIELD}
+    if isinstance(value, list):
+        return [_without_deletes(v) for v in value]
+    return copy.deepcopy(value)
+
+ASCENDING = "ASCENDING"
+DESCENDING = "DESCENDING"
+# Nama field khusus untuk id dokumen (dipakai di order_by dan cursor)
+DOCUMENT_ID = "__name__"
+# Jumlah maksimum operasi dalam satu WriteBatch Firestore
+MAX_BATCH_SIZE = 500
+
+
+def project_fields(data, fields):
+    """Salinan dangkal data yang hanya berisi fields (path bertitik menghasilkan map bersarang)."""
+    if fields is None:
+        return data
+    projected = {}
+    for field in fields:
+        *parents, leaf = field.split('.')
+        source = data
+        for part in parents:
+            source = source.get(part) if isinstance(source, dict) else None
+        if not isinstance(source, dict) or leaf not in source:
+            continue
+        target = projected
+        for part in parents:
+            target = target.setdefault(part, {})
+        target[leaf] = source[leaf]
+    return projected
+
+
+class StorageBackend:
+    """
+    Antarmuka penyimpanan dokumen yang dipakai semua fungsi di utils/database.py.
+    Setiap backend (Firestore, SQLite) mengimplementasikan operasi di bawah ini.
+
+    - filters  : list tuple (field, op, value), op seperti Firestore ('==', '<', 'in', ...)
+    - order_by : list tuple (field, ASCENDING/DESCENDING)
+    - start_after : dict {field: nilai} untuk setiap field di order_by (cursor/keyset)
+    - select   : list field (boleh bertitik) yang dikembalikan, seperti select() Firestore;
+                 None = seluruh dokumen. Field yang tidak ada di dokumen tidak ikut.
+    """
+    name = "base"
+    # Identitas lokasi data (mis. path file / project id) untuk cache lokal; None = tidak dipersist
+    location = None
+    # True jika watch() didorong server (listener); False = hanya polling, LiveCollection tidak dipakai
+    live_updates = False
+
+    def get(self, collection, doc_id):
+        """Mengembalikan isi dokumen (dict) atau None jika tidak ada."""
+        raise NotImplementedError
+
+    def query(self, collection, filters=None, order_by=None, limit=None, start_after=None, select=None):
+        """Mengembalikan list Document yang cocok dengan filter."""
+        raise NotImplementedError
+
+    def get_many(self, collection, doc_ids):
+        """Mengambil banyak dokumen sekaligus; mengembalikan dict {id: data} (yang tidak ada dilewati)."""
+        docs = {}
+        for doc_id in doc_ids:
+            data = self.get(collection, doc_id)
+            if data is not None:
+                docs[doc_id] = data
+        return docs
+
+    def add(self, collection, data):
+        """Menambahkan dokumen dengan id otomatis, mengembalikan id baru."""
+        raise NotImplementedError
+
+    def set(self, collection, doc_id, data, merge=False):
+        raise NotImplementedError
+
+    def update(self, collection, doc_id, data):
+        """Update sebagian field; mendukung path bertitik dan DELETE_FIELD."""
+        raise NotImplementedError
+
+    def delete(self, collection, doc_id):
+        raise NotImplementedError
+
+    def batch_write(self, operations):
+        """
+        Menjalankan banyak operasi tulis sekaligus. operations berisi tuple
+        (op, collection, doc_id, data) dengan op 'add' (doc_id None), 'set',
+        'update' atau 'delete' (data None). Mengembalikan list id dokumen.
+        Implementasi default: satu per satu.
+        """
+        doc_ids = []
+        for op, collection, doc_id, data in operations:
+            if op == 'add':
+                doc_id = self.add(collection, data)
+            elif op == 'set':
+                self.set(collection, doc_id, data)
+            elif op == 'update':
+                self.update(collection, doc_id, data)
+            elif op == 'delete':
+                self.delete(collection, doc_id)
+            else:
+                raise ValueError(f"Operasi tidak dikenal: {op}")
+            doc_ids.append(doc_id)
+        return doc_ids
+
+    def watch(self, collection, callback, interval=1.0):
+        """
+        Memanggil callback(list Change) setiap ada perubahan dokumen di koleksi.
+        Panggilan pertama berisi seluruh dokumen sebagai 'ADDED'. Mengembalikan
+        objek dengan method unsubscribe() dan property is_active (False jika listener
+        berhenti, mis. karena error). Implementasi default: polling berkala.
+        """
+        return _PollingWatch(self, collection, callback, interval)
+
+
+class _PollingWatch:
+    """Fallback watch untuk backend tanpa listener: polling lalu kirim selisihnya saja."""
+
+    def __init__(self, backend, collection, callback, interval):
+        self._backend = backend
+        self._collection = collection
+        self._callback = callback
+        self._interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"watch-{collection}", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        known = None
+        while not self._stop.is_set():
+            try:
+                current = {doc.id: doc.data for doc in self._backend.query(self._collection)}
+                previous = known or {}
+                changes = [Change('REMOVED', Document(doc_id, data)) for doc_id, data in previous.items() if doc_id not in current]
+                for doc_id, data in current.items():
+                    if doc_id not in previous:
+                        changes.append(Change('ADDED', Document(doc_id, data)))
+                    elif previous[doc_id] != data:
+                        changes.append(Change('MODIFIED', Document(doc_id, data)))
+                if changes or known is None:
+                    self._callback(changes)
+                known = current
+            except Exception as e:
+                print(f"Error polling {self._collection}: {e}")
+            self._stop.wait(self._interval)
+
+    @property
+    def is_active(self):
+        return not self._stop.is_set()
+
+    def unsubscribe(self):
+        self._stop.set()
+
+
+# --- BACKEND FIRESTORE ---
+class FirestoreBackend(StorageBackend):
+    """Backend default: meneruskan setiap operasi ke klien Firestore."""
+    name = "firestore"
+    live_updates = True
+
+    def __init__(self, client):
+        self.client = client
+
+    @property
+    def location(self):
+        return self.client.project
+
+    @classmethod
+    def _to_firestore(cls, data):
+        if data is DELETE_FIELD:
+            return FIRESTORE_DELETE_FIELD
+        if isinstance(data, dict):
+            return {k: cls._to_firestore(v) for k, v in data.items()}
+        return data
+
+    def get(self, collection, doc_id):
+        doc = self.client.collection(collection).document(doc_id).get()
+        return doc.to_dict() if doc.exists else None
+
+    def get_many(self, collection, doc_ids):
+        """Satu panggilan get_all untuk semua dokumen."""
+        collection_ref = self.client.collection(collection)
+        snapshots = self.client.get_all([collection_ref.document(doc_id) for doc_id in doc_ids])
+        return {snapshot.id: snapshot.to_dict() for snapshot in snapshots if snapshot.exists}
+
+    def query(self, collection, filters=None, order_by=None, limit=None, start_after=None, select=None):
+        query = self.client.collection(collection)
+        if select is not None:
+            # Projection di server: hanya field ini yang dikirim lewat jaringan
+            query = query.select(list(select))
+        for field, op, value in filters or []:
+            query = query.where(filter=FieldFilter(field, op, value))
+        for field, direction in order_by or []:
+            query = query.order_by(field, direction=direction)
+        if start_after:
+            query = query.start_after(dict(start_after))
+        if limit:
+            query = query.limit(limit)
+        return [Document(doc.id, doc.to_dict()) for doc in query.stream()]
+
+    def add(self, collection, data):
+        _, doc_ref = self.client.collection(collection).add(data)
+        return doc_ref.id
+
+    def set(self, collection, doc_id, data, merge=False):
+        self.client.collection(collection).document(doc_id).set(self._to_firestore(data), merge=merge)
+
+    def update(self, collection, doc_id, data):
+        self.client.collection(collection).document(doc_id).update(self._to_firestore(data))
+
+    def delete(self, collection, doc_id):
+        self.client.collection(collection).document(doc_id).delete()
+
+    def batch_write(self, operations):
+        """WriteBatch Firestore, dipecah per MAX_BATCH_SIZE operasi (batas Firestore: 500)."""
+        doc_ids = []
+        operations = list(operations)
+        for start in range(0, len(operations), MAX_BATCH_SIZE):
+            batch = self.client.batch()
+            for op, collection, doc_id, data in operations[start:start + MAX_BATCH_SIZE]:
+                collection_ref = self.client.collection(collection)
+                doc_ref = collection_ref.document() if op == 'add' else collection_ref.document(doc_id)
+                if op in ('add', 'set'):
+                    batch.set(doc_ref, self._to_firestore(data))
+                elif op == 'update':
+                    batch.update(doc_ref, self._to_firestore(data))
+                elif op == 'delete':
+                    batch.delete(doc_ref)
+                else:
+                    raise ValueError(f"Operasi tidak dikenal: {op}")
+                doc_ids.append(doc_ref.id)
+            batch.commit()
+        return doc_ids
+
+    def watch(self, collection, callback, interval=None):
+        """
+        Listener on_snapshot Firestore: hanya perubahan dokumen yang dikirim. Watch yang
+        dikembalikan menjadi is_active=False jika stream berhenti karena error.
+        """
+        def _on_snapshot(docs, changes, read_time):
+            callback([Change(change.type.name, Document(change.document.id, change.document.to_dict())) for change in changes])
+        return self.client.collection(collection).on_snapshot(_on_snapshot)
@@ -1,6 +1,14 @@
 import streamlit as st
 import pandas as pd
-from utils.database import get_logs
+from utils.database import get_logs, get_user_options, get_log_summaries, archive_old_logs, log_shard_migration_pending, migrate_log_shards
+from utils.log_retention import RETENTION_DAYS, ARCHIVE_FORMATS
+
+ROLES = ["Semua Peran", "admin", "coach", "athlete", "parent"]
+PAGE_SIZE_OPTIONS = [25, 50, 100]
+LOG_FIELDS = ['timestamp', 'user_name', 'user_role', 'action']
+
+def _reset_log_pages():
+    st.session_state.log_page_cursors = [None]
 
 def show_page(db, user_profile):
     if user_profile.get('role') != 'admin':
@@ -12,15 +20,61 @@ def show_page(db, user_profile):
         st.rerun()
 
     st.header("📜 Log Aktivitas Pengguna")
-    st.caption("Menampilkan 100 aktivitas terbaru di sistem.")
+    st.caption("Aktivitas terbaru lebih dulu. Setiap halaman hanya memuat baris yang ditampilkan.")
+
+    if log_shard_migration_pending(db):
+        st.warning("Log yang ditulis sebelum sharding belum tampil dan belum ikut retensi. Jalankan migrasi sekali.")
+        if st.button("Migrasi Shard Log Lama"):
+            with st.spinner("Memberi shard pada log lama..."):
+                migrated = migrate_log_shards(db, user_profile)
+            if migrated is not None:
+                _reset_log_pages()
+                st.success(f"{migrated} log lama dimigrasi.")
+
+    with st.expander("🗄️ Retensi & Arsip Log"):
+        st.caption("Log yang lebih tua dari batas retensi diringkas per hari, disimpan ke file arsip terkompresi, lalu dihapus dari database.")
+        col_days, col_format = st.columns(2)
+        retention_days = col_days.number_input("Simpan log mentah (hari)", min_value=1, value=RETENTION_DAYS, step=1)
+        archive_format = col_format.radio("Format Arsip", ARCHIVE_FORMATS, horizontal=True)
+        if st.button("Jalankan Retensi Sekarang"):
+            with st.spinner("Mengarsip log lama..."):
+                result = archive_old_logs(db, user_profile, retention_days=int(retention_days), archive_format=archive_format)
+            if result is not None:
+                _reset_log_pages()
+                if result['archived']:
+                    st.success(f"{result['archived']} log dari {len(result['days'])} hari diarsip ke {len(result['files'])} file.")
+                else:
+                    st.info(f"Tidak ada log sebelum {result['cutoff']:%d %b %Y}.")
+
+    # --- Filter ---
+    users = get_user_options(db)
+    user_options = {"": "Semua Pengguna", **{u['uid']: f"{u.get('displayName', u['uid'])} ({u.get('role', '-')})" for u in users}}
+    col1, col2, col3, col4 = st.columns([3, 2, 3, 1.5])
+    selected_user_id = col1.selectbox("Pengguna", options=list(user_options.keys()), format_func=lambda x: user_options.get(x, x),
+                                      key="log_filter_user", on_change=_reset_log_pages)
+    selected_role = col2.selectbox("Peran", ROLES, key="log_filter_role", on_change=_reset_log_pages)
+    date_range = col3.date_input("Rentang Tanggal", value=(), key="log_filter_dates", on_change=_reset_log_pages)
+    page_size = col4.selectbox("Baris", PAGE_SIZE_OPTIONS, key="log_page_size", on_change=_reset_log_pages)
 
-    logs = get_logs(db, limit=100)
+    start_date = date_range[0] if len(date_range) > 0 else None
+    end_date = date_range[1] if len(date_range) > 1 else start_date
+
+    # Pagination berbasis cursor (timestamp, id): halaman lama tidak perlu dibaca ulang
+    if 'log_page_cursors' not in st.session_state:
+        _reset_log_pages()
+    cursor = st.session_state.log_page_cursors[-1]
+    logs = get_logs(db, limit=page_size + 1, fields=LOG_FIELDS, user_id=selected_user_id or None,
+                    user_role=selected_role if selected_role != "Semua Peran" else None,
+                    start_date=start_date, end_date=end_date, start_after=cursor)
+    has_next_page = len(logs) > page_size
+    logs = logs[:page_size]
+    current_page = len(st.session_state.log_page_cursors)
 
     if not logs:
-        st.info("Belum ada aktivitas yang tercatat.")
+        st.info("Belum ada aktivitas yang tercatat." if current_page == 1 else "Tidak ada aktivitas lain yang cocok dengan filter.")
     else:
         df_logs = pd.DataFrame(logs)
-        
+
         # Format kolom untuk tampilan yang lebih baik
         df_logs['Waktu'] = pd.to_datetime(df_logs['timestamp']).dt.strftime('%d %b %Y, %H:%M:%S')
         df_logs = df_logs.rename(columns={
@@ -34,3 +88,35 @@ def show_page(db, user_profile):
             use_container_width=True,
             hide_index=True
         )
+
+    _, nav_col, _ = st.columns([3, 2.5, 3])
+    with nav_col:
+        cols = st.columns([1, 1, 1], gap="small")
+        with cols[0]:
+            st.button("◀", use_container_width=True, disabled=(current_page <= 1), key="log_prev_button",
+                      on_click=lambda: st.session_state.log_page_cursors.pop())
+        with cols[1]:
+            st.markdown(f"""<div style="background-color: var(--secondary-background-color); border-radius: 50%; width: 40px; height: 40px; display: flex; align-items: center; justify-content: center; font-weight: bold; font-size: 1.2em; margin: auto;">{current_page}</div>""", unsafe_allow_html=True)
+        with cols[2]:
+            next_cursor = (logs[-1]['timestamp'], logs[-1]['id']) if logs else None
+            st.button("▶", use_container_width=True, disabled=not has_next_page, key="log_next_button",
+                      on_click=st.session_state.log_page_cursors.append, args=(next_cursor,))
+
+    # --- Ringkasan harian log yang sudah diarsip ---
+    st.divider()
+    st.subheader("Ringkasan Harian (Log Terarsip)")
+    summaries = get_log_summaries(db, start_date, end_date)
+    if not summaries:
+        st.info("Belum ada log yang diarsip pada rentang ini.")
+    else:
+        df_summary = pd.DataFrame([{
+            'Tanggal': pd.to_datetime(summary['date']).strftime('%d %b %Y'),
+            'Total': summary.get('total', 0),
+            **{f"Peran: {role}": count for role, count in summary.get('by_role', {}).items()},
+            'Aktivitas Terbanyak': max(summary.get('by_action', {'-': 0}).items(), key=lambda item: item[1])[0],
+            'Pengguna Aktif': len(summary.get('by_user', {})),
+        } for summary in summaries])
+        role_columns = sorted(c for c in df_summary.columns if c.startswith("Peran: "))
+        df_summary[role_columns] = df_summary[role_columns].fillna(0).astype(int)
+        df_summary = df_summary[['Tanggal', 'Total', *role_columns, 'Aktivitas Terbanyak', 'Pengguna Aktif']]
+        st.dataframe(df_summary, use_container_width=True, hide_index=True)
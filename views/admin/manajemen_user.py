@@ -3,6 +3,10 @@ import pandas as pd
 from utils.database import get_all_users, create_user_account, update_user_profile, delete_user_account, load_athletes, get_unlinked_athletes
 import re
 
+# Field yang dipakai tabel pengguna, dialog edit, dan pilihan atlet di halaman ini
+USER_FIELDS = ['displayName', 'email', 'role', 'child_athlete_ids']
+ATHLETE_FIELDS = ['name', 'uid']
+
 def show_page(db, auth, user_profile):
     if user_profile.get('role') != 'admin':
         st.error("Halaman ini hanya untuk Administrator.")
@@ -29,7 +33,7 @@ def show_page(db, auth, user_profile):
 
             if role == 'parent':
                 st.subheader("Hubungkan ke Atlet (Anak)")
-                athletes = load_athletes(db)
+                athletes = load_athletes(db, fields=ATHLETE_FIELDS)
                 if not athletes:
                     st.warning("Tidak ada data atlet untuk dihubungkan.")
                 else:
@@ -79,7 +83,7 @@ def show_page(db, auth, user_profile):
 
     st.divider()
     st.subheader("Daftar Pengguna Terdaftar")
-    all_users = get_all_users(db)
+    all_users = get_all_users(db, fields=USER_FIELDS)
 
     if not all_users:
         st.info("Belum ada pengguna terdaftar.")
@@ -146,13 +150,13 @@ def edit_dialog(db, user_data, actor_profile):
         new_linked_athlete_id = None
 
         if new_role == 'parent':
-            athletes = load_athletes(db)
+            athletes = load_athletes(db, fields=ATHLETE_FIELDS)
             athlete_options = {a['id']: a['name'] for a in athletes}
             new_child_ids = st.multiselect("Hubungkan ke Anak (Atlet)", options=list(athlete_options.keys()), default=new_child_ids, format_func=lambda x: athlete_options.get(x, ""))
 
         elif new_role == 'athlete':
             unlinked_athletes = get_unlinked_athletes(db)
-            currently_linked_athlete = next((a for a in load_athletes(db) if a.get('uid') == user_data['uid']), None)
+            currently_linked_athlete = next((a for a in load_athletes(db, fields=ATHLETE_FIELDS) if a.get('uid') == user_data['uid']), None)
             
             athlete_options_list = unlinked_athletes
             if currently_linked_athlete:
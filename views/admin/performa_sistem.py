@@ -0,0 +1,128 @@
+import streamlit as st
+import pandas as pd
+from utils.monitoring import monitor, RING_BUFFER_SIZE
+from utils.log_writer import get_log_writer
+from utils.metering import load_daily_usage
+from utils.profiling import profile_store, profile_filename, to_speedscope, MAX_PROFILES, PROFILE_ENV_VAR
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+SUMMARY_COLUMNS = {
+    'name': 'Nama',
+    'count': 'Sampel',
+    'p50_ms': 'p50 (ms)',
+    'p95_ms': 'p95 (ms)',
+    'p99_ms': 'p99 (ms)',
+    'max_ms': 'Maks (ms)',
+    'avg_reads': 'Rata-rata Baca',
+    'avg_writes': 'Rata-rata Tulis',
+    'avg_deletes': 'Rata-rata Hapus',
+}
+
+def show_summary(kind, empty_message):
+    rows = monitor.summary(kind)
+    if not rows:
+        st.info(empty_message)
+        return
+    df = pd.DataFrame(rows).rename(columns=SUMMARY_COLUMNS).round(1)
+    st.dataframe(df, use_container_width=True, hide_index=True)
+
+def usage_table(counts_by_name, budget_exceeded=None):
+    df = pd.DataFrame([{'Nama': name, 'Baca': counts['reads'], 'Tulis': counts['writes'], 'Hapus': counts['deletes']}
+                       for name, counts in counts_by_name.items()])
+    if budget_exceeded is not None:
+        df['Melewati Budget'] = df['Nama'].map(budget_exceeded).fillna(0).astype(int)
+    return df.sort_values('Baca', ascending=False)
+
+def show_usage(db):
+    usage = db.meter.today()
+    ctx = get_script_run_ctx()
+    session_usage = db.meter.session_counts(ctx.session_id) if ctx else {'reads': 0, 'writes': 0, 'deletes': 0}
+    all_processes = load_daily_usage(db, usage['date'])
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Baca Hari Ini (proses ini)", usage['totals']['reads'])
+    col2.metric("Tulis / Hapus Hari Ini", f"{usage['totals']['writes']} / {usage['totals']['deletes']}")
+    col3.metric("Baca Hari Ini (semua proses)", all_processes['totals']['reads'], help="Dari koleksi usage_daily, diperbarui setiap menit.")
+    col4.metric("Baca Sesi Ini", session_usage['reads'])
+    if db.meter.page_read_budget is not None or db.meter.page_budgets:
+        st.caption(f"Budget baca per eksekusi halaman: {db.meter.page_read_budget if db.meter.page_read_budget is not None else '-'}")
+
+    if usage['pages']:
+        col_pages, col_functions = st.columns(2)
+        with col_pages:
+            st.write("**Per Halaman**")
+            st.dataframe(usage_table(usage['pages'], usage['budget_exceeded']), use_container_width=True, hide_index=True)
+        with col_functions:
+            st.write("**Per Fungsi**")
+            st.dataframe(usage_table(usage['functions']), use_container_width=True, hide_index=True)
+
+def _toggle_profiling():
+    profile_store.enabled = st.session_state.profiling_enabled
+
+def show_profiles():
+    st.toggle("Profil setiap rerun (semua pengguna)", value=profile_store.enabled, key="profiling_enabled",
+              on_change=_toggle_profiling, help=f"Bisa juga diaktifkan saat start dengan {PROFILE_ENV_VAR}=1. Menambah overhead selama aktif.")
+    profiles = profile_store.list()
+    if not profiles:
+        st.info(f"Belum ada profil. Hanya {MAX_PROFILES} profil terakhir yang disimpan.")
+        return
+
+    df = pd.DataFrame([{
+        'ID': entry['id'], 'Waktu': entry['created_at'].strftime('%H:%M:%S'), 'Halaman': entry['page'],
+        'Role': entry['role'] or '-', 'Durasi (ms)': round(entry['duration_ms'], 1), 'Jumlah Fungsi': entry['functions'],
+    } for entry in profiles])
+    st.dataframe(df, use_container_width=True, hide_index=True)
+
+    profile_ids = [entry['id'] for entry in profiles]
+    selected_id = st.selectbox("Pilih Profil", profile_ids, format_func=lambda profile_id: f"#{profile_id} - {df.loc[df['ID'] == profile_id, 'Halaman'].iloc[0]}")
+    entry = profile_store.get(selected_id)
+    if entry is None:
+        st.warning("Profil sudah terbuang dari penyimpanan.")
+        return
+
+    top = pd.DataFrame(entry['top_functions']).rename(columns={
+        'function': 'Fungsi', 'calls': 'Panggilan', 'tottime_ms': 'Waktu Sendiri (ms)', 'cumtime_ms': 'Waktu Kumulatif (ms)'
+    }).round(2)
+    st.dataframe(top, use_container_width=True, hide_index=True)
+
+    col1, col2 = st.columns(2)
+    col1.download_button("📥 Unduh .pstats", data=entry['pstats'], file_name=profile_filename(entry, 'pstats'),
+                         mime="application/octet-stream", use_container_width=True)
+    col2.download_button("📥 Unduh Speedscope", data=to_speedscope(entry), file_name=profile_filename(entry, 'speedscope.json'),
+                         mime="application/json", use_container_width=True)
+
+def show_page(db, user_profile):
+    if user_profile.get('role') != 'admin':
+        st.error("Halaman ini hanya untuk Administrator.")
+        st.stop()
+
+    if st.button("◀ Kembali ke Halaman Utama"):
+        st.session_state.page_to_show = 'main'
+        st.rerun()
+
+    st.header("⏱️ Performa Sistem")
+    st.caption(f"Persentil durasi dari {RING_BUFFER_SIZE} eksekusi terakhir per halaman dan per fungsi database, untuk semua sesi di server ini. Diurutkan dari p95 terlambat.")
+
+    st.subheader("Halaman")
+    show_summary('page', "Belum ada halaman yang tercatat.")
+
+    st.subheader("Fungsi Database")
+    show_summary('function', "Belum ada fungsi database yang tercatat.")
+
+    st.subheader("Pemakaian Dokumen")
+    show_usage(db)
+
+    st.subheader("Cache & Log")
+    col1, col2, col3 = st.columns(3)
+    cache_stats = st.session_state.get('request_cache_stats') or {}
+    col1.metric("Memo Rerun Terakhir (hit / miss)", f"{cache_stats.get('hits', 0)} / {cache_stats.get('misses', 0)}")
+    log_stats = get_log_writer(db).stats()
+    col2.metric("Log Ditulis", log_stats['written'], help=f"{log_stats['batches']} batch")
+    col3.metric("Log Antre / Dibuang", f"{log_stats['queued']} / {log_stats['dropped']}")
+
+    st.subheader("Profiling")
+    show_profiles()
+
+    if st.button("🔄 Reset Statistik"):
+        monitor.reset()
+        st.rerun()
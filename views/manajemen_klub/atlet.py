@@ -86,11 +86,10 @@ def show_page(db, user_profile):
         st.info("Belum ada atlet terdaftar.")
         st.stop()
 
-    for a in athlete_list:
-        a['age'] = calculate_age_by_year(a.get('date_of_birth'))
-        a['ku'] = calculate_ku(a['age'])
-
+    # Daftar dari load_athletes dibagi dalam satu rerun, jadi kolom turunan ditambahkan ke salinan
     df_athletes = pd.DataFrame(athlete_list)
+    df_athletes['age'] = [calculate_age_by_year(a.get('date_of_birth')) for a in athlete_list]
+    df_athletes['ku'] = df_athletes['age'].map(calculate_ku)
 
     col1, col2, col3 = st.columns(3)
     search_query = col1.text_input("Cari Nama Atlet", placeholder="Ketik nama untuk mencari...", key="atlet_search_query")
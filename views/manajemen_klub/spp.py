@@ -1,12 +1,72 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-from utils.database import load_athletes, load_spp_for_month, update_spp_payment
+from utils.database import load_athletes, load_spp_for_month, load_spp_range, update_spp_payment, migrate_spp_payments
 
 # --- Variabel Global ---
 MONTHS = ["Januari", "Februari", "Maret", "April", "Mei", "Juni", "Juli", "Agustus", "September", "Oktober", "November", "Desember"]
 DEFAULT_SPP_AMOUNT = 250000
 
+def build_spp_frame(athletes, spp_records):
+    """Menggabungkan daftar atlet dengan status pembayaran satu bulan menjadi DataFrame."""
+    spp_data = []
+    for athlete in athletes:
+        status_info = spp_records.get(athlete['id'], {})
+        status = status_info.get('status', 'Belum Lunas')
+        amount = status_info.get('amount', 0)
+        spp_data.append({
+            'id': athlete['id'],
+            'name': athlete['name'],
+            'level': athlete['level'],
+            'status': status,
+            'amount': amount,
+            'details': status_info
+        })
+    return pd.DataFrame(spp_data)
+
+def month_keys(start, end):
+    """Daftar bulan 'YYYY-MM' dari start sampai end (inklusif)."""
+    return [period.strftime('%Y-%m') for period in pd.period_range(start, end, freq='M')]
+
+def month_label(month_key):
+    return f"{MONTHS[int(month_key[5:]) - 1][:3]} {month_key[:4]}"
+
+def build_spp_pivot(athletes, payments, months):
+    """Matriks atlet × bulan berisi nominal yang dibayar (NaN = belum lunas), tanpa loop per atlet."""
+    df_payments = pd.DataFrame(payments, columns=['athlete_id', 'month', 'status', 'amount'])
+    paid = df_payments[df_payments['status'] == 'Lunas']
+    pivot = paid.pivot_table(index='athlete_id', columns='month', values='amount', aggfunc='sum')
+    return pivot.reindex(index=pd.Index([a['id'] for a in athletes], name='athlete_id'), columns=pd.Index(months, name='month'))
+
+def arrears_report(athletes, pivot, spp_amount=DEFAULT_SPP_AMOUNT):
+    """
+    Tunggakan per atlet dari matriks build_spp_pivot: bulan belum lunas sejak bulan atlet
+    terdaftar (created_at) dan total yang belum dibayar, diurutkan dari tunggakan terbesar.
+    """
+    df_athletes = pd.DataFrame(athletes).reindex(columns=['id', 'name', 'level', 'created_at']).set_index('id')
+    joined = pd.to_datetime(df_athletes['created_at'], utc=True, errors='coerce').dt.strftime('%Y-%m').fillna('')
+    unpaid = pivot.isna() & (pivot.columns.to_numpy()[None, :] >= joined.reindex(pivot.index).to_numpy()[:, None])
+    unpaid_months = unpaid.stack()
+    unpaid_months = unpaid_months[unpaid_months].reset_index()
+    report = unpaid_months.groupby('athlete_id').agg(months=('month', list), count=('month', 'size'))
+    report = report.join(df_athletes[['name', 'level']])
+    # Level bercampur angka dan teks ("Pemula"), jadi ditampilkan sebagai teks
+    report['level'] = report['level'].astype(str)
+    report['outstanding'] = report['count'] * spp_amount
+    report['months'] = report['months'].map(lambda keys: ", ".join(month_label(k) for k in keys))
+    return report.reset_index().sort_values(['outstanding', 'name'], ascending=[False, True])[['athlete_id', 'name', 'level', 'months', 'count', 'outstanding']]
+
+def filter_spp_frame(df_spp, search_query, level_filter, status_filter):
+    df_filtered = df_spp.copy()
+    if search_query:
+        df_filtered = df_filtered[df_filtered['name'].str.contains(search_query, case=False, na=False)]
+    if level_filter != "Semua Level":
+        # --- PERBAIKAN DI SINI: Membandingkan sebagai string ---
+        df_filtered = df_filtered[df_filtered['level'].astype(str) == str(level_filter)]
+    if status_filter != "Semua":
+        df_filtered = df_filtered[df_filtered['status'] == status_filter]
+    return df_filtered
+
 def show_page(db, user_profile):
     if user_profile.get('role') not in ['coach', 'admin']:
         st.error("Anda tidak memiliki izin untuk mengakses halaman ini.")
@@ -14,7 +74,7 @@ def show_page(db, user_profile):
         
     st.header("Manajemen SPP")
     
-    athletes = load_athletes(db)
+    athletes = load_athletes(db, fields=['name', 'level', 'created_at'])
     if not athletes:
         st.warning("Silahkan input data atlet dulu")
         st.stop()
@@ -33,21 +93,7 @@ def show_page(db, user_profile):
     
     spp_records = load_spp_for_month(db, selected_year, selected_month_num)
 
-    spp_data = []
-    for athlete in athletes:
-        status_info = spp_records.get(athlete['id'], {})
-        status = status_info.get('status', 'Belum Lunas')
-        amount = status_info.get('amount', 0)
-        spp_data.append({
-            'id': athlete['id'],
-            'name': athlete['name'],
-            'level': athlete['level'],
-            'status': status,
-            'amount': amount,
-            'details': status_info
-        })
-
-    df_spp = pd.DataFrame(spp_data)
+    df_spp = build_spp_frame(athletes, spp_records)
 
     # --- Dashboard Ringkasan ---
     st.divider()
@@ -82,14 +128,7 @@ def show_page(db, user_profile):
     status_filter = col_status.selectbox("Filter Status", ["Semua", "Lunas", "Belum Lunas"])
 
     # Terapkan filter pada dataframe
-    df_filtered = df_spp.copy()
-    if search_query:
-        df_filtered = df_filtered[df_filtered['name'].str.contains(search_query, case=False, na=False)]
-    if level_filter != "Semua Level":
-        # --- PERBAIKAN DI SINI: Membandingkan sebagai string ---
-        df_filtered = df_filtered[df_filtered['level'].astype(str) == str(level_filter)]
-    if status_filter != "Semua":
-        df_filtered = df_filtered[df_filtered['status'] == status_filter]
+    df_filtered = filter_spp_frame(df_spp, search_query, level_filter, status_filter)
 
     if df_filtered.empty:
         st.info("Tidak ada data yang cocok dengan filter yang dipilih.")
@@ -199,6 +238,65 @@ def show_page(db, user_profile):
                 use_container_width=True
             )
 
+    show_arrears(db, athletes, today)
+
+    if user_profile.get('role') == 'admin':
+        with st.expander("🛠️ Migrasi Data SPP Lama"):
+            st.caption("Data bulanan lama tetap terbaca; migrasi memindahkannya ke dokumen per atlet agar tidak perlu dibaca terpisah. Aman dijalankan berulang.")
+            if st.button("Jalankan Migrasi SPP", key="migrate_spp"):
+                with st.spinner("Memindahkan data SPP..."):
+                    migrated = migrate_spp_payments(db, user_profile)
+                if migrated is not None:
+                    st.success(f"{migrated} pembayaran dipindahkan.")
+
+
+def show_arrears(db, athletes, today):
+    """Rekap pembayaran beberapa bulan (atlet × bulan) dan daftar tunggakan."""
+    st.divider()
+    st.subheader("Rekap & Tunggakan SPP")
+    years = list(range(today.year - 2, today.year + 1))
+    col1, col2, col3, col4 = st.columns(4)
+    start_year = col1.selectbox("Dari Tahun", years, index=len(years) - 1, key="spp_range_start_year")
+    start_month = MONTHS.index(col2.selectbox("Dari Bulan", MONTHS, index=0, key="spp_range_start_month")) + 1
+    end_year = col3.selectbox("Sampai Tahun", years, index=len(years) - 1, key="spp_range_end_year")
+    end_month = MONTHS.index(col4.selectbox("Sampai Bulan", MONTHS, index=today.month - 1, key="spp_range_end_month")) + 1
+
+    start, end = datetime(start_year, start_month, 1), datetime(end_year, end_month, 1)
+    # Bulan yang belum berjalan belum bisa menunggak
+    end = min(end, datetime(today.year, today.month, 1))
+    if start > end:
+        st.warning("Bulan awal harus sebelum bulan akhir (dan tidak melewati bulan ini).")
+        return
+
+    months = month_keys(start, end)
+    pivot = build_spp_pivot(athletes, load_spp_range(db, start, end), months)
+    report = arrears_report(athletes, pivot)
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("💰 Terbayar", f"Rp {pivot.sum().sum():,.0f}")
+    col2.metric("⚠️ Atlet Menunggak", f"{len(report)} Atlet")
+    col3.metric("🧾 Total Tunggakan", f"Rp {report['outstanding'].sum():,.0f}")
+
+    with st.expander("Tabel Atlet × Bulan"):
+        names = {athlete['id']: athlete['name'] for athlete in athletes}
+        df_pivot = pivot.fillna(0).astype(int).rename(columns=month_label)
+        df_pivot.insert(0, 'Nama Atlet', df_pivot.index.map(names))
+        st.dataframe(df_pivot, use_container_width=True, hide_index=True)
+
+    if report.empty:
+        st.success("Tidak ada tunggakan pada rentang ini.")
+        return
+    df_report = report.rename(columns={'name': 'Nama Atlet', 'level': 'Level', 'months': 'Bulan Belum Lunas',
+                                       'count': 'Jumlah Bulan', 'outstanding': 'Tunggakan (Rp)'}).drop(columns='athlete_id')
+    st.dataframe(df_report, use_container_width=True, hide_index=True)
+    st.download_button(
+        label="📥 Unduh Laporan Tunggakan",
+        data=df_report.to_csv(index=False).encode('utf-8'),
+        file_name=f"tunggakan_spp_{months[0]}_{months[-1]}.csv",
+        mime="text/csv",
+        use_container_width=True
+    )
+
 
 def payment_dialog(db, user_profile, year, month, athlete_row):
     """Dialog untuk mencatat atau mengedit pembayaran."""
@@ -1,10 +1,14 @@
 import streamlit as st
+import pandas as pd
+import numpy as np
 from datetime import datetime
-from utils.database import load_athletes, add_performance_record
+from utils.database import load_athletes, add_performance_record, add_performance_records_bulk
 
 # --- Konstanta untuk Gaya & Jarak ---
 STROKES = ["Gaya Bebas", "Gaya Punggung", "Gaya Dada", "Gaya Kupu-kupu"]
 DISTANCES = [25, 50, 100, 200, 400, 800, 1500]
+# Kolom file import massal (sama dengan laporan CSV di Manajemen & Analisa)
+BULK_COLUMNS = ['Nama Atlet', 'Nama Event', 'Tanggal', 'Gaya', 'Jarak (m)', 'Waktu']
 
 # --- Fungsi Helper ---
 def calculate_age_by_year(dob_str, event_date):
@@ -26,6 +30,96 @@ def calculate_ku(age):
     elif 8 <= age <= 9: return "KU 5"
     else: return "Pra KU"
 
+def prepare_bulk_records(df_raw, athletes, recorded_by):
+    """
+    Menyiapkan hasil import massal untuk seluruh baris sekaligus: mencocokkan nama
+    atlet ke id, menghitung usia & KU saat event (semantik sama dengan
+    calculate_age_by_year & calculate_ku), dan memvalidasi gaya, jarak, tanggal, waktu.
+    Mengembalikan (list record siap simpan, DataFrame baris yang bermasalah).
+    """
+    df = df_raw.rename(columns=lambda c: str(c).strip())
+    missing_columns = [c for c in BULK_COLUMNS if c not in df.columns]
+    if missing_columns:
+        raise ValueError(f"Kolom tidak ditemukan di file: {', '.join(missing_columns)}")
+
+    df = df[BULK_COLUMNS].reset_index(drop=True)
+    df.insert(0, 'Baris', range(2, len(df) + 2))  # baris 1 adalah header
+
+    # Cocokkan nama atlet (tidak peka huruf besar/kecil & spasi di tepi)
+    df_athletes = pd.DataFrame(athletes).reindex(columns=['id', 'name', 'date_of_birth'])
+    df_athletes['_key'] = df_athletes['name'].astype(str).str.strip().str.lower()
+    df['_key'] = df['Nama Atlet'].astype(str).str.strip().str.lower()
+    # Nama yang cocok ke lebih dari satu atlet tidak bisa dipetakan dengan aman
+    ambiguous_keys = df_athletes.groupby('_key')['id'].nunique().loc[lambda counts: counts > 1].index
+    df = df.merge(df_athletes.drop_duplicates('_key'), on='_key', how='left')
+    ambiguous = df['_key'].isin(ambiguous_keys)
+
+    event_date = pd.to_datetime(df['Tanggal'], dayfirst=True, errors='coerce', format='mixed').dt.normalize()
+    distance = pd.to_numeric(df['Jarak (m)'], errors='coerce')
+    stroke = df['Gaya'].astype(str).str.strip()
+
+    # Waktu "MM:SS.xx" atau "SS.xx" (xx = milidetik 2 digit seperti di form input)
+    time_parts = df['Waktu'].astype(str).str.strip().str.extract(r'^(?:(\d{1,2}):)?(\d{1,2})[.,](\d{1,2})$')
+    minutes = pd.to_numeric(time_parts[0], errors='coerce').fillna(0)
+    seconds = pd.to_numeric(time_parts[1], errors='coerce')
+    hundredths = pd.to_numeric(time_parts[2].str.ljust(2, '0'), errors='coerce')
+    time_ms = (minutes * 60 * 1000) + (seconds * 1000) + (hundredths * 10)
+
+    birth_year = pd.to_datetime(df['date_of_birth'], format='%Y-%m-%d', errors='coerce').dt.year
+    age = (event_date.dt.year - birth_year).fillna(0).astype(int)
+    ku = np.select(
+        [age >= 19, age >= 16, age >= 14, age >= 12, age >= 10, age >= 8],
+        ["KU Senior", "KU 1", "KU 2", "KU 3", "KU 4", "KU 5"],
+        default="Pra KU"
+    )
+
+    checks = [
+        (df['id'].isna(), "Atlet tidak ditemukan"),
+        (ambiguous, "Nama atlet ambigu (lebih dari satu atlet dengan nama ini)"),
+        (df['id'].notna() & ~ambiguous & df['date_of_birth'].isna(), "Tanggal lahir atlet belum diisi"),
+        (event_date.isna(), "Tanggal tidak valid"),
+        (~stroke.isin(STROKES), "Gaya tidak dikenal"),
+        (~distance.isin(DISTANCES), "Jarak tidak dikenal"),
+        (time_ms.isna() | (minutes > 59) | (seconds > 59), "Format waktu harus MM:SS.xx"),
+    ]
+    errors = pd.Series("", index=df.index)
+    for mask, message in checks:
+        errors = errors.mask(mask, errors + message + "; ")
+    is_valid = errors == ""
+
+    df_errors = df.loc[~is_valid, ['Baris', 'Nama Atlet', 'Tanggal', 'Gaya', 'Jarak (m)', 'Waktu']].copy()
+    df_errors['Kesalahan'] = errors[~is_valid].str.rstrip("; ")
+
+    valid = is_valid.to_numpy()
+    valid_time_ms = time_ms[valid].astype(int)
+    time_formatted = (
+        (valid_time_ms // 60000).astype(str).str.zfill(2) + ":" +
+        (valid_time_ms // 1000 % 60).astype(str).str.zfill(2) + "." +
+        (valid_time_ms // 10 % 100).astype(str).str.zfill(2)
+    )
+    competition_name = df['Nama Event'].fillna("").astype(str).str.strip().replace("", "Latihan Harian")
+
+    records = [
+        {
+            "athlete_id": athlete_id,
+            "athlete_name": athlete_name,
+            "competition_name": competition,
+            "event_date": date.to_pydatetime(),
+            "stroke": stroke_value,
+            "distance": int(distance_value),
+            "time_ms": int(ms),
+            "time_formatted": formatted,
+            "recorded_by": recorded_by,
+            "age_at_event": int(age_value),
+            "ku_at_event": str(ku_value)
+        }
+        for athlete_id, athlete_name, competition, date, stroke_value, distance_value, ms, formatted, age_value, ku_value in zip(
+            df['id'][valid], df['name'][valid], competition_name[valid], event_date[valid], stroke[valid],
+            distance[valid], valid_time_ms, time_formatted, age[valid], ku[valid]
+        )
+    ]
+    return records, df_errors
+
 def show_page(db, user_profile):
     if user_profile.get('role') not in ['coach', 'admin']:
         st.error("Anda tidak memiliki izin untuk mengakses halaman ini.")
@@ -33,13 +127,15 @@ def show_page(db, user_profile):
         
     st.header("Input Hasil Event / Latihan")
 
-    athletes = load_athletes(db)
+    athletes = load_athletes(db, fields=['name', 'date_of_birth'])
     if not athletes:
         st.warning("Belum ada data atlet. Silakan tambahkan di halaman Manajemen Atlet.")
         st.stop()
 
     athlete_options = {athlete['id']: athlete['name'] for athlete in athletes}
 
+    bulk_import_section(db, user_profile, athletes)
+
     # --- FORMULIR INPUT ---
     with st.form("input_performance_form", clear_on_submit=True):
         st.subheader("Detail Event & Atlet")
@@ -107,3 +203,60 @@ def show_page(db, user_profile):
                 st.success(f"Catatan waktu untuk {athlete_options.get(selected_athlete_id)} berhasil disimpan!")
             else:
                 st.error("Terjadi kesalahan saat menyimpan data.")
+
+
+def bulk_import_section(db, user_profile, athletes):
+    """Import massal hasil event dari file CSV/XLSX dengan preview kesalahan."""
+    if 'bulk_import_key' not in st.session_state: st.session_state.bulk_import_key = 0
+
+    with st.expander("📥 Import Massal Hasil Event (CSV/XLSX)"):
+        st.caption(f"Kolom wajib: {', '.join(BULK_COLUMNS)}. Tanggal dalam format DD/MM/YYYY, waktu dalam format MM:SS.xx. Nama atlet harus sama dengan nama di Manajemen Atlet.")
+        template_csv = pd.DataFrame(columns=BULK_COLUMNS).to_csv(index=False).encode('utf-8')
+        st.download_button("📄 Unduh Template CSV", data=template_csv, file_name="template_import_hasil_event.csv", mime="text/csv")
+
+        uploaded_file = st.file_uploader("Pilih file hasil event", type=["csv", "xlsx"], key=f"bulk_import_file_{st.session_state.bulk_import_key}")
+        if uploaded_file is not None:
+            try:
+                if uploaded_file.name.lower().endswith(".xlsx"):
+                    df_raw = pd.read_excel(uploaded_file, dtype={'Waktu': str})
+                else:
+                    df_raw = pd.read_csv(uploaded_file, dtype=str)
+                records, df_errors = prepare_bulk_records(df_raw, athletes, user_profile.get('displayName', 'N/A'))
+            except ImportError:
+                st.error("Membaca file XLSX membutuhkan paket openpyxl. Gunakan file CSV atau install openpyxl.")
+                return
+            except ValueError as e:
+                st.error(f"File tidak dapat dibaca: {e}")
+                return
+
+            col_valid, col_error = st.columns(2)
+            col_valid.metric("✅ Siap Disimpan", f"{len(records)} Baris")
+            col_error.metric("❌ Bermasalah", f"{len(df_errors)} Baris")
+
+            if not df_errors.empty:
+                st.warning("Baris berikut tidak akan disimpan. Perbaiki file lalu upload ulang jika perlu.")
+                st.dataframe(df_errors, use_container_width=True, hide_index=True)
+
+            if records:
+                df_preview = pd.DataFrame(records)
+                df_preview['event_date'] = df_preview['event_date'].dt.strftime('%d/%m/%y')
+                st.dataframe(
+                    df_preview[['athlete_name', 'competition_name', 'event_date', 'age_at_event', 'ku_at_event', 'stroke', 'distance', 'time_formatted']].rename(columns={
+                        'athlete_name': 'Nama Atlet', 'competition_name': 'Nama Event', 'event_date': 'Tanggal',
+                        'age_at_event': 'Usia', 'ku_at_event': 'KU', 'stroke': 'Gaya', 'distance': 'Jarak (m)', 'time_formatted': 'Waktu'
+                    }),
+                    use_container_width=True, hide_index=True
+                )
+                if st.button(f"Simpan {len(records)} Catatan Waktu", type="primary", use_container_width=True, key="bulk_import_submit"):
+                    events = ", ".join(sorted({r['competition_name'] for r in records}))
+                    with st.spinner("Menyimpan data..."):
+                        saved = add_performance_records_bulk(db, records, user_profile, events)
+                    if saved == len(records):
+                        st.toast(f"{saved} catatan waktu berhasil disimpan!", icon="✅")
+                        st.session_state.bulk_import_key += 1
+                        st.rerun()
+                    elif saved:
+                        # Sebagian batch sudah tersimpan: file dilepas agar tidak tersimpan ganda
+                        st.session_state.bulk_import_key += 1
+                        st.warning(f"Hanya {saved} catatan pertama (sesuai urutan pratinjau) yang tersimpan. "
+                                   f"Hapus baris tersebut dari file, lalu import ulang {len(records) - saved} sisanya.")
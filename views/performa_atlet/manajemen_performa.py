@@ -4,14 +4,16 @@ import altair as alt
 from datetime import datetime
 from utils.database import (
     load_athletes, 
-    get_performance_records, 
+    load_performance_table, 
     update_performance_record, 
     delete_performance_record
 )
+from utils.performance_snapshot import filter_performance_table
 
 # --- Konstanta untuk Gaya & Jarak ---
 STROKES = ["Semua Gaya", "Gaya Bebas", "Gaya Punggung", "Gaya Dada", "Gaya Kupu-kupu"]
 DISTANCES = ["Semua Jarak", 25, 50, 100, 200, 400, 800, 1500]
+PAGE_SIZE_OPTIONS = [10, 25, 50, 100]
 
 def show_page(db, user_profile):
     if user_profile.get('role') not in ['coach', 'admin']:
@@ -20,16 +22,45 @@ def show_page(db, user_profile):
         
     st.header("Manajemen & Analisa Performa")
 
-    athletes = load_athletes(db)
-    all_records = get_performance_records(db)
+    athletes = load_athletes(db, fields=['name'])
     
     if not athletes:
         st.warning("Data atlet tidak ditemukan.")
         st.stop()
     
     athlete_options = {athlete['id']: athlete['name'] for athlete in athletes}
-    
-    # --- Filter ---
+
+    # --- Data (snapshot Arrow bersama, tanpa query ke database) ---
+    performance_table = load_performance_table(db)
+    if performance_table is None:
+        st.stop()
+
+    performance_section(db, user_profile, performance_table, athlete_options)
+
+def _cached(name, table, key, builder):
+    """
+    Memo satu entri per bagian halaman di session_state: hasil builder() dipakai ulang
+    selama snapshot (objek tabel yang sama) dan key tidak berubah.
+    """
+    cache_key = f"perf_cache_{name}"
+    cached = st.session_state.get(cache_key)
+    if cached is None or cached[0] is not table or cached[1] != key:
+        cached = (table, key, builder())
+        st.session_state[cache_key] = cached
+    return cached[2]
+
+@st.fragment
+def performance_section(db, user_profile, performance_table, athlete_options):
+    """
+    Filter, tabel, dan grafik dalam satu fragment: mengubah filter hanya menjalankan ulang
+    bagian ini, bukan seluruh aplikasi. Tabel adalah fragment di dalamnya, sehingga memilih
+    baris atau membuka dialog hanya menjalankan ulang tabel.
+    """
+    filters = filter_panel(athlete_options)
+    table_section(db, user_profile, performance_table, filters, athlete_options)
+    chart_section(performance_table, filters, athlete_options)
+
+def filter_panel(athlete_options):
     st.subheader("🔍 Filter Data")
     col1, col2, col3, col4 = st.columns(4)
     
@@ -38,61 +69,72 @@ def show_page(db, user_profile):
         selected_athlete_id = st.selectbox(
             "Cari Nama Atlet",
             options=list(options_for_selectbox.keys()),
-            format_func=lambda x: options_for_selectbox.get(x, "")
+            format_func=lambda x: options_for_selectbox.get(x, ""),
+            key="perf_filter_athlete"
         )
 
-    filter_stroke = col2.selectbox("Pilih Gaya", STROKES)
-    filter_distance = col3.selectbox("Pilih Jarak", DISTANCES)
+    filter_stroke = col2.selectbox("Pilih Gaya", STROKES, key="perf_filter_stroke")
+    filter_distance = col3.selectbox("Pilih Jarak", DISTANCES, key="perf_filter_distance")
     limit_options = [5, 10, 15, "Semua"]
-    filter_limit = col4.selectbox("Data Terakhir", limit_options, index=0)
-
-
-    # --- Proses Filtering ---
-    df = pd.DataFrame()
-    if all_records:
-        df = pd.DataFrame(all_records).sort_values(by='event_date', ascending=True)
-        
-        if selected_athlete_id:
-            df = df[df['athlete_id'] == selected_athlete_id]
-
-        if filter_stroke != "Semua Gaya":
-            df = df[df['stroke'] == filter_stroke]
-        if filter_distance != "Semua Jarak":
-            df = df[df['distance'] == filter_distance]
-        
-        if filter_limit != "Semua" and len(df) > filter_limit:
-            df = df.tail(filter_limit)
+    filter_limit = col4.selectbox("Data Terakhir", limit_options, index=0, key="perf_filter_limit")
+    page_size = None
+    if filter_limit == "Semua":
+        page_size = col4.selectbox("Baris per Halaman", PAGE_SIZE_OPTIONS, key="perf_page_size")
+    return {
+        'athlete_id': selected_athlete_id or None,
+        'stroke': filter_stroke,
+        'distance': filter_distance,
+        'limit': filter_limit,
+        'page_size': page_size,
+    }
+
+def _query_filters(filters):
+    return {
+        'athlete_id': filters['athlete_id'],
+        'stroke': filters['stroke'] if filters['stroke'] != "Semua Gaya" else None,
+        'distance': filters['distance'] if filters['distance'] != "Semua Jarak" else None,
+    }
+
+@st.fragment
+def table_section(db, user_profile, performance_table, filters, athlete_options):
+    query_filters = _query_filters(filters)
+    filter_limit = filters['limit']
+    page_size = filters['page_size']
+
+    has_next_page = False
+    if filter_limit == "Semua":
+        # Pagination berbasis cursor (event_date, id): setiap halaman hanya mengambil barisnya sendiri
+        pagination_key = (tuple(query_filters.values()), page_size)
+        if st.session_state.get('perf_pagination_key') != pagination_key:
+            st.session_state.perf_pagination_key = pagination_key
+            st.session_state.perf_page_cursors = [None]
+
+        cursor = st.session_state.perf_page_cursors[-1]
+        page_key = (pagination_key, cursor)
+        records = _cached('page', performance_table, page_key, lambda: filter_performance_table(
+            performance_table, **query_filters, limit=page_size + 1, start_after=cursor))
+        has_next_page = len(records) > page_size
+        records = records[:page_size]
+    else:
+        page_key = (tuple(query_filters.values()), filter_limit)
+        records = _cached('page', performance_table, page_key, lambda: filter_performance_table(
+            performance_table, **query_filters, limit=filter_limit))
 
 
     # --- Tampilan Tabel Data ---
     st.divider()
     st.subheader("📊 Tabel Data Performa")
 
-    if df.empty:
+    if not records:
         st.info("Tidak ada data yang cocok dengan filter yang dipilih atau belum ada catatan waktu yang tersimpan.")
     else:
-        df_display_sorted = df.sort_values(by='event_date', ascending=False).reset_index(drop=True)
-        
-        df_formatted = df_display_sorted.copy()
-        df_formatted.insert(0, 'No.', range(1, len(df_formatted) + 1))
-        df_formatted['event_date'] = pd.to_datetime(df_formatted['event_date']).dt.strftime('%d/%m/%y')
-        
-        if 'age_at_event' in df_formatted.columns:
-            df_formatted['age_at_event'] = df_formatted['age_at_event'].fillna(0).astype(int)
-
-        df_formatted = df_formatted.rename(columns={
-            'athlete_name': 'Nama Atlet', 
-            'competition_name': 'Nama Event', 
-            'event_date': 'Tanggal',
-            'age_at_event': 'Usia',
-            'ku_at_event': 'KU',
-            'stroke': 'Gaya', 
-            'distance': 'Jarak (m)', 
-            'time_formatted': 'Waktu'
-        })
+        row_offset = 0
+        if filter_limit == "Semua":
+            row_offset = (len(st.session_state.perf_page_cursors) - 1) * page_size
+        df_display_sorted, df_formatted = _cached('frame', performance_table, (page_key, row_offset), lambda: _build_table_frames(records, row_offset))
         
         st.dataframe(
-            df_formatted[['No.', 'Nama Atlet', 'Nama Event', 'Tanggal', 'Usia', 'KU', 'Gaya', 'Jarak (m)', 'Waktu']], 
+            df_formatted, 
             use_container_width=True, 
             hide_index=True, 
             on_select="rerun", 
@@ -100,11 +142,28 @@ def show_page(db, user_profile):
             key="perf_selection"
         )
 
+        if filter_limit == "Semua":
+            current_page = len(st.session_state.perf_page_cursors)
+            _, nav_col, _ = st.columns([3, 2.5, 3])
+            with nav_col:
+                cols = st.columns([1, 1, 1], gap="small")
+                with cols[0]:
+                    # Callback mengubah cursor sebelum fragment dijalankan ulang oleh klik tombol
+                    st.button("◀", use_container_width=True, disabled=(current_page <= 1), key="perf_prev_button",
+                              on_click=lambda: st.session_state.perf_page_cursors.pop())
+                with cols[1]:
+                    st.markdown(f"""<div style="background-color: var(--secondary-background-color); border-radius: 50%; width: 40px; height: 40px; display: flex; align-items: center; justify-content: center; font-weight: bold; font-size: 1.2em; margin: auto;">{current_page}</div>""", unsafe_allow_html=True)
+                with cols[2]:
+                    last_record = records[-1]
+                    st.button("▶", use_container_width=True, disabled=not has_next_page, key="perf_next_button",
+                              on_click=st.session_state.perf_page_cursors.append, args=((last_record['event_date'], last_record['id']),))
+            st.write("") # Spacer
+
         col_edit, col_delete = st.columns(2)
 
         selected_indices = st.session_state.perf_selection['selection']['rows']
         selected_record = None
-        if selected_indices:
+        if selected_indices and selected_indices[0] < len(df_display_sorted):
             selected_record = df_display_sorted.iloc[selected_indices[0]].to_dict()
 
         if col_edit.button("✏️ Edit Pilihan", use_container_width=True):
@@ -113,24 +172,22 @@ def show_page(db, user_profile):
             else:
                 edit_dialog(db, user_profile, selected_record)
         
-        if col_delete.button("❌ Hapus Pilihan", use_container_width=True, type="secondary"):
+        if col_delete.button("❌ Hapus Pilihan", use_container_width=True, type="secondary",
+                             on_click=_set_deleting_record, args=(selected_record,)):
             if not selected_record:
                 st.warning("Pilih satu baris di tabel terlebih dahulu untuk menghapus.")
-            else:
-                st.session_state.deleting_perf_record = selected_record
-                st.rerun()
 
         st.write("") # Spacer
-        csv = df_formatted[['No.', 'Nama Atlet', 'Nama Event', 'Tanggal', 'Usia', 'KU', 'Gaya', 'Jarak (m)', 'Waktu']].to_csv(index=False).encode('utf-8')
+        csv = df_formatted.to_csv(index=False).encode('utf-8')
         
         filename_parts = ["laporan"]
-        if selected_athlete_id:
-            athlete_name = athlete_options.get(selected_athlete_id, "atlet").split()[0]
+        if filters['athlete_id']:
+            athlete_name = athlete_options.get(filters['athlete_id'], "atlet").split()[0]
             filename_parts.append(athlete_name)
-        if filter_distance != "Semua Jarak":
-            filename_parts.append(f"{filter_distance}m")
-        if filter_stroke != "Semua Gaya":
-            filename_parts.append(filter_stroke)
+        if filters['distance'] != "Semua Jarak":
+            filename_parts.append(f"{filters['distance']}m")
+        if filters['stroke'] != "Semua Gaya":
+            filename_parts.append(filters['stroke'])
         
         if len(filename_parts) > 1:
             filename = "_".join(filename_parts) + ".csv"
@@ -150,51 +207,45 @@ def show_page(db, user_profile):
     if 'deleting_perf_record' in st.session_state and st.session_state.deleting_perf_record:
         delete_confirmation_dialog(db, user_profile)
 
+def _set_deleting_record(record):
+    st.session_state.deleting_perf_record = record
+
+def _build_table_frames(records, row_offset):
+    df_display_sorted = pd.DataFrame(records).sort_values(by='event_date', ascending=False).reset_index(drop=True)
+    
+    df_formatted = df_display_sorted.copy()
+    df_formatted.insert(0, 'No.', range(row_offset + 1, row_offset + len(df_formatted) + 1))
+    df_formatted['event_date'] = pd.to_datetime(df_formatted['event_date']).dt.strftime('%d/%m/%y')
+    
+    if 'age_at_event' in df_formatted.columns:
+        df_formatted['age_at_event'] = df_formatted['age_at_event'].fillna(0).astype(int)
+
+    df_formatted = df_formatted.rename(columns={
+        'athlete_name': 'Nama Atlet', 
+        'competition_name': 'Nama Event', 
+        'event_date': 'Tanggal',
+        'age_at_event': 'Usia',
+        'ku_at_event': 'KU',
+        'stroke': 'Gaya', 
+        'distance': 'Jarak (m)', 
+        'time_formatted': 'Waktu'
+    })
+    return df_display_sorted, df_formatted[['No.', 'Nama Atlet', 'Nama Event', 'Tanggal', 'Usia', 'KU', 'Gaya', 'Jarak (m)', 'Waktu']]
+
+def chart_section(performance_table, filters, athlete_options):
     # --- Grafik Progres dengan Altair ---
     st.divider()
     st.subheader("📈 Grafik Progres Atlet")
     
-    if selected_athlete_id and filter_stroke != "Semua Gaya" and filter_distance != "Semua Jarak":
-        if len(df) > 1:
-            chart_df = df.copy().reset_index() 
-            chart_df['session_num'] = chart_df.index + 1
-            chart_df['time_seconds'] = chart_df['time_ms'] / 1000.0
-            chart_df['age_ku_label'] = chart_df['age_at_event'].fillna(0).astype(int).astype(str) + ' / ' + chart_df['ku_at_event'].fillna('')
-
-            min_time = chart_df['time_seconds'].min()
-            max_time = chart_df['time_seconds'].max()
-            max_session = chart_df['session_num'].max()
-
-            base = alt.Chart(chart_df).encode(
-                x=alt.X('session_num:Q', title='Sesi Latihan / Event', 
-                        scale=alt.Scale(domain=[0.5, max_session + 0.5], clamp=True),
-                        axis=alt.Axis(tickMinStep=1, format='d', labelFontWeight='bold'))
-            )
-
-            line = base.mark_line(color='royalblue').encode(
-                y=alt.Y('time_seconds:Q', title='Waktu (MM:SS)', 
-                        scale=alt.Scale(domain=[min_time - 5, max_time + 5]),
-                        axis=alt.Axis(labelExpr="floor(datum.value / 60) + ':' + slice(toString(100 + floor(datum.value % 60)), -2)", labelFontWeight='bold'))
-            )
-
-            points = base.mark_point(size=80, filled=True, color='royalblue').encode(y=alt.Y('time_seconds:Q'))
-            
-            text = base.mark_text(align='center', baseline='bottom', dy=-8, color='white', fontWeight='bold').encode(
-                y=alt.Y('time_seconds:Q'), text=alt.Text('time_formatted:N')
-            )
-
-            chart = (line + points + text).encode(
-                tooltip=[
-                    alt.Tooltip('athlete_name', title='Nama Atlet'),
-                    alt.Tooltip('event_date:T', title='Tanggal', format='%d %B %Y'),
-                    alt.Tooltip('competition_name', title='Nama Event'),
-                    alt.Tooltip('age_ku_label', title='Usia / KU'),
-                    alt.Tooltip('time_formatted', title='Waktu')
-                ]
-            ).properties(
-                title=f"Grafik Progres {athlete_options[selected_athlete_id]} - {filter_distance}m {filter_stroke}"
-            ).interactive()
-
+    filter_stroke, filter_distance = filters['stroke'], filters['distance']
+    if filters['athlete_id'] and filter_stroke != "Semua Gaya" and filter_distance != "Semua Jarak":
+        # Tabel dipaginasi, grafik dengan "Semua" tetap memakai seluruh riwayat satu atlet/gaya/jarak
+        limit = None if filters['limit'] == "Semua" else filters['limit']
+        query_filters = _query_filters(filters)
+        chart = _cached('chart', performance_table, (tuple(query_filters.values()), limit), lambda: _build_chart(
+            filter_performance_table(performance_table, **query_filters, limit=limit),
+            f"Grafik Progres {athlete_options[filters['athlete_id']]} - {filter_distance}m {filter_stroke}"))
+        if chart is not None:
             st.altair_chart(chart, use_container_width=True)
             st.caption("Arahkan mouse atau tekan titik biru pada grafik untuk melihat detail. Grafik dapat digeser dan di-zoom.")
         else:
@@ -202,6 +253,46 @@ def show_page(db, user_profile):
     else:
         st.info("Pilih 1 atlet spesifik, lalu pilih gaya dan jarak untuk melihat grafik progres.")
 
+def _build_chart(records, title):
+    if len(records) <= 1:
+        return None
+    chart_df = pd.DataFrame(records).sort_values(by='event_date', ascending=True).reset_index()
+    chart_df['session_num'] = chart_df.index + 1
+    chart_df['time_seconds'] = chart_df['time_ms'] / 1000.0
+    chart_df['age_ku_label'] = chart_df['age_at_event'].fillna(0).astype(int).astype(str) + ' / ' + chart_df['ku_at_event'].fillna('')
+
+    min_time = chart_df['time_seconds'].min()
+    max_time = chart_df['time_seconds'].max()
+    max_session = chart_df['session_num'].max()
+
+    base = alt.Chart(chart_df).encode(
+        x=alt.X('session_num:Q', title='Sesi Latihan / Event', 
+                scale=alt.Scale(domain=[0.5, max_session + 0.5], clamp=True),
+                axis=alt.Axis(tickMinStep=1, format='d', labelFontWeight='bold'))
+    )
+
+    line = base.mark_line(color='royalblue').encode(
+        y=alt.Y('time_seconds:Q', title='Waktu (MM:SS)', 
+                scale=alt.Scale(domain=[min_time - 5, max_time + 5]),
+                axis=alt.Axis(labelExpr="floor(datum.value / 60) + ':' + slice(toString(100 + floor(datum.value % 60)), -2)", labelFontWeight='bold'))
+    )
+
+    points = base.mark_point(size=80, filled=True, color='royalblue').encode(y=alt.Y('time_seconds:Q'))
+    
+    text = base.mark_text(align='center', baseline='bottom', dy=-8, color='white', fontWeight='bold').encode(
+        y=alt.Y('time_seconds:Q'), text=alt.Text('time_formatted:N')
+    )
+
+    return (line + points + text).encode(
+        tooltip=[
+            alt.Tooltip('athlete_name', title='Nama Atlet'),
+            alt.Tooltip('event_date:T', title='Tanggal', format='%d %B %Y'),
+            alt.Tooltip('competition_name', title='Nama Event'),
+            alt.Tooltip('age_ku_label', title='Usia / KU'),
+            alt.Tooltip('time_formatted', title='Waktu')
+        ]
+    ).properties(title=title).interactive()
+
 def edit_dialog(db, user_profile, record):
     @st.dialog("Edit Catatan Waktu")
     def _dialog():
@@ -275,6 +366,4 @@ def delete_confirmation_dialog(db, user_profile):
             st.toast("Catatan berhasil dihapus.", icon="🗑️")
             del st.session_state.deleting_perf_record
             st.rerun()
-    if col2.button("Batal", use_container_width=True):
-        del st.session_state.deleting_perf_record
-        st.rerun()
+    col2.button("Batal", use_container_width=True, on_click=_set_deleting_record, args=(None,))
@@ -1,7 +1,37 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-from utils.database import get_performance_records, load_athletes
+from utils.database import get_personal_bests, load_athletes, BEST_TIME_FIELDS
+
+# Tentukan urutan gaya yang diinginkan
+STROKE_ORDER = ["Gaya Kupu-kupu", "Gaya Punggung", "Gaya Dada", "Gaya Bebas"]
+DISPLAY_COLUMNS = ['No.', 'Nomor Pertandingan', 'Nama Event', 'Tanggal', 'Waktu Terbaik']
+
+def best_times_frame(best_records):
+    best_times_df = pd.DataFrame(best_records)
+    best_times_df['time_ms'] = pd.to_numeric(best_times_df['time_ms'])
+    best_times_df['event_date'] = pd.to_datetime(best_times_df['event_date'])
+    return best_times_df
+
+def filter_best_times(best_times_df, filter_stroke):
+    if filter_stroke != "Semua Gaya":
+        best_times_df = best_times_df[best_times_df['stroke'] == filter_stroke]
+    # Ubah kolom 'stroke' menjadi tipe kategori dengan urutan kustom
+    best_times_df = best_times_df.assign(stroke=pd.Categorical(best_times_df['stroke'], categories=STROKE_ORDER, ordered=True))
+    # Urutkan berdasarkan kategori gaya, lalu berdasarkan jarak
+    return best_times_df.sort_values(by=['stroke', 'distance'])
+
+def format_best_times(best_times_df):
+    best_times_df = best_times_df.reset_index(drop=True)
+    best_times_df.insert(0, 'No.', range(1, len(best_times_df) + 1))
+
+    best_times_df['Nomor Pertandingan'] = best_times_df['distance'].astype(str) + 'm ' + best_times_df['stroke'].astype(str)
+    best_times_df['Tanggal'] = best_times_df['event_date'].dt.strftime('%d %B %Y')
+    
+    return best_times_df.rename(columns={
+        'time_formatted': 'Waktu Terbaik',
+        'competition_name': 'Nama Event'
+    })
 
 def show_page(db, user_profile):
     """Menampilkan halaman Personal Best untuk Admin/Coach."""
@@ -11,7 +41,7 @@ def show_page(db, user_profile):
         
     st.header("🏆 Personal Best Atlet")
 
-    athletes = load_athletes(db)
+    athletes = load_athletes(db, fields=['name'])
     if not athletes:
         st.warning("Belum ada data atlet di sistem.")
         st.stop()
@@ -29,17 +59,13 @@ def show_page(db, user_profile):
         st.info("Silakan pilih seorang atlet di atas untuk memulai.")
         st.stop()
 
-    all_records = get_performance_records(db, athlete_id=selected_athlete_id)
+    best_records = get_personal_bests(db, selected_athlete_id, fields=BEST_TIME_FIELDS)
 
-    if not all_records:
+    if not best_records:
         st.warning(f"**{athlete_options[selected_athlete_id]}** belum memiliki catatan waktu yang tersimpan.")
         st.stop()
 
-    df = pd.DataFrame(all_records)
-    df['time_ms'] = pd.to_numeric(df['time_ms'])
-    df['event_date'] = pd.to_datetime(df['event_date'])
-    
-    best_times_df = df.loc[df.groupby(['distance', 'stroke'])['time_ms'].idxmin()]
+    best_times_df = best_times_frame(best_records)
     
     st.write("") # Spacer
     
@@ -47,16 +73,8 @@ def show_page(db, user_profile):
     stroke_options = ["Semua Gaya"] + sorted(best_times_df['stroke'].unique().tolist())
     filter_stroke = st.selectbox("Filter Gaya", stroke_options)
 
-    # Terapkan filter
-    if filter_stroke != "Semua Gaya":
-        best_times_df = best_times_df[best_times_df['stroke'] == filter_stroke]
-
-    # Tentukan urutan gaya yang diinginkan
-    stroke_order = ["Gaya Kupu-kupu", "Gaya Punggung", "Gaya Dada", "Gaya Bebas"]
-    # Ubah kolom 'stroke' menjadi tipe kategori dengan urutan kustom
-    best_times_df['stroke'] = pd.Categorical(best_times_df['stroke'], categories=stroke_order, ordered=True)
-    # Urutkan berdasarkan kategori gaya, lalu berdasarkan jarak
-    best_times_df = best_times_df.sort_values(by=['stroke', 'distance'])
+    # Terapkan filter dan urutkan
+    best_times_df = filter_best_times(best_times_df, filter_stroke)
 
     st.subheader(f"Catatan Waktu Terbaik: {athlete_options[selected_athlete_id]}")
     st.divider()
@@ -64,27 +82,16 @@ def show_page(db, user_profile):
     if best_times_df.empty:
         st.info("Tidak ada data yang cocok dengan filter yang dipilih.")
     else:
-        best_times_df = best_times_df.reset_index(drop=True)
-        best_times_df.insert(0, 'No.', range(1, len(best_times_df) + 1))
-
-        best_times_df['Nomor Pertandingan'] = best_times_df['distance'].astype(str) + 'm ' + best_times_df['stroke'].astype(str)
-        best_times_df['Tanggal'] = best_times_df['event_date'].dt.strftime('%d %B %Y')
-        
-        df_display = best_times_df.rename(columns={
-            'time_formatted': 'Waktu Terbaik',
-            'competition_name': 'Nama Event'
-        })
-        
-        display_columns = ['No.', 'Nomor Pertandingan', 'Nama Event', 'Tanggal', 'Waktu Terbaik']
+        df_display = format_best_times(best_times_df)
         
         st.dataframe(
-            df_display[display_columns],
+            df_display[DISPLAY_COLUMNS],
             use_container_width=True,
             hide_index=True
         )
 
         st.write("") # Spacer
-        csv = df_display[display_columns].to_csv(index=False).encode('utf-8')
+        csv = df_display[DISPLAY_COLUMNS].to_csv(index=False).encode('utf-8')
         
         athlete_name = athlete_options.get(selected_athlete_id, "atlet").replace(" ", "_")
         